@@ -1,22 +1,37 @@
 ﻿from __future__ import annotations
 
+import os
+
 from fastapi import APIRouter, HTTPException, Query
 
 from app.assistant import DeepSeekConfigError, GameAssistantService
+from app.engine.hints import DEFAULT_BUDGET_MS, HintService
+from app.engine.repository import SessionConflictError
 from app.engine.runtime import GameEngine
 from app.models.chat import ChatRequest, ChatResponse
+from app.models.hint import HintView
 from app.models.requests import ActRequest, NewGameRequest, ResetRequest
 from app.models.state import GameState
 from app.models.telemetry import ReplayView
 
 router = APIRouter(tags=["game"])
 engine = GameEngine()
+hints = HintService(engine, workers=int(os.getenv("HINT_WORKERS", "0") or 0))
 assistant = GameAssistantService()
 
 
+def shutdown() -> None:
+    """Release the hint worker pool and repository connections when the app stops."""
+    hints.close()
+    engine.close()
+
+
 @router.post("/new_game", response_model=GameState)
 def new_game(req: NewGameRequest) -> GameState:
-    return engine.new_game(game_id=req.game_id, seed=req.seed)
+    try:
+        return engine.new_game(game_id=req.game_id, seed=req.seed)
+    except SessionConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
 
 
 @router.get("/state", response_model=GameState)
@@ -25,6 +40,8 @@ def get_state(game_id: str = Query(...)) -> GameState:
         return engine.get_state(game_id)
     except KeyError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except SessionConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
 
 
 @router.post("/act", response_model=GameState)
@@ -35,6 +52,8 @@ def act(req: ActRequest) -> GameState:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except SessionConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
 
 
 @router.get("/replay", response_model=ReplayView)
@@ -46,6 +65,19 @@ def get_replay(game_id: str = Query(...)) -> ReplayView:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
 
+@router.get("/hint", response_model=HintView)
+def get_hint(
+    game_id: str = Query(...),
+    budget_ms: int = Query(DEFAULT_BUDGET_MS, ge=10, le=5000),
+) -> HintView:
+    try:
+        return hints.hint(game_id, budget_ms=budget_ms)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @router.post("/reset")
 def reset(req: ResetRequest) -> dict[str, str]:
     engine.reset(req.game_id)
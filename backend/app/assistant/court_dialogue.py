@@ -4,14 +4,41 @@ import json
 import os
 import re
 import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any
-
-import httpx
+from typing import TYPE_CHECKING, Any
 
 from app.models.court import CourtNpcState, CourtStrategy
 from app.models.state import GameState
 
+if TYPE_CHECKING:
+    import httpx
+
+# Per-context (so per request) switches for action-log replay: replaying must not
+# reach the model, and the event-sourced repository snapshots after any action
+# whose lines or support shift did come from it, since those cannot be replayed.
+_live_calls_allowed: ContextVar[bool] = ContextVar("court_live_calls_allowed", default=True)
+_live_calls_made: ContextVar[int] = ContextVar("court_live_calls_made", default=0)
+
+
+@contextmanager
+def live_calls_disabled() -> Iterator[None]:
+    token = _live_calls_allowed.set(False)
+    try:
+        yield
+    finally:
+        _live_calls_allowed.reset(token)
+
+
+def take_live_call_count() -> int:
+    """Model requests made in this context since the last call, then reset to zero."""
+    count = _live_calls_made.get()
+    if count:
+        _live_calls_made.set(0)
+    return count
+
 
 class CourtDialogueService:
     """Generate short in-character court lines with DeepSeek and safe fallback."""
@@ -32,10 +59,10 @@ class CourtDialogueService:
         self.settings_refresh_interval_seconds = 3.0
         self._disabled_until = 0.0
         self._judge_disabled_until = 0.0
-        self._last_settings_refresh_monotonic = 0.0
+        # -inf makes the first generate_line/judge_support_shift call read settings, not the constructor.
+        self._last_settings_refresh_monotonic = float("-inf")
         self._http_client: httpx.Client | None = None
         self._http_client_signature = ""
-        self._refresh_settings(force=True)
 
     def generate_line(
         self,
@@ -52,7 +79,7 @@ class CourtDialogueService:
             fallback = "臣请照既定军议执行。"
 
         # Keep tests deterministic and fast.
-        if os.getenv("PYTEST_CURRENT_TEST"):
+        if os.getenv("PYTEST_CURRENT_TEST") or not _live_calls_allowed.get():
             return fallback
 
         self._refresh_settings()
@@ -98,7 +125,7 @@ class CourtDialogueService:
         fallback = self._clamp_support_shift(heuristic_shift)
 
         # Keep tests deterministic and fast.
-        if os.getenv("PYTEST_CURRENT_TEST"):
+        if os.getenv("PYTEST_CURRENT_TEST") or not _live_calls_allowed.get():
             return fallback
 
         self._refresh_settings()
@@ -184,6 +211,9 @@ class CourtDialogueService:
         self._last_settings_refresh_monotonic = now
 
     def _get_http_client(self) -> httpx.Client:
+        # Imported on first live call so starting the API does not pay for the HTTP stack.
+        import httpx
+
         signature = f"{self.base_url}|{self.timeout_seconds:.3f}"
         if self._http_client is not None and self._http_client_signature == signature:
             return self._http_client
@@ -335,6 +365,7 @@ class CourtDialogueService:
         temperature: float | None = None,
         max_tokens: int | None = None,
     ) -> str:
+        _live_calls_made.set(_live_calls_made.get() + 1)
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -347,6 +378,8 @@ class CourtDialogueService:
         }
         url = f"{self.base_url}/chat/completions"
 
+        import httpx
+
         try:
             client = self._get_http_client()
             response = client.post(url, headers=headers, json=payload)
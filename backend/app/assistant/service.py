@@ -2,13 +2,14 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Any
-
-import httpx
+from typing import TYPE_CHECKING, Any
 
 from app.models.chat import ChatMode, ChatRequest, ChatResponse
 from app.models.state import GameState
 
+if TYPE_CHECKING:
+    import httpx
+
 
 class DeepSeekConfigError(RuntimeError):
     pass
@@ -22,7 +23,7 @@ class GameAssistantService:
         self.model = "deepseek-chat"
         self.max_tokens = 500
         self.timeout_seconds = 30.0
-        self._refresh_settings()
+        # Settings are read by reply(); constructing the service does no I/O.
 
     def reply(self, request: ChatRequest) -> ChatResponse:
         self._refresh_settings()
@@ -247,6 +248,9 @@ class GameAssistantService:
         }
         url = f"{self.base_url}/chat/completions"
 
+        # Imported on first use so starting the API does not pay for the HTTP stack.
+        import httpx
+
         try:
             with httpx.Client(timeout=self.timeout_seconds) as client:
                 response = client.post(url, headers=headers, json=payload)
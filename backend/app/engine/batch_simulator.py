@@ -0,0 +1,613 @@
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    np = None
+
+from app.engine import balance
+from app.engine.checks import base_probability_for_check
+from app.engine.conditions import condition_clauses
+from app.engine.court import (
+    COURT_REENTRY_COOLDOWN_TURNS,
+    COURT_TRIGGER_INTERVAL,
+    begin_court_session,
+    resolve_court_strategy,
+    settle_court_session,
+)
+from app.engine.graph import EventGraph, load_default_graph
+from app.engine.policy import option_weight, pick_court_strategy, statement_for_strategy
+from app.engine.simulator import SimulationSummary, simulate
+from app.models.court import CourtState, CourtStrategy
+from app.models.event_graph import NodeType
+from app.models.state import EventView, GameState, Outcome, Phase
+
+PHASES = list(Phase)
+PHASE_CODES = {phase: code for code, phase in enumerate(PHASES)}
+OUTCOMES = list(Outcome)
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+NODE_TYPE_CODES = {node_type: code for code, node_type in enumerate(NodeType)}
+
+INT_FIELDS = (
+    "chapter",
+    "turn",
+    "food",
+    "morale",
+    "politics",
+    "wei_pressure",
+    "health",
+    "doom",
+    "longyou_turns",
+    "guanzhong_turns",
+)
+SCALED_FIELDS = {"food", "morale", "politics"}
+MODIFIER_FIELDS = (
+    "turns_remaining",
+    "doom_per_turn_modifier",
+    "food_per_turn_modifier",
+    "morale_per_turn_modifier",
+    "success_reward_food",
+    "success_reward_morale",
+    "failure_penalty_food",
+    "failure_penalty_morale",
+    "failure_penalty_doom",
+)
+DOOM_CHAIN_NODES = ("doom_total_offensive", "doom_defense_check", "DEFEAT_SHU")
+MAX_COURT_ROUNDS = 10
+
+
+class BatchSimulator:
+    """Advance a whole batch of games in lockstep with structure-of-arrays state.
+
+    Graph traversal, check rolls, effects, clamps and battle turns are vectorized
+    per node group. Court sessions carry per-NPC state and stay on the scalar
+    court module: each game in court is materialized into a GameState, played to
+    settlement with the simulator's court policy, and written back. The batch
+    draws from its own NumPy generator, so results agree with simulate() in
+    distribution rather than run by run.
+    """
+
+    def __init__(self, n: int, seed: int = 42, graph: EventGraph | None = None) -> None:
+        if np is None:
+            raise RuntimeError("BatchSimulator requires numpy: python -m pip install numpy")
+
+        self.graph = graph or load_default_graph()
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+
+        self._node_ids = list(self.graph.nodes)
+        self._node_index = {node_id: index for index, node_id in enumerate(self._node_ids)}
+        self._node_type = np.array(
+            [NODE_TYPE_CODES[self.graph.nodes[node_id].node_type] for node_id in self._node_ids],
+            dtype=np.int8,
+        )
+        self._doom_chain_codes = np.array(
+            [self._node_index[node_id] for node_id in DOOM_CHAIN_NODES if node_id in self._node_index],
+            dtype=np.int64,
+        )
+
+        self.stats = {
+            "chapter": np.ones(n, dtype=np.int64),
+            "turn": np.ones(n, dtype=np.int64),
+            "food": np.full(n, balance.INITIAL_FOOD, dtype=np.int64),
+            "morale": np.full(n, balance.INITIAL_MORALE, dtype=np.int64),
+            "politics": np.full(n, balance.INITIAL_POLITICS, dtype=np.int64),
+            "wei_pressure": np.full(n, balance.INITIAL_WEI_PRESSURE, dtype=np.int64),
+            "health": np.full(n, balance.INITIAL_HEALTH, dtype=np.int64),
+            "doom": np.full(n, balance.INITIAL_DOOM, dtype=np.int64),
+            "longyou_turns": np.zeros(n, dtype=np.int64),
+            "guanzhong_turns": np.zeros(n, dtype=np.int64),
+        }
+        self.phase = np.full(n, PHASE_CODES[Phase.CAMPAIGN], dtype=np.int8)
+        self.outcome = np.full(n, OUTCOME_CODES[Outcome.ONGOING], dtype=np.int8)
+        self.node = np.full(n, self._node_index[self.graph.start_node], dtype=np.int64)
+        self.longyou_collapsed = np.zeros(n, dtype=bool)
+        self.flags: dict[str, np.ndarray] = {}
+
+        self.in_court = np.zeros(n, dtype=bool)
+        self.court_entry_phase = np.zeros(n, dtype=np.int8)
+        self.momentum = np.zeros(n, dtype=np.int64)
+        self.last_trigger_turn = np.zeros(n, dtype=np.int64)
+        self.has_modifier = np.zeros(n, dtype=bool)
+        self.check_modifier = np.zeros(n, dtype=np.float64)
+        self.modifier = {name: np.zeros(n, dtype=np.int64) for name in MODIFIER_FIELDS}
+        self._courts: list[CourtState | None] = [None] * n
+
+    def run(self) -> SimulationSummary:
+        everyone = np.arange(self.n)
+        self._set_node(everyone, self.graph.start_node)
+        self._maybe_start_court(everyone)
+        self._resolve_checks(everyone)
+        self._evaluate_outcome(everyone)
+
+        for step in range(2 * balance.MAX_TURNS_PER_RUN):
+            live = np.flatnonzero(self.outcome == OUTCOME_CODES[Outcome.ONGOING])
+            if live.size == 0:
+                break
+            choose_probability = 0.95 if step < balance.MAX_TURNS_PER_RUN else 0.0
+            in_court = self.in_court[live]
+            self._court_step(live[in_court])
+            self._policy_step(live[~in_court], choose_probability)
+
+        wins = int(np.count_nonzero(self.outcome == OUTCOME_CODES[Outcome.WIN]))
+        defeats = int(np.count_nonzero(self.outcome == OUTCOME_CODES[Outcome.DEFEAT_SHU]))
+        total_turns = int(self.stats["turn"].sum())
+        return SimulationSummary(
+            runs=self.n,
+            wins=wins,
+            defeats=defeats,
+            stuck_runs=self.n - wins - defeats,
+            avg_turns=total_turns / self.n if self.n else 0.0,
+            total_turns=total_turns,
+        )
+
+    def _flag(self, key: str) -> np.ndarray:
+        values = self.flags.get(key)
+        if values is None:
+            values = np.zeros(self.n, dtype=bool)
+            self.flags[key] = values
+        return values
+
+    def _condition(self, condition: str | None, idx: np.ndarray) -> np.ndarray:
+        allowed = np.ones(idx.size, dtype=bool)
+        if not condition:
+            return allowed
+        for field, compare, value in condition_clauses(condition):
+            allowed &= compare(self._column(field)[idx], value)
+        return allowed
+
+    def _column(self, field: str) -> np.ndarray:
+        if field.startswith("flags."):
+            return self._flag(field.removeprefix("flags."))
+        if field == "longyou_collapsed":
+            return self.longyou_collapsed
+        return self.stats[field]
+
+    def _scaled_delta(self, key: str, value, idx: np.ndarray) -> np.ndarray:  # noqa: ANN001
+        value = np.broadcast_to(np.asarray(value, dtype=np.int64), idx.shape)
+        if key not in SCALED_FIELDS:
+            return value
+        scaled = np.maximum(0, np.rint(value * balance.POST_ZHUGE_EFFICIENCY_MULTIPLIER).astype(np.int64))
+        return np.where(self._flag("post_zhuge_era")[idx] & (value > 0), scaled, value)
+
+    def _clamp(self, idx: np.ndarray) -> None:
+        s = self.stats
+        max_food = np.where(
+            self._flag("post_zhuge_era")[idx],
+            balance.MAX_FOOD_POST_ZHUGE,
+            balance.MAX_FOOD_BASE,
+        )
+        s["food"][idx] = np.clip(s["food"][idx], 0, max_food)
+        s["morale"][idx] = np.clip(s["morale"][idx], 0, balance.MAX_MORALE)
+        s["politics"][idx] = np.clip(s["politics"][idx], 0, balance.MAX_POLITICS)
+        s["wei_pressure"][idx] = np.clip(s["wei_pressure"][idx], 0, balance.MAX_WEI_PRESSURE)
+        s["doom"][idx] = np.clip(s["doom"][idx], 0, balance.MAX_DOOM)
+        for key in ("health", "longyou_turns", "guanzhong_turns"):
+            s[key][idx] = np.maximum(0, s[key][idx])
+
+    def _apply_delta(self, idx: np.ndarray, delta: dict[str, object]) -> None:
+        for key, value in delta.items():
+            values = self.stats.get(key)
+            if values is None:
+                continue
+            values[idx] += self._scaled_delta(key, value, idx)
+        self._clamp(idx)
+
+    def _apply_effects(self, idx: np.ndarray, effects: dict | None) -> None:
+        if not effects or idx.size == 0:
+            return
+
+        for key, value in effects.get("delta", {}).items():
+            values = self.stats.get(key)
+            if values is None:
+                continue
+            values[idx] += self._scaled_delta(key, int(value), idx)
+
+        for key, value in effects.get("set_values", {}).items():
+            values = self.stats.get(key)
+            if values is not None:
+                values[idx] = value
+
+        for key, value in effects.get("set_flags", {}).items():
+            self._flag(key)[idx] = bool(value)
+
+        if "set_phase" in effects:
+            self.phase[idx] = PHASE_CODES[Phase(effects["set_phase"])]
+        if "set_chapter" in effects:
+            self.stats["chapter"][idx] = int(effects["set_chapter"])
+        if "set_outcome" in effects:
+            self.outcome[idx] = OUTCOME_CODES[Outcome(effects["set_outcome"])]
+        if "set_longyou_collapsed" in effects:
+            self.longyou_collapsed[idx] = bool(effects["set_longyou_collapsed"])
+        if effects.get("set_guanzhong_reset"):
+            self.stats["guanzhong_turns"][idx] = 0
+
+        self._clamp(idx)
+
+    def _set_node(self, idx: np.ndarray, node_id: str) -> None:
+        if idx.size == 0:
+            return
+        node = self.graph.get(node_id)
+        self.node[idx] = self._node_index[node_id]
+        if node.chapter is not None:
+            self.stats["chapter"][idx] = node.chapter
+        if node.phase is not None:
+            self.phase[idx] = PHASE_CODES[Phase(node.phase)]
+        if node.node_type == NodeType.TERMINAL:
+            if node.id == "WIN":
+                self.outcome[idx] = OUTCOME_CODES[Outcome.WIN]
+            elif node.id == "DEFEAT_SHU":
+                self.outcome[idx] = OUTCOME_CODES[Outcome.DEFEAT_SHU]
+
+    def _transition(self, idx: np.ndarray, node_id: str, *, autostart_court: bool = True) -> None:
+        if idx.size == 0:
+            return
+        self._set_node(idx, node_id)
+        if autostart_court:
+            self._maybe_start_court(idx)
+        self._resolve_checks(idx)
+
+    def _maybe_start_court(self, idx: np.ndarray) -> None:
+        hub = self._node_index.get("court_hub")
+        starting = idx[
+            (self.phase[idx] == PHASE_CODES[Phase.COURT]) & ~self.in_court[idx] & (self.node[idx] == hub)
+        ]
+        self.in_court[starting] = True
+        self.court_entry_phase[starting] = PHASE_CODES[Phase.COURT]
+
+    def _probability(self, check_key: str, idx: np.ndarray) -> np.ndarray:
+        s = self.stats
+        base = base_probability_for_check(
+            check_key,
+            food=s["food"][idx],
+            morale=s["morale"][idx],
+            politics=s["politics"][idx],
+            wei_pressure=s["wei_pressure"][idx],
+        )
+        base = np.broadcast_to(np.asarray(base, dtype=np.float64), idx.shape)
+        base = np.where(self._flag("post_zhuge_era")[idx], base * balance.POST_ZHUGE_SUCCESS_MULTIPLIER, base)
+        base = base + self.check_modifier[idx]
+        return np.clip(base, 0.05, 0.95)
+
+    def _apply_check_outcome_modifier(self, idx: np.ndarray, *, success: bool) -> None:
+        idx = idx[self.has_modifier[idx]]
+        if idx.size == 0:
+            return
+        m = self.modifier
+        if success:
+            delta = {
+                "food": m["success_reward_food"][idx],
+                "morale": m["success_reward_morale"][idx],
+                "doom": np.zeros(idx.size, dtype=np.int64),
+            }
+        else:
+            delta = {
+                "food": -m["failure_penalty_food"][idx],
+                "morale": -m["failure_penalty_morale"][idx],
+                "doom": m["failure_penalty_doom"][idx],
+            }
+        touched = (delta["food"] != 0) | (delta["morale"] != 0) | (delta["doom"] != 0)
+        self._apply_delta(idx[touched], {key: values[touched] for key, values in delta.items()})
+
+    def _resolve_checks(self, idx: np.ndarray) -> None:
+        active = idx
+        for _ in range(32):
+            active = active[
+                (self._node_type[self.node[active]] == NODE_TYPE_CODES[NodeType.CHECK])
+                & (self.outcome[active] == OUTCOME_CODES[Outcome.ONGOING])
+            ]
+            if active.size == 0:
+                break
+
+            nodes_now = self.node[active]
+            for code in np.unique(nodes_now):
+                group = active[nodes_now == code]
+                node = self.graph.get(self._node_ids[code])
+                if node.check:
+                    success = self.rng.random(group.size) <= self._probability(node.check, group)
+                else:
+                    success = np.ones(group.size, dtype=bool)
+                passed = group[success]
+                failed = group[~success]
+
+                self._apply_effects(passed, node.success_effects)
+                self.momentum[passed] = np.minimum(4, self.momentum[passed] + 1)
+                self._apply_effects(failed, node.fail_effects)
+                self.momentum[failed] = np.maximum(-4, self.momentum[failed] - 1)
+
+                self._apply_check_outcome_modifier(passed, success=True)
+                self._apply_check_outcome_modifier(failed, success=False)
+                self._trigger_post_zhuge(group)
+
+                if not node.success_next or not node.fail_next:
+                    raise ValueError(f"Check node {node.id} missing next target")
+                self._set_node(passed, node.success_next)
+                self._set_node(failed, node.fail_next)
+                self._maybe_start_court(group)
+                self._evaluate_outcome(group)
+
+    def _trigger_post_zhuge(self, idx: np.ndarray) -> None:
+        post_zhuge = self._flag("post_zhuge_era")
+        idx = idx[(self.stats["health"][idx] <= 0) & ~post_zhuge[idx]]
+        if idx.size == 0:
+            return
+        s = self.stats
+        post_zhuge[idx] = True
+        s["health"][idx] = 0
+        s["food"][idx] = np.minimum(s["food"][idx], balance.MAX_FOOD_POST_ZHUGE)
+        s["wei_pressure"][idx] = np.minimum(balance.MAX_WEI_PRESSURE, s["wei_pressure"][idx] + 1)
+
+    def _evaluate_outcome(self, idx: np.ndarray) -> None:
+        idx = idx[self.outcome[idx] == OUTCOME_CODES[Outcome.ONGOING]]
+        if idx.size == 0:
+            return
+        self._trigger_post_zhuge(idx)
+
+        core_lost = self._flag("core_lost")[idx]
+        self._set_node(idx[core_lost], "DEFEAT_SHU")
+        idx = idx[~core_lost]
+
+        won = (self.stats["guanzhong_turns"][idx] >= 3) & ~self.longyou_collapsed[idx]
+        self._set_node(idx[won], "WIN")
+        idx = idx[~won]
+
+        doomed = idx[
+            (self.stats["doom"][idx] >= balance.DOOM_THRESHOLD) & ~np.isin(self.node[idx], self._doom_chain_codes)
+        ]
+        self._flag("doom_chain_active")[doomed] = True
+        self._set_node(doomed, "doom_total_offensive")
+
+    def _should_trigger_court(self, idx: np.ndarray) -> np.ndarray:
+        s = self.stats
+        phase = self.phase[idx]
+        turn = s["turn"][idx]
+        turns_since = turn - self.last_trigger_turn[idx]
+        critical = (
+            (s["food"][idx] <= 62)
+            | (s["morale"][idx] <= 45)
+            | (s["doom"][idx] >= 8)
+            | (self.momentum[idx] <= -2)
+            | self.longyou_collapsed[idx]
+        )
+        return (
+            ~self.in_court[idx]
+            & (self.outcome[idx] == OUTCOME_CODES[Outcome.ONGOING])
+            & np.isin(phase, [PHASE_CODES[Phase.CAMPAIGN], PHASE_CODES[Phase.DEFENSE], PHASE_CODES[Phase.FINAL]])
+            & (turn > 1)
+            & (turns_since >= COURT_REENTRY_COOLDOWN_TURNS)
+            & ((turns_since >= COURT_TRIGGER_INTERVAL) | critical)
+        )
+
+    def _advance_battle_turn(self, idx: np.ndarray) -> None:
+        if idx.size == 0:
+            return
+        s = self.stats
+        post_zhuge = self._flag("post_zhuge_era")
+        s["turn"][idx] += 1
+
+        doom_gain = (
+            1
+            + (s["food"][idx] < 60)
+            + (s["wei_pressure"][idx] >= 6)
+            + self.longyou_collapsed[idx]
+            + post_zhuge[idx] * balance.POST_ZHUGE_DOOM_BONUS
+        ).astype(np.int64)
+        post = idx[post_zhuge[idx]]
+        s["politics"][post] = np.maximum(0, s["politics"][post] - balance.POST_ZHUGE_POLITICS_BONUS)
+
+        modified = self.has_modifier[idx]
+        edict = idx[modified]
+        if edict.size:
+            m = self.modifier
+            food_delta = m["food_per_turn_modifier"][edict]
+            morale_delta = m["morale_per_turn_modifier"][edict]
+            touched = (food_delta != 0) | (morale_delta != 0)
+            self._apply_delta(edict[touched], {"food": food_delta[touched], "morale": morale_delta[touched]})
+            doom_gain[modified] += m["doom_per_turn_modifier"][edict]
+            m["turns_remaining"][edict] -= 1
+            self._clear_modifier(edict[m["turns_remaining"][edict] <= 0])
+
+        s["doom"][idx] += np.maximum(0, doom_gain)
+
+        wuzhang = idx[(s["chapter"][idx] == 4) & ~post_zhuge[idx]]
+        s["health"][wuzhang] -= 1
+        self._trigger_post_zhuge(wuzhang)
+
+        doom_chain = self._flag("doom_chain_active")
+        doomed = idx[(s["doom"][idx] >= balance.DOOM_THRESHOLD) & ~doom_chain[idx]]
+        doom_chain[doomed] = True
+        self._transition(doomed, "doom_total_offensive")
+
+    def _clear_modifier(self, idx: np.ndarray) -> None:
+        self.has_modifier[idx] = False
+        self.check_modifier[idx] = 0.0
+        for values in self.modifier.values():
+            values[idx] = 0
+
+    def _next_turn(self, idx: np.ndarray) -> None:
+        trigger = self._should_trigger_court(idx)
+        court = idx[trigger]
+        self.in_court[court] = True
+        self.court_entry_phase[court] = self.phase[court]
+        self.phase[court] = PHASE_CODES[Phase.COURT]
+        self._advance_battle_turn(idx[~trigger])
+
+    def _policy_step(self, idx: np.ndarray, choose_probability: float) -> None:
+        if idx.size == 0:
+            return
+        choice_code = NODE_TYPE_CODES[NodeType.CHOICE]
+        waiting: list[np.ndarray] = []
+        nodes_now = self.node[idx]
+        at_choice = self._node_type[nodes_now] == choice_code
+        waiting.append(idx[~at_choice])
+
+        for code in np.unique(nodes_now[at_choice]):
+            group = idx[nodes_now == code]
+            options = self.graph.get(self._node_ids[code]).options
+            enabled = np.column_stack([self._condition(option.condition, group) for option in options])
+            choose = enabled.any(axis=1) & (self.rng.random(group.size) < choose_probability)
+            waiting.append(group[~choose])
+
+            chooser = group[choose]
+            if chooser.size == 0:
+                continue
+            weights = enabled[choose] * np.array([option_weight(option.id) for option in options])
+            cumulative = weights.cumsum(axis=1)
+            ticket = self.rng.random(chooser.size) * cumulative[:, -1]
+            hit = (ticket[:, None] <= cumulative) & enabled[choose]
+            last_enabled = enabled[choose].shape[1] - 1 - np.argmax(enabled[choose][:, ::-1], axis=1)
+            picked = np.where(hit.any(axis=1), np.argmax(hit, axis=1), last_enabled)
+            for position, option in enumerate(options):
+                chosen = chooser[picked == position]
+                if chosen.size == 0:
+                    continue
+                self._apply_effects(chosen, option.effects)
+                self._transition(chosen, option.next)
+
+        self._next_turn(np.concatenate(waiting))
+        self._evaluate_outcome(idx)
+
+    def _court_step(self, idx: np.ndarray) -> None:
+        if idx.size == 0:
+            return
+        for game in idx:
+            self._play_court_session(int(game))
+        self.in_court[idx] = False
+        self._advance_battle_turn(idx)
+        self._resolve_legacy_court_route(idx)
+        self._evaluate_outcome(idx)
+
+    def _play_court_session(self, game: int) -> None:
+        s = self.stats
+        court = self._courts[game] or CourtState()
+        court.momentum = int(self.momentum[game])
+        court.last_trigger_turn = int(self.last_trigger_turn[game])
+        state = GameState.model_construct(
+            game_id=f"batch-{game}",
+            chapter=int(s["chapter"][game]),
+            turn=int(s["turn"][game]),
+            phase=PHASES[self.court_entry_phase[game]],
+            outcome=Outcome.ONGOING,
+            food=int(s["food"][game]),
+            morale=int(s["morale"][game]),
+            politics=int(s["politics"][game]),
+            wei_pressure=int(s["wei_pressure"][game]),
+            health=int(s["health"][game]),
+            doom=int(s["doom"][game]),
+            longyou_turns=int(s["longyou_turns"][game]),
+            guanzhong_turns=int(s["guanzhong_turns"][game]),
+            longyou_collapsed=bool(self.longyou_collapsed[game]),
+            flags={key: bool(values[game]) for key, values in self.flags.items()},
+            log=[],
+            current_node_id=self._node_ids[self.node[game]],
+            current_event=EventView(text="", options=[]),
+            current_location="chengdu",
+            controlled_locations=[],
+            active_route_id=None,
+            route_progress=0.0,
+            seed=0,
+            roll_count=0,
+            court=court,
+        )
+
+        rng = random.Random(int(self.rng.integers(2**62)))
+        begin_court_session(state, rng)
+        for _ in range(MAX_COURT_ROUNDS):
+            if not court.is_active:
+                break
+            strategy = pick_court_strategy(state, rng)
+            resolve_court_strategy(state, CourtStrategy(strategy), rng, statement=statement_for_strategy(strategy))
+        if court.is_active:
+            settle_court_session(state, force_timeout=True)
+
+        for key in INT_FIELDS:
+            s[key][game] = getattr(state, key)
+        try:
+            self.phase[game] = PHASE_CODES[Phase(court.return_phase)]
+        except ValueError:
+            self.phase[game] = PHASE_CODES[Phase.CAMPAIGN]
+        self.last_trigger_turn[game] = court.last_trigger_turn
+
+        modifier = court.active_modifier
+        if modifier is None:
+            self._clear_modifier(np.array([game]))
+        else:
+            self.has_modifier[game] = True
+            self.check_modifier[game] = modifier.check_modifier
+            for name, values in self.modifier.items():
+                values[game] = getattr(modifier, name)
+        court.pending_messages = []
+        self._courts[game] = court
+
+    def _resolve_legacy_court_route(self, idx: np.ndarray) -> None:
+        if "court_hub" in self._node_index:
+            hub = idx[self.node[idx] == self._node_index["court_hub"]]
+            self._transition(hub, "court_router", autostart_court=False)
+
+        router_code = self._node_index.get("court_router")
+        if router_code is None:
+            return
+        router = self.graph.get("court_router")
+        if router.node_type != NodeType.CHOICE:
+            return
+
+        remaining = idx[self.node[idx] == router_code]
+        for option in router.options:
+            if remaining.size == 0:
+                break
+            allowed = self._condition(option.condition, remaining)
+            chosen = remaining[allowed]
+            remaining = remaining[~allowed]
+            self._apply_effects(chosen, option.effects)
+            self._transition(chosen, option.next)
+
+
+@dataclass
+class BatchCrossCheck:
+    batch: SimulationSummary
+    scalar: SimulationSummary
+    win_z: float
+    defeat_z: float
+    z_limit: float
+
+    @property
+    def passed(self) -> bool:
+        return abs(self.win_z) <= self.z_limit and abs(self.defeat_z) <= self.z_limit
+
+
+def simulate_batch(n: int = 2000, seed: int = 42, graph: EventGraph | None = None) -> SimulationSummary:
+    return BatchSimulator(n, seed=seed, graph=graph).run()
+
+
+def cross_check_batch(
+    n: int = 2000,
+    seed: int = 42,
+    *,
+    scalar_runs: int | None = None,
+    z_limit: float = 4.0,
+    workers: int | None = None,
+) -> BatchCrossCheck:
+    """Compare batch and scalar win/defeat rates with a two-proportion z-test."""
+    batch = simulate_batch(n=n, seed=seed)
+    scalar = simulate(n=scalar_runs or n, seed=seed, workers=workers)
+    return BatchCrossCheck(
+        batch=batch,
+        scalar=scalar,
+        win_z=_two_proportion_z(batch.wins, batch.runs, scalar.wins, scalar.runs),
+        defeat_z=_two_proportion_z(batch.defeats, batch.runs, scalar.defeats, scalar.runs),
+        z_limit=z_limit,
+    )
+
+
+def _two_proportion_z(hits_a: int, runs_a: int, hits_b: int, runs_b: int) -> float:
+    if not runs_a or not runs_b:
+        return 0.0
+    pooled = (hits_a + hits_b) / (runs_a + runs_b)
+    spread = math.sqrt(pooled * (1.0 - pooled) * (1.0 / runs_a + 1.0 / runs_b))
+    if spread == 0.0:
+        return 0.0
+    return (hits_a / runs_a - hits_b / runs_b) / spread
@@ -10,32 +10,45 @@ def _clamp(value: float, low: float = 0.05, high: float = 0.95) -> float:
     return max(low, min(high, value))
 
 
-def probability_for_check(check_key: str, state: GameState) -> float:
+def base_probability_for_check(check_key: str, *, food, morale, politics, wei_pressure):  # noqa: ANN001, ANN201
+    """Stat-driven part of a check's odds; works on ints and on NumPy arrays alike."""
     base = balance.CHECK_BASE_PROB.get(check_key, 0.5)
 
     if check_key.startswith("jieting"):
-        base += (state.morale - 60) * 0.002
+        base += (morale - 60) * 0.002
     elif check_key == "longyou_rebellion":
-        base += (state.politics - 50) * 0.004
+        base += (politics - 50) * 0.004
     elif check_key == "supply_harass":
-        base += (state.food - 90) * 0.002
-        base += (state.morale - 60) * 0.001
+        base += (food - 90) * 0.002
+        base += (morale - 60) * 0.001
     elif check_key == "court_infighting":
-        base += (state.politics - 50) * 0.005
+        base += (politics - 50) * 0.005
     elif check_key in {"wei_sortie", "wuzhang_sortie"}:
-        base += state.wei_pressure * 0.05
+        base += wei_pressure * 0.05
     elif check_key.startswith("changan_assault"):
-        base += (state.food - 80) * 0.002
-        base += (state.morale - 60) * 0.003
-        base += (state.wei_pressure - 3) * 0.01
+        base += (food - 80) * 0.002
+        base += (morale - 60) * 0.003
+        base += (wei_pressure - 3) * 0.01
     elif check_key == "guanzhong_hold":
-        base += (state.food - 70) * 0.002
-        base += (state.morale - 60) * 0.002
-        base -= state.wei_pressure * 0.015
+        base += (food - 70) * 0.002
+        base += (morale - 60) * 0.002
+        base -= wei_pressure * 0.015
     elif check_key == "doom_defense":
-        base += (state.food - 60) * 0.002
-        base += (state.morale - 55) * 0.003
-        base += (state.politics - 45) * 0.002
+        base += (food - 60) * 0.002
+        base += (morale - 55) * 0.003
+        base += (politics - 45) * 0.002
+
+    return base
+
+
+def probability_for_check(check_key: str, state: GameState) -> float:
+    base = base_probability_for_check(
+        check_key,
+        food=state.food,
+        morale=state.morale,
+        politics=state.politics,
+        wei_pressure=state.wei_pressure,
+    )
 
     if state.flags.get("post_zhuge_era", False):
         base *= balance.POST_ZHUGE_SUCCESS_MULTIPLIER
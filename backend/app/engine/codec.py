@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import random
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from itertools import accumulate, islice
+from operator import attrgetter
+from typing import Any
+
+from app.engine.repository import GameSession
+from app.engine.rng import CounterRandom
+from app.models.court import (
+    COURT_NPC_CONFIGS,
+    CourtBattleModifier,
+    CourtHistoryEntry,
+    CourtMessage,
+    CourtNpcState,
+    CourtResolution,
+    CourtResult,
+    CourtState,
+)
+from app.models.state import EventView, GameState, OptionView, Outcome, Phase
+
+CODEC_MAGIC = b"TKS"
+CODEC_VERSION = 1
+
+PHASES = list(Phase)
+OUTCOMES = list(Outcome)
+COURT_RESULTS = list(CourtResult)
+NPC_CONFIGS = {config.id: config for config in COURT_NPC_CONFIGS}
+
+# Field order is part of the format: changing any of these needs a new CODEC_VERSION.
+STAT_FIELDS = (
+    "chapter",
+    "turn",
+    "food",
+    "morale",
+    "politics",
+    "wei_pressure",
+    "health",
+    "doom",
+    "longyou_turns",
+    "guanzhong_turns",
+    "roll_count",
+)
+COURT_INT_FIELDS = (
+    "session_id",
+    "temperature",
+    "support",
+    "time_pressure",
+    "max_time_pressure",
+    "last_trigger_turn",
+    "message_seq",
+    "momentum",
+)
+NPC_INT_FIELDS = ("stance", "influence", "resentment", "ignored_rounds")
+MODIFIER_INT_FIELDS = (
+    "turns_remaining",
+    "doom_per_turn_modifier",
+    "food_per_turn_modifier",
+    "morale_per_turn_modifier",
+    "success_reward_food",
+    "success_reward_morale",
+    "failure_penalty_food",
+    "failure_penalty_morale",
+    "failure_penalty_doom",
+    "answer_tolerance_modifier",
+)
+# Restored from COURT_NPC_CONFIGS for an NPC stored with only its mutable fields.
+NPC_STATIC_FIELDS = (
+    "display_name",
+    "persona_tag",
+    "camp",
+    "resistance_by_strategy",
+    "resentment_gain_rules",
+    "dialogue_style_tags",
+    "event_hooks",
+)
+
+_stats = attrgetter(*STAT_FIELDS)
+_court_ints = attrgetter(*COURT_INT_FIELDS)
+_npc_ints = attrgetter(*NPC_INT_FIELDS)
+_npc_static = attrgetter(*NPC_STATIC_FIELDS)
+_modifier_ints = attrgetter(*MODIFIER_INT_FIELDS)
+_message_fields = attrgetter("id", "speaker_id", "speaker_name", "camp", "text")
+NPC_PROFILES = {config.id: _npc_static(config) for config in COURT_NPC_CONFIGS}
+
+_HEADER = struct.Struct("<3sBIIII")
+_MT_WORDS = 625
+_BITS_PER_WORD = 31
+_SWAP = sys.byteorder != "little"
+_set = object.__setattr__
+
+_RNG_MT = 0
+_RNG_COUNTER = 1
+_NPC_CATALOG = 0
+_NPC_INLINE = 1
+
+
+class _Writer:
+    """Collects the int32, float64 and string sections; strings are written as their table index."""
+
+    def __init__(self) -> None:
+        self.ints: list[int] = []
+        self.floats: list[float] = []
+        self.words: list[int] = []
+        self.strings: dict[str, int] = {}
+
+    def ref(self, value: str) -> None:
+        strings = self.strings
+        self.ints.append(strings.setdefault(value, len(strings)))
+
+    def optional_ref(self, value: str | None) -> None:
+        if value is None:
+            self.ints.append(-1)
+        else:
+            self.ref(value)
+
+    def refs(self, values: list[str]) -> None:
+        strings = self.strings
+        self.ints.append(len(values))
+        self.ints.extend([strings.setdefault(value, len(strings)) for value in values])
+
+    def bits(self, values: list[bool]) -> None:
+        for start in range(0, len(values), _BITS_PER_WORD):
+            word = 0
+            for index, value in enumerate(values[start : start + _BITS_PER_WORD]):
+                if value:
+                    word |= 1 << index
+            self.ints.append(word)
+
+    def finish(self) -> bytes:
+        texts = list(self.strings)
+        try:
+            ints = array("i", [len(text) for text in texts])
+            ints.extend(self.ints)
+        except OverflowError as exc:
+            raise ValueError("Session holds an integer outside the int32 range") from exc
+        floats = array("d", self.floats)
+        words = array("I", self.words)
+        if _SWAP:
+            for section in (ints, floats, words):
+                section.byteswap()
+        header = _HEADER.pack(CODEC_MAGIC, CODEC_VERSION, len(texts), len(self.ints), len(floats), len(words))
+        return b"".join(
+            (header, ints.tobytes(), floats.tobytes(), words.tobytes(), "".join(texts).encode("utf-8"))
+        )
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        magic, version, string_count, int_count, float_count, word_count = _HEADER.unpack_from(data, 0)
+        if magic != CODEC_MAGIC:
+            raise ValueError("Not a session blob")
+        if version != CODEC_VERSION:
+            raise ValueError(f"Unsupported session codec version: {version}")
+        offset = _HEADER.size
+        ints, offset = _section(data, offset, "i", string_count + int_count)
+        floats, offset = _section(data, offset, "d", float_count)
+        self.words, offset = _section(data, offset, "I", word_count)
+        text = data[offset:].decode("utf-8")
+
+        bounds = list(accumulate(ints[:string_count], initial=0))
+        if bounds[-1] != len(text):
+            raise ValueError("Session blob string table is corrupt")
+        self.strings = [text[start:end] for start, end in zip(bounds, bounds[1:])]
+        self.ints: Iterator[int] = iter(ints[string_count:])
+        self.floats: Iterator[float] = iter(floats)
+
+    def int(self) -> int:
+        return next(self.ints)
+
+    def ref(self) -> str:
+        return self.strings[next(self.ints)]
+
+    def optional_ref(self) -> str | None:
+        index = next(self.ints)
+        return self.strings[index] if index >= 0 else None
+
+    def refs(self) -> list[str]:
+        strings = self.strings
+        count = next(self.ints)
+        return [strings[index] for index in islice(self.ints, count)]
+
+    def bits(self, count: int) -> list[bool]:
+        values: list[bool] = []
+        for start in range(0, count, _BITS_PER_WORD):
+            word = next(self.ints)
+            values.extend(bool(word >> index & 1) for index in range(min(_BITS_PER_WORD, count - start)))
+        return values
+
+    def block(self, count: int) -> list[int]:
+        return list(islice(self.ints, count))
+
+    def done(self) -> bool:
+        return next(self.ints, None) is None and next(self.floats, None) is None
+
+
+def _section(data: bytes, offset: int, typecode: str, count: int) -> tuple[array, int]:
+    section = array(typecode)
+    end = offset + count * section.itemsize
+    if end > len(data):
+        raise ValueError("Session blob is truncated")
+    section.frombytes(data[offset:end])
+    if _SWAP:
+        section.byteswap()
+    return section, end
+
+
+def _model(cls: type[Any], values: Iterable[Any]) -> Any:
+    """``model_construct`` without its per-call bookkeeping: ``values`` are every field, typed, in declaration order."""
+    names, fields_set, private = _layout(cls)
+    model = cls.__new__(cls)
+    _set(model, "__dict__", dict(zip(names, values)))
+    _set(model, "__pydantic_fields_set__", set(fields_set))
+    _set(model, "__pydantic_extra__", None)
+    _set(model, "__pydantic_private__", dict(private) if private is not None else None)
+    return model
+
+
+def _construct(cls: type[Any], **fields: Any) -> Any:
+    return _model(cls, [fields[name] for name in _layout(cls)[0]])
+
+
+_LAYOUTS: dict[type[Any], tuple[tuple[str, ...], frozenset[str], dict[str, Any] | None]] = {}
+
+
+def _layout(cls: type[Any]) -> tuple[tuple[str, ...], frozenset[str], dict[str, Any] | None]:
+    layout = _LAYOUTS.get(cls)
+    if layout is None:
+        names = tuple(cls.model_fields)
+        private = cls.__private_attributes__
+        layout = _LAYOUTS[cls] = (
+            names,
+            frozenset(names),
+            {name: attribute.get_default() for name, attribute in private.items()} if private else None,
+        )
+    return layout
+
+
+def encode_session(session: GameSession) -> bytes:
+    """Binary form of a session's state and RNG, replacing ``serialize_state`` plus ``serialize_rng``.
+
+    Layout: a header (``b"TKS"``, version byte, four section counts), then an
+    int32 section, a float64 section, the Mersenne Twister words as uint32,
+    and the UTF-8 text of the string table, all little-endian. Stats, court
+    counters and NPC counters are fixed runs of int32 in the order of the
+    ``*_FIELDS`` tuples; flags and booleans are packed 31 to a word. Every
+    string (node, location, flag, NPC and issue ids, log and dialogue text)
+    is stored once and referenced by index, so a blob never depends on the
+    event graph it was written against. NPCs whose static profile matches
+    ``COURT_NPC_CONFIGS`` keep only their mutable counters; the seed and the
+    counter RNG's position are kept as decimal strings since they are not
+    bounded to 32 bits.
+    """
+    out = _Writer()
+    _write_state(out, session.state)
+    _write_rng(out, session.rng)
+    return out.finish()
+
+
+def decode_session(data: bytes) -> GameSession:
+    """Inverse of ``encode_session``; raises ``ValueError`` for a blob it cannot read."""
+    data = bytes(data)
+    if len(data) < _HEADER.size:
+        raise ValueError("Session blob is truncated")
+    try:
+        reader = _Reader(data)
+        state = _read_state(reader)
+        rng = _read_rng(reader)
+        complete = reader.done()
+    except (IndexError, KeyError, StopIteration, UnicodeDecodeError) as exc:
+        raise ValueError("Session blob is corrupt") from exc
+    if not complete:
+        raise ValueError("Session blob has trailing data")
+    return GameSession(state=state, rng=rng)
+
+
+def _write_state(out: _Writer, state: GameState) -> None:
+    ints = out.ints
+    ints.extend(_stats(state))
+    ints.append(PHASES.index(state.phase))
+    ints.append(OUTCOMES.index(state.outcome))
+    ints.append(state.longyou_collapsed)
+    out.floats.append(state.route_progress)
+    out.ref(state.game_id)
+    out.ref(str(state.seed))
+    out.ref(state.current_node_id)
+    out.ref(state.current_location)
+    out.optional_ref(state.active_route_id)
+    out.refs(state.controlled_locations)
+    out.refs(list(state.flags))
+    out.bits(list(state.flags.values()))
+    out.refs(state.log)
+
+    event = state.current_event
+    out.ref(event.text)
+    ints.append(len(event.options))
+    for option in event.options:
+        out.ref(option.id)
+        out.ref(option.label)
+    out.bits([option.disabled for option in event.options])
+
+    _write_court(out, state.court)
+
+
+def _read_state(reader: _Reader) -> GameState:
+    fields: dict[str, Any] = dict(zip(STAT_FIELDS, reader.block(len(STAT_FIELDS))))
+    fields.update(
+        phase=PHASES[reader.int()],
+        outcome=OUTCOMES[reader.int()],
+        longyou_collapsed=bool(reader.int()),
+        route_progress=next(reader.floats),
+        game_id=reader.ref(),
+        seed=int(reader.ref()),
+        current_node_id=reader.ref(),
+        current_location=reader.ref(),
+        active_route_id=reader.optional_ref(),
+        controlled_locations=reader.refs(),
+    )
+    flag_names = reader.refs()
+    fields["flags"] = dict(zip(flag_names, reader.bits(len(flag_names))))
+    fields["log"] = reader.refs()
+
+    text = reader.ref()
+    options = [(reader.ref(), reader.ref()) for _ in range(reader.int())]
+    disabled = reader.bits(len(options))
+    fields["current_event"] = _construct(
+        EventView,
+        text=text,
+        options=[
+            _model(OptionView, (option_id, label, off))
+            for (option_id, label), off in zip(options, disabled)
+        ],
+    )
+    fields["court"] = _read_court(reader)
+    return _construct(GameState, **fields)
+
+
+def _write_court(out: _Writer, court: CourtState) -> None:
+    ints = out.ints
+    ints.extend(_court_ints(court))
+    ints.append(
+        court.is_active
+        | court.resentment_event_fired << 1
+        | (court.active_modifier is not None) << 2
+        | (court.last_resolution is not None) << 3
+    )
+    out.ref(court.return_phase)
+    out.refs(court.current_issues)
+    out.refs(court.current_issue_tags)
+    out.refs(court.current_rebound_events)
+
+    ints.append(len(court.npcs))
+    for key, npc in court.npcs.items():
+        out.ref(key)
+        if npc.id == key and _npc_static(npc) == NPC_PROFILES.get(key):
+            ints.append(_NPC_CATALOG)
+            ints.extend(_npc_ints(npc))
+        else:
+            ints.append(_NPC_INLINE)
+            out.ref(npc.model_dump_json())
+
+    ints.append(len(court.history))
+    for entry in court.history:
+        ints.extend(
+            (
+                entry.session_id,
+                entry.turn_resolved,
+                COURT_RESULTS.index(entry.result),
+                entry.support,
+                entry.temperature,
+            )
+        )
+        out.optional_ref(entry.modifier_id)
+
+    out.refs([text for message in court.pending_messages for text in _message_fields(message)])
+
+    if court.active_modifier is not None:
+        _write_modifier(out, court.active_modifier)
+    resolution = court.last_resolution
+    if resolution is not None:
+        ints.extend(
+            (
+                resolution.session_id,
+                resolution.turn_resolved,
+                COURT_RESULTS.index(resolution.result),
+                resolution.support,
+                resolution.temperature,
+            )
+        )
+        out.ref(resolution.summary)
+        out.refs(resolution.triggered_events)
+        ints.append(resolution.modifier is not None)
+        if resolution.modifier is not None:
+            _write_modifier(out, resolution.modifier)
+
+
+def _read_court(reader: _Reader) -> CourtState:
+    fields: dict[str, Any] = dict(zip(COURT_INT_FIELDS, reader.block(len(COURT_INT_FIELDS))))
+    bits = reader.int()
+    fields.update(
+        is_active=bool(bits & 1),
+        resentment_event_fired=bool(bits & 2),
+        return_phase=reader.ref(),
+        current_issues=reader.refs(),
+        current_issue_tags=reader.refs(),
+        current_rebound_events=reader.refs(),
+    )
+
+    npcs: dict[str, CourtNpcState] = {}
+    for _ in range(reader.int()):
+        key = reader.ref()
+        if reader.int() == _NPC_CATALOG:
+            config = NPC_CONFIGS[key]
+            stance, influence, resentment, ignored_rounds = reader.block(len(NPC_INT_FIELDS))
+            npcs[key] = _model(
+                CourtNpcState,
+                (
+                    key,
+                    config.display_name,
+                    config.persona_tag,
+                    config.camp,
+                    stance,
+                    influence,
+                    dict(config.resistance_by_strategy),
+                    dict(config.resentment_gain_rules),
+                    list(config.dialogue_style_tags),
+                    list(config.event_hooks),
+                    resentment,
+                    ignored_rounds,
+                ),
+            )
+        else:
+            npcs[key] = CourtNpcState.model_validate_json(reader.ref())
+    fields["npcs"] = npcs
+
+    history = []
+    for _ in range(reader.int()):
+        session_id, turn_resolved, result, support, temperature = reader.block(5)
+        history.append(
+            _model(
+                CourtHistoryEntry,
+                (session_id, turn_resolved, COURT_RESULTS[result], support, temperature, reader.optional_ref()),
+            )
+        )
+    fields["history"] = history
+    texts = reader.refs()
+    fields["pending_messages"] = [_model(CourtMessage, texts[start : start + 5]) for start in range(0, len(texts), 5)]
+    fields["active_modifier"] = _read_modifier(reader) if bits & 4 else None
+    resolution = None
+    if bits & 8:
+        resolution = _construct(
+            CourtResolution,
+            session_id=reader.int(),
+            turn_resolved=reader.int(),
+            result=COURT_RESULTS[reader.int()],
+            support=reader.int(),
+            temperature=reader.int(),
+            summary=reader.ref(),
+            triggered_events=reader.refs(),
+            modifier=_read_modifier(reader) if reader.int() else None,
+        )
+    fields["last_resolution"] = resolution
+    return _construct(CourtState, **fields)
+
+
+def _write_modifier(out: _Writer, modifier: CourtBattleModifier) -> None:
+    out.ref(modifier.id)
+    out.ref(modifier.title)
+    out.ref(modifier.description)
+    out.ref(modifier.risk_level)
+    out.ints.extend(_modifier_ints(modifier))
+    out.floats.append(modifier.check_modifier)
+
+
+def _read_modifier(reader: _Reader) -> CourtBattleModifier:
+    return _construct(
+        CourtBattleModifier,
+        id=reader.ref(),
+        title=reader.ref(),
+        description=reader.ref(),
+        risk_level=reader.ref(),
+        **dict(zip(MODIFIER_INT_FIELDS, reader.block(len(MODIFIER_INT_FIELDS)))),
+        check_modifier=next(reader.floats),
+    )
+
+
+def _write_rng(out: _Writer, rng: random.Random) -> None:
+    if isinstance(rng, CounterRandom):
+        out.ints.append(_RNG_COUNTER)
+        out.ref(str(rng.seed_value))
+        out.ref(str(rng.counter))
+        return
+    if type(rng) is not random.Random:
+        raise ValueError(f"Unsupported RNG type: {type(rng).__name__}")
+    version, words, gauss_next = rng.getstate()
+    out.ints.extend((_RNG_MT, version, gauss_next is not None))
+    out.words.extend(words)
+    if gauss_next is not None:
+        out.floats.append(gauss_next)
+
+
+def _read_rng(reader: _Reader) -> random.Random:
+    kind = reader.int()
+    if kind == _RNG_COUNTER:
+        return CounterRandom(int(reader.ref()), int(reader.ref()))
+    if kind != _RNG_MT:
+        raise ValueError(f"Unsupported RNG kind in session blob: {kind}")
+    version = reader.int()
+    gauss_next = next(reader.floats) if reader.int() else None
+    if len(reader.words) != _MT_WORDS:
+        raise ValueError("Session blob RNG state is corrupt")
+    # Skip seeding from os.urandom; setstate overwrites all of it.
+    rng = random.Random.__new__(random.Random)
+    rng.setstate((version, tuple(reader.words), gauss_next))
+    return rng
@@ -1,26 +1,74 @@
 ﻿from __future__ import annotations
 
+from collections.abc import Callable
+from operator import attrgetter, eq, ge
+from typing import Any
+
 from app.models.state import GameState
 
+Condition = Callable[[GameState], bool]
+Clause = tuple[str, Callable[[Any, Any], Any], Any]
+
+# Each condition is a conjunction of (field, comparison, value) clauses. A field
+# is a GameState attribute, or "flags.<name>" for a flag that reads False when
+# unset. The graph compiles these into per-state checks; the batch simulator
+# applies the same comparisons to whole arrays.
+CONDITION_CLAUSES: dict[str, tuple[Clause, ...]] = {
+    "longyou_ready": (("longyou_turns", ge, 5), ("longyou_collapsed", eq, False)),
+    "guanzhong_ready": (("guanzhong_turns", ge, 3), ("longyou_collapsed", eq, False)),
+    "chapter_is_1": (("chapter", eq, 1),),
+    "chapter_is_2": (("chapter", eq, 2),),
+    "chapter_is_3": (("chapter", eq, 3),),
+    "chapter_is_4": (("chapter", eq, 4),),
+    "chapter_ge_5": (("chapter", ge, 5),),
+    "can_enter_final": (
+        ("longyou_turns", ge, 5),
+        ("wei_pressure", ge, 3),
+        ("food", ge, 65),
+        ("longyou_collapsed", eq, False),
+    ),
+    "can_attack_changan": (
+        ("longyou_turns", ge, 5),
+        ("wei_pressure", ge, 3),
+        ("food", ge, 70),
+        ("longyou_collapsed", eq, False),
+    ),
+    "post_zhuge": (("flags.post_zhuge_era", eq, True),),
+    "not_post_zhuge": (("flags.post_zhuge_era", eq, False),),
+}
+
+
+def _reader(field: str) -> Callable[[GameState], Any]:
+    if field.startswith("flags."):
+        name = field.removeprefix("flags.")
+        return lambda state: bool(state.flags.get(name, False))
+    return attrgetter(field)
+
+
+def _conjunction(clauses: tuple[Clause, ...]) -> Condition:
+    checks = [(_reader(field), compare, value) for field, compare, value in clauses]
+    if len(checks) == 1:
+        read, compare, value = checks[0]
+        return lambda state: compare(read(state), value)
+    return lambda state: all(compare(read(state), value) for read, compare, value in checks)
+
+
+CONDITIONS: dict[str, Condition] = {name: _conjunction(clauses) for name, clauses in CONDITION_CLAUSES.items()}
+
+
+def _always(state: GameState) -> bool:
+    return True
+
+
+def condition_clauses(condition: str) -> tuple[Clause, ...]:
+    clauses = CONDITION_CLAUSES.get(condition)
+    if clauses is None:
+        raise ValueError(f"Unknown condition: {condition}")
+    return clauses
+
 
-def evaluate_condition(condition: str | None, state: GameState) -> bool:
+def compile_condition(condition: str | None) -> Condition:
     if not condition:
-        return True
-
-    mapping = {
-        "longyou_ready": lambda s: s.longyou_turns >= 5 and not s.longyou_collapsed,
-        "guanzhong_ready": lambda s: s.guanzhong_turns >= 3 and not s.longyou_collapsed,
-        "chapter_is_1": lambda s: s.chapter == 1,
-        "chapter_is_2": lambda s: s.chapter == 2,
-        "chapter_is_3": lambda s: s.chapter == 3,
-        "chapter_is_4": lambda s: s.chapter == 4,
-        "chapter_ge_5": lambda s: s.chapter >= 5,
-        "can_enter_final": lambda s: s.longyou_turns >= 5 and s.wei_pressure >= 3 and s.food >= 65 and not s.longyou_collapsed,
-        "can_attack_changan": lambda s: s.longyou_turns >= 5 and s.wei_pressure >= 3 and s.food >= 70 and not s.longyou_collapsed,
-        "post_zhuge": lambda s: bool(s.flags.get("post_zhuge_era", False)),
-        "not_post_zhuge": lambda s: not bool(s.flags.get("post_zhuge_era", False)),
-    }
-    checker = mapping.get(condition)
-    if checker is None:
-        return False
-    return checker(state)
+        return _always
+    condition_clauses(condition)
+    return CONDITIONS[condition]
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import os
 import random
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from app.assistant.court_dialogue import CourtDialogueService
 from app.engine.effects import add_log, apply_effects
 from app.models.court import (
     CourtBattleModifier,
@@ -16,6 +17,9 @@ from app.models.court import (
 )
 from app.models.state import GameState, Outcome, Phase
 
+if TYPE_CHECKING:
+    from app.assistant.court_dialogue import CourtDialogueService
+
 
 def _parse_bool(raw: str | None, default: bool) -> bool:
     if raw is None:
@@ -101,7 +105,15 @@ ISSUE_LABELS = {
     "conflict": "主战与保守派冲突升级",
 }
 
-_court_dialogue = CourtDialogueService()
+
+@lru_cache(maxsize=1)
+def _court_dialogue() -> CourtDialogueService:
+    """Built on the first court line that may use the model, not when the engine is imported."""
+    from app.assistant.court_dialogue import CourtDialogueService
+
+    return CourtDialogueService()
+
+
 COURT_MODEL_LINES_ENABLED = _parse_bool(os.getenv("DEEPSEEK_COURT_LIVE_LINES"), True)
 COURT_IMPORTANT_NPC_IDS = _parse_id_set(
     os.getenv("DEEPSEEK_COURT_IMPORTANT_NPCS"),
@@ -164,7 +176,7 @@ def _append_npc_message(
 
     text = fallback_text
     if allow_model and COURT_MODEL_LINES_ENABLED:
-        text = _court_dialogue.generate_line(
+        text = _court_dialogue().generate_line(
             state=state,
             npc=npc,
             fallback_text=fallback_text,
@@ -356,7 +368,7 @@ def resolve_court_strategy(
             for message in court.pending_messages[reaction_start:]
             if message.speaker_id not in {"system", "player"} and message.text.strip()
         ]
-        judged_shift = _court_dialogue.judge_support_shift(
+        judged_shift = _court_dialogue().judge_support_shift(
             state=state,
             strategy=strategy,
             statement=clean_statement,
@@ -1,8 +1,29 @@
 ﻿from __future__ import annotations
 
+from collections.abc import Callable
+from typing import Any
+
 from app.engine import balance
 from app.models.state import GameState, Outcome, Phase
 
+Effect = Callable[[GameState], None]
+
+EFFECT_KEYS = frozenset(
+    {
+        "delta",
+        "set_values",
+        "set_flags",
+        "set_phase",
+        "set_chapter",
+        "set_outcome",
+        "set_longyou_collapsed",
+        "set_guanzhong_reset",
+        "log",
+        "append_log",
+    }
+)
+DELTA_KEYS = frozenset(name for name, field in GameState.model_fields.items() if field.annotation in (int, bool))
+
 
 def _scaled_delta(state: GameState, key: str, value: int) -> int:
     if value <= 0:
@@ -81,3 +102,67 @@ def apply_effects(state: GameState, effects: dict | None) -> None:
             add_log(state, item)
 
     _clamp_state(state)
+
+
+def _noop(state: GameState) -> None:
+    return None
+
+
+def compile_effects(effects: dict[str, Any] | None) -> Effect:
+    """Validate an effects dict once and return a callable equivalent to ``apply_effects(state, effects)``.
+
+    Unknown effect keys, unknown or non-integer delta targets, unknown
+    ``set_values`` fields and invalid phase/outcome values raise ValueError.
+    """
+    if not effects:
+        return _noop
+
+    unknown = sorted(set(effects) - EFFECT_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown effect keys: {unknown}")
+
+    delta = tuple((key, int(value)) for key, value in effects.get("delta", {}).items())
+    for key, _ in delta:
+        if key not in DELTA_KEYS:
+            raise ValueError(f"Unknown delta target: {key}")
+    set_values = tuple(effects.get("set_values", {}).items())
+    for key, _ in set_values:
+        if key not in GameState.model_fields:
+            raise ValueError(f"Unknown state key in set_values: {key}")
+    set_flags = tuple((key, bool(value)) for key, value in effects.get("set_flags", {}).items())
+    phase = Phase(effects["set_phase"]) if "set_phase" in effects else None
+    chapter = int(effects["set_chapter"]) if "set_chapter" in effects else None
+    outcome = Outcome(effects["set_outcome"]) if "set_outcome" in effects else None
+    collapsed = bool(effects["set_longyou_collapsed"]) if "set_longyou_collapsed" in effects else None
+    reset_guanzhong = bool(effects.get("set_guanzhong_reset"))
+    log_text = effects.get("log")
+    if log_text is not None and not isinstance(log_text, str):
+        raise ValueError(f"log must be a string: {log_text!r}")
+    logs = [log_text] if log_text else []
+    for item in effects.get("append_log", []):
+        if not isinstance(item, str):
+            raise ValueError(f"append_log entries must be strings: {item!r}")
+        logs.append(item)
+
+    def run(state: GameState) -> None:
+        for key, value in delta:
+            setattr(state, key, getattr(state, key) + _scaled_delta(state, key, value))
+        for key, value in set_values:
+            setattr(state, key, value)
+        for key, value in set_flags:
+            state.flags[key] = value
+        if phase is not None:
+            state.phase = phase
+        if chapter is not None:
+            state.chapter = chapter
+        if outcome is not None:
+            state.outcome = outcome
+        if collapsed is not None:
+            state.longyou_collapsed = collapsed
+        if reset_guanzhong:
+            state.guanzhong_turns = 0
+        for text in logs:
+            add_log(state, text)
+        _clamp_state(state)
+
+    return run
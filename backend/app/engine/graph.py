@@ -1,19 +1,52 @@
 ﻿from __future__ import annotations
 
+import hashlib
 import json
+import os
+import pickle
+from functools import lru_cache
 from pathlib import Path
 
+import pydantic
+
+from app.engine.conditions import Condition, compile_condition
+from app.engine.effects import Effect, compile_effects
 from app.engine.map_catalog import KNOWN_PLACE_IDS, KNOWN_ROUTE_IDS, ROUTE_ENDPOINTS
-from app.models.event_graph import GraphModel, NodeModel, NodeType
+from app.models.event_graph import GraphModel, NodeModel, NodeType, OptionModel
+from app.models.state import GameState
 
 ALLOWED_TERMINALS = {"WIN", "DEFEAT_SHU"}
 BUFFER_PHASES = {"recover", "court", "defense"}
+DEFAULT_GRAPH_PATH = Path(__file__).resolve().parent.parent / "data" / "events.json"
+# Bump when GraphModel/NodeModel/OptionModel change shape so old snapshots are not unpickled.
+GRAPH_SCHEMA_VERSION = 1
 
 
 class EventGraph:
+    """Event nodes plus their conditions and effects compiled to callables.
+
+    Compilation happens once here, so an unknown condition name or state key
+    fails the load with a ValueError naming the node instead of silently
+    disabling an option or skipping an effect at play time.
+    """
+
     def __init__(self, model: GraphModel) -> None:
         self.start_node = model.start_node
         self.nodes: dict[str, NodeModel] = {n.id: n for n in model.nodes}
+        self.conditions: dict[tuple[str, str], Condition] = {}
+        self.option_effects: dict[tuple[str, str], Effect] = {}
+        self.check_effects: dict[tuple[str, bool], Effect] = {}
+        for node in model.nodes:
+            try:
+                for option in node.options:
+                    if (node.id, option.id) in self.conditions:
+                        raise ValueError(f"duplicate option id {option.id}")
+                    self.conditions[(node.id, option.id)] = compile_condition(option.condition)
+                    self.option_effects[(node.id, option.id)] = compile_effects(option.effects)
+                self.check_effects[(node.id, True)] = compile_effects(node.success_effects)
+                self.check_effects[(node.id, False)] = compile_effects(node.fail_effects)
+            except ValueError as exc:
+                raise ValueError(f"Node {node.id}: {exc}") from exc
 
     def get(self, node_id: str) -> NodeModel:
         node = self.nodes.get(node_id)
@@ -21,11 +54,102 @@ class EventGraph:
             raise KeyError(f"Unknown node: {node_id}")
         return node
 
-
-def load_graph(path: Path) -> EventGraph:
-    data = json.loads(path.read_text(encoding="utf-8-sig"))
-    model = GraphModel.model_validate(data)
-    return EventGraph(model)
+    def option_enabled(self, node: NodeModel, option: OptionModel, state: GameState) -> bool:
+        return self.conditions[(node.id, option.id)](state)
+
+    def enabled_options(self, node: NodeModel, state: GameState) -> list[OptionModel]:
+        return [option for option in node.options if self.conditions[(node.id, option.id)](state)]
+
+    def apply_option_effects(self, node: NodeModel, option: OptionModel, state: GameState) -> None:
+        self.option_effects[(node.id, option.id)](state)
+
+    def apply_check_effects(self, node: NodeModel, success: bool, state: GameState) -> None:
+        self.check_effects[(node.id, success)](state)
+
+
+def load_graph(path: Path, snapshot_dir: Path | None = None) -> EventGraph:
+    """Load an event graph, optionally through a validated snapshot kept in ``snapshot_dir``.
+
+    The snapshot is the pickled GraphModel, keyed by ``graph_snapshot_key`` of
+    the source bytes, and is only written after the graph passed
+    ``validate_graph``. A hit skips JSON parsing and model validation; a
+    missing, stale or unreadable snapshot falls back to the source and is
+    rewritten. Snapshots are trusted pickles, so the directory must not be
+    writable by anyone the server does not trust.
+    """
+    if snapshot_dir is None:
+        data = json.loads(path.read_text(encoding="utf-8-sig"))
+        return EventGraph(GraphModel.model_validate(data))
+
+    source = path.read_bytes()
+    key = graph_snapshot_key(source)
+    snapshot = snapshot_dir / f"{path.stem}.{key[:16]}.graph.pickle"
+    model = _read_snapshot(snapshot, key)
+    if model is not None:
+        return EventGraph(model)
+
+    model = GraphModel.model_validate(json.loads(source.decode("utf-8-sig")))
+    graph = EventGraph(model)
+    try:
+        validate_graph(graph)
+    except ValueError:
+        # Still usable as before; only validated graphs are worth persisting.
+        return graph
+    _write_snapshot(snapshot, key, model)
+    return graph
+
+
+def graph_snapshot_key(source: bytes) -> str:
+    digest = hashlib.sha256(source)
+    digest.update(f"\0schema={GRAPH_SCHEMA_VERSION}\0pydantic={pydantic.VERSION}".encode("ascii"))
+    return digest.hexdigest()
+
+
+def _read_snapshot(snapshot: Path, key: str) -> GraphModel | None:
+    try:
+        with snapshot.open("rb") as handle:
+            payload = pickle.load(handle)
+    except Exception:  # noqa: BLE001 - a missing, truncated or foreign snapshot is just a cache miss
+        return None
+    if not isinstance(payload, dict) or payload.get("key") != key or not isinstance(payload.get("model"), GraphModel):
+        return None
+    return payload["model"]
+
+
+def _write_snapshot(snapshot: Path, key: str, model: GraphModel) -> None:
+    tmp = snapshot.with_name(f"{snapshot.name}.{os.getpid()}.tmp")
+    try:
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(pickle.dumps({"key": key, "model": model}, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, snapshot)
+        prefix = snapshot.name.split(".", 1)[0]
+        for stale in snapshot.parent.glob(f"{prefix}.*.graph.pickle"):
+            if stale != snapshot:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        # Read-only deployments (e.g. serverless bundles) simply run without a snapshot.
+        tmp.unlink(missing_ok=True)
+
+
+def default_snapshot_dir() -> Path | None:
+    """Snapshots are opt-in with ``GRAPH_SNAPSHOT=1``; the saving is about half a millisecond per load.
+
+    They live in ``GRAPH_SNAPSHOT_DIR`` or the user cache directory, never in
+    the source tree.
+    """
+    if os.getenv("GRAPH_SNAPSHOT", "0").strip().lower() not in {"1", "true", "yes", "on"}:
+        return None
+    configured = os.getenv("GRAPH_SNAPSHOT_DIR")
+    if configured:
+        return Path(configured)
+    cache_home = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return cache_home / "threekingdoms" / "graph"
+
+
+@lru_cache(maxsize=1)
+def load_default_graph() -> EventGraph:
+    """Load the bundled events.json once; the graph is read-only and shared by every engine."""
+    return load_graph(DEFAULT_GRAPH_PATH, snapshot_dir=default_snapshot_dir())
 
 
 def node_edges(node: NodeModel) -> list[str]:
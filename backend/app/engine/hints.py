@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+from app.engine.repository import GameSession
+from app.engine.runtime import GameEngine
+from app.engine.simulator import play_session
+from app.models.event_graph import NodeType
+from app.models.hint import HintView, OptionHint
+from app.models.state import GameState, Outcome
+
+DEFAULT_BUDGET_MS = 150
+ROLLOUTS_PER_TASK = 4
+MAX_ROLLOUTS_PER_OPTION = 256
+CACHE_SIZE = 256
+
+_worker_engine: GameEngine | None = None
+
+
+def state_hash(state: GameState) -> str:
+    return f"{state.zobrist_hash():016x}"
+
+
+class HintService:
+    """Estimates each enabled option's win rate by rolling out forked copies of a game.
+
+    The live session is only read, through a locked snapshot: rollouts run on
+    deep copies with their own RNGs derived from the state hash and with live
+    model calls disabled, so hints are reproducible, cost no model requests and
+    never advance the game's RNG. Results are cached per state hash and only reused
+    for requests whose budget is no larger than the one that produced them.
+    """
+
+    def __init__(self, engine: GameEngine, workers: int = 0, cache_size: int = CACHE_SIZE) -> None:
+        self.engine = engine
+        self.workers = workers
+        self.cache_size = cache_size
+        self._rollout_engine = GameEngine.headless(graph=engine.graph)
+        self._cache: OrderedDict[str, HintView] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+
+    def hint(self, game_id: str, budget_ms: int = DEFAULT_BUDGET_MS) -> HintView:
+        state = self.engine.snapshot_state(game_id)
+        if state.outcome != Outcome.ONGOING:
+            raise ValueError("Game is already finished")
+        node = self.engine.graph.get(state.current_node_id)
+        if node.node_type != NodeType.CHOICE or state.court.is_active:
+            raise ValueError("Hints are only available at a choice node outside court")
+        options = self.engine.graph.enabled_options(node, state)
+        if not options:
+            raise ValueError("No enabled options at the current node")
+
+        key = state_hash(state)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached.budget_ms >= budget_ms:
+                self._cache.move_to_end(key)
+                return cached.model_copy(update={"cached": True, "game_id": game_id})
+
+        started = time.perf_counter()
+        deadline = started + budget_ms / 1000
+        base_seed = int(key[:12], 16)
+        option_ids = [option.id for option in options]
+        if self.workers > 0:
+            tallies = self._run_pooled(state, option_ids, base_seed, deadline)
+        else:
+            tallies = self._run_inline(state, option_ids, base_seed, deadline)
+
+        hints = [
+            OptionHint(
+                option_id=option.id,
+                label=option.label,
+                rollouts=tallies[option.id][1],
+                wins=tallies[option.id][0],
+                win_rate=tallies[option.id][0] / tallies[option.id][1] if tallies[option.id][1] else None,
+            )
+            for option in options
+        ]
+        sampled = [hint for hint in hints if hint.win_rate is not None]
+        view = HintView(
+            game_id=game_id,
+            node_id=state.current_node_id,
+            state_hash=key,
+            budget_ms=budget_ms,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            recommended_option_id=max(sampled, key=lambda hint: hint.win_rate).option_id if sampled else None,
+            options=hints,
+        )
+        with self._lock:
+            self._cache[key] = view
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return view
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _run_inline(
+        self,
+        state: GameState,
+        option_ids: list[str],
+        base_seed: int,
+        deadline: float,
+    ) -> dict[str, tuple[int, int]]:
+        tallies = {option_id: (0, 0) for option_id in option_ids}
+        for round_index in range(MAX_ROLLOUTS_PER_OPTION):
+            for option_index, option_id in enumerate(option_ids):
+                # Always take at least one rollout per option so every option gets an estimate.
+                if round_index > 0 and time.perf_counter() >= deadline:
+                    return tallies
+                seed = _rollout_seed(base_seed, option_index, round_index)
+                won = _rollout(self._rollout_engine, state, option_id, seed)
+                wins, runs = tallies[option_id]
+                tallies[option_id] = (wins + int(won), runs + 1)
+        return tallies
+
+    def _run_pooled(
+        self,
+        state: GameState,
+        option_ids: list[str],
+        base_seed: int,
+        deadline: float,
+    ) -> dict[str, tuple[int, int]]:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        state_json = state.model_dump_json()
+        tallies = {option_id: (0, 0) for option_id in option_ids}
+        rounds = iter(range(0, MAX_ROLLOUTS_PER_OPTION, ROLLOUTS_PER_TASK))
+        pending: dict[Future, str] = {}
+
+        def submit_round() -> bool:
+            start = next(rounds, None)
+            if start is None:
+                return False
+            for option_index, option_id in enumerate(option_ids):
+                seeds = [_rollout_seed(base_seed, option_index, start + k) for k in range(ROLLOUTS_PER_TASK)]
+                pending[self._pool.submit(_rollout_task, state_json, option_id, seeds)] = option_id
+            return True
+
+        for _ in range(self.workers):
+            submit_round()
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                option_id = pending.pop(future)
+                wins, runs = tallies[option_id]
+                task_wins, task_runs = future.result()
+                tallies[option_id] = (wins + task_wins, runs + task_runs)
+            if done and len(pending) < self.workers * len(option_ids):
+                submit_round()
+        for future in pending:
+            future.cancel()
+        return tallies
+
+
+def _rollout_seed(base_seed: int, option_index: int, rollout_index: int) -> int:
+    return (base_seed * 1_000_003 + option_index * 65_537 + rollout_index) % (2**63)
+
+
+def _rollout(engine: GameEngine, state: GameState, option_id: str, seed: int) -> bool:
+    from app.assistant.court_dialogue import live_calls_disabled
+
+    fork = GameSession(state=state.model_copy(deep=True), rng=random.Random(seed))
+    # Rollouts play court sessions too; they must use the offline fallbacks, never the model.
+    with live_calls_disabled():
+        engine.act_session(fork, "choose_option", {"option_id": option_id})
+        final = play_session(engine, fork, random.Random(seed + 1))
+    return final.outcome == Outcome.WIN
+
+
+def _rollout_task(state_json: str, option_id: str, seeds: list[int]) -> tuple[int, int]:
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = GameEngine.headless()
+    state = GameState.model_validate_json(state_json)
+    wins = sum(1 for seed in seeds if _rollout(_worker_engine, state, option_id, seed))
+    return wins, len(seeds)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.models.state import GameState
+
+# GameState containers the engine mutates in place; they are copied when the journal begins.
+IN_PLACE_FIELDS = ("flags", "log")
+
+
+class ChangeJournal:
+    """Collects one action's top-level GameState changes without dumping the whole state twice.
+
+    Every other GameState field is replaced rather than mutated, so a shallow
+    copy of ``__dict__`` taken up front tells which fields changed by identity
+    and keeps their old values intact. The court is the exception: it is
+    mutated in place, so the court models report their first assignment and
+    the court is dumped only then. ``finish`` returns the same
+    ``{field: {"before", "after"}}`` mapping that comparing two full
+    ``model_dump`` snapshots would.
+
+    Changed fields are still dumped whole, and the court, current event and
+    log change on most actions, so the saving over two full dumps is small;
+    ``scripts/bench_journal.py`` measures it.
+    """
+
+    def __init__(self, state: GameState) -> None:
+        self.state = state
+        self._fields = dict(state.__dict__)
+        self._copied = {name: _dump_value(state.__dict__[name]) for name in IN_PLACE_FIELDS}
+        self._court_before: dict[str, Any] | None = None
+        self._attached: list[BaseModel] = []
+
+    @classmethod
+    def begin(cls, state: GameState) -> ChangeJournal:
+        journal = cls(state)
+        court = state.court
+        journal._attach(court)
+        for npc in court.npcs.values():
+            journal._attach(npc)
+        if court.active_modifier is not None:
+            journal._attach(court.active_modifier)
+        return journal
+
+    def touch(self) -> None:
+        if self._court_before is None:
+            self._court_before = self._fields["court"].model_dump(mode="python")
+        # The whole court is captured now; later court mutations need not report.
+        self._detach()
+
+    def finish(self) -> dict[str, dict[str, Any]]:
+        self._detach()
+        current = self.state.__dict__
+        changes: dict[str, dict[str, Any]] = {}
+        for name, old_value in self._fields.items():
+            new_value = current[name]
+            if name in self._copied:
+                before = self._copied[name]
+            elif name == "court" and self._court_before is not None:
+                before = self._court_before
+            elif old_value is new_value:
+                continue
+            else:
+                before = _dump_value(old_value)
+            after = _dump_value(new_value)
+            if before != after:
+                changes[name] = {"before": before, "after": after}
+        return changes
+
+    def _attach(self, model: BaseModel) -> None:
+        model.__pydantic_private__["_journal"] = self
+        self._attached.append(model)
+
+    def _detach(self) -> None:
+        for model in self._attached:
+            model.__pydantic_private__["_journal"] = None
+        self._attached.clear()
+
+    def __copy__(self) -> ChangeJournal:
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> ChangeJournal:
+        # A court copied mid-action keeps reporting here; an early touch still dumps the unchanged live court.
+        return self
+
+
+def _dump_value(value: Any) -> Any:
+    """Same result as ``model_dump(mode="python")`` gives for one GameState field, without dumping the rest."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="python")
+    if isinstance(value, list):
+        return [item.model_dump(mode="python") if isinstance(item, BaseModel) else item for item in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class _GameLock:
+    __slots__ = ("lock", "holders")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.holders = 0
+
+
+class GameLocks:
+    """One mutex per game id, created on first use and dropped when nobody holds or waits on it.
+
+    Requests for the same game run one at a time in this process, so a
+    double-click waits for the first request instead of failing with a
+    version conflict. Requests for different games never wait on each other.
+    This does not coordinate separate processes; the repository's
+    compare-and-swap save covers that case.
+    """
+
+    def __init__(self) -> None:
+        self._locks: dict[str, _GameLock] = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def hold(self, game_id: str) -> Iterator[None]:
+        with self._guard:
+            entry = self._locks.get(game_id)
+            if entry is None:
+                entry = self._locks[game_id] = _GameLock()
+            entry.holders += 1
+        try:
+            with entry.lock:
+                yield
+        finally:
+            with self._guard:
+                entry.holders -= 1
+                if not entry.holders:
+                    del self._locks[game_id]
+
+    def __len__(self) -> int:
+        with self._guard:
+            return len(self._locks)
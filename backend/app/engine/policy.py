@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import random
+from typing import Protocol
+
+from app.models.event_graph import OptionModel
+from app.models.state import GameState
+
+
+class Policy(Protocol):
+    """Decision-maker for simulated games.
+
+    ``choose_option`` gets the enabled options of a choice node and returns
+    one of them, or None to pass the turn instead. All randomness must come
+    from ``rng`` so paired runs stay reproducible.
+    """
+
+    name: str
+
+    def choose_option(self, state: GameState, options: list[OptionModel], rng: random.Random) -> OptionModel | None: ...
+
+    def court_strategy(self, state: GameState, rng: random.Random) -> str: ...
+
+    def court_statement(self, strategy: str) -> str: ...
+
+
+DANGER_OPTION_IDS = {"field_battle", "cede_outskirts", "postpone_attack", "fallback_defense", "reorganize", "pull_back"}
+PROGRESS_OPTION_IDS = {
+    "advance_ch3",
+    "launch_final",
+    "steady_siege",
+    "hold_one_turn",
+    "claim_victory",
+    "continue_hold",
+    "enter_ch4",
+    "enter_ch2",
+}
+REBUILD_OPTION_IDS = {"recover_food", "recover_morale", "appease_court", "stabilize_front"}
+
+
+def option_weight(option_id: str) -> float:
+    if option_id in DANGER_OPTION_IDS:
+        return 0.2
+    if option_id in PROGRESS_OPTION_IDS:
+        return 2.2
+    if option_id in REBUILD_OPTION_IDS:
+        return 1.3
+    return 1.0
+
+
+def _weighted_choice(options: list[OptionModel], rng: random.Random) -> OptionModel:
+    weighted: list[tuple[float, OptionModel]] = []
+    total = 0.0
+    for opt in options:
+        weight = option_weight(opt.id)
+        weighted.append((weight, opt))
+        total += weight
+
+    ticket = rng.uniform(0, total)
+    cursor = 0.0
+    for weight, opt in weighted:
+        cursor += weight
+        if ticket <= cursor:
+            return opt
+    return weighted[-1][1]
+
+
+def pick_court_strategy(state: GameState, rng: random.Random) -> str:
+    tags = set(state.court.current_issue_tags)
+    if state.court.support < 40 and ("morale" in tags or "momentum" in tags):
+        return "emotional_mobilization"
+    if "supply" in tags or "risk" in tags or "stability" in tags:
+        return "rational_argument"
+    if state.court.time_pressure <= 1 and state.court.support < 60:
+        return "authority_pressure"
+    if state.court.temperature < 20 and rng.random() < 0.4:
+        return "emotional_mobilization"
+    return "rational_argument"
+
+
+def statement_for_strategy(strategy: str) -> str:
+    if strategy == "authority_pressure":
+        return "请陛下立军令，先统一指挥链与问责。"
+    if strategy == "emotional_mobilization":
+        return "将士士气可用，请以民心与军心支持前线再进。"
+    return "我给出粮草与里程证据，按可行性推进北伐。"
+
+
+class DefaultPolicy:
+    """The simulator's historical policy: weighted options, passing 5% of the time."""
+
+    name = "default"
+
+    def __init__(self, choose_probability: float = 0.95) -> None:
+        self.choose_probability = choose_probability
+
+    def choose_option(self, state: GameState, options: list[OptionModel], rng: random.Random) -> OptionModel | None:
+        if rng.random() < self.choose_probability:
+            return _weighted_choice(options, rng)
+        return None
+
+    def court_strategy(self, state: GameState, rng: random.Random) -> str:
+        return pick_court_strategy(state, rng)
+
+    def court_statement(self, strategy: str) -> str:
+        return statement_for_strategy(strategy)
+
+
+class UniformPolicy(DefaultPolicy):
+    """Baseline that always picks an enabled option uniformly at random."""
+
+    name = "uniform"
+
+    def choose_option(self, state: GameState, options: list[OptionModel], rng: random.Random) -> OptionModel | None:
+        return rng.choice(options)
+
+
+class CautiousPolicy(DefaultPolicy):
+    """Prefers rebuilding options and rational argument at court."""
+
+    name = "cautious"
+
+    def choose_option(self, state: GameState, options: list[OptionModel], rng: random.Random) -> OptionModel | None:
+        rebuild = [option for option in options if option.id in REBUILD_OPTION_IDS]
+        if rebuild and (state.food < 80 or state.morale < 50):
+            return rng.choice(rebuild)
+        return super().choose_option(state, options, rng)
+
+    def court_strategy(self, state: GameState, rng: random.Random) -> str:
+        return "rational_argument"
+
+
+DEFAULT_POLICY = DefaultPolicy()
+POLICIES: dict[str, Policy] = {policy.name: policy for policy in (DEFAULT_POLICY, UniformPolicy(), CautiousPolicy())}
+
+
+def get_policy(name: str) -> Policy:
+    policy = POLICIES.get(name)
+    if policy is None:
+        raise ValueError(f"Unknown policy: {name}")
+    return policy
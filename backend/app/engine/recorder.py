@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import copy
+import logging
+from typing import Any, Protocol
+
+from app.engine.repository import GameSession
+from app.engine.rng import CounterRandom
+
+logger = logging.getLogger(__name__)
+
+
+class TraceRecorder(Protocol):
+    """Sink for the replay data GameEngine produces while acting on a session.
+
+    When ``enabled`` is False the engine skips building trace entries and the
+    before/after state snapshots entirely, so a disabled recorder costs nothing.
+    """
+
+    enabled: bool
+
+    def record_action(self, session: GameSession, action: str, payload: dict[str, Any]) -> None: ...
+
+    def record_trace(self, session: GameSession, entry: dict[str, Any]) -> None: ...
+
+    def record_check(self, session: GameSession, check_key: str, success: bool) -> None: ...
+
+
+class SessionTraceRecorder:
+    """Default recorder: keeps action history and diagnostics on the session for /replay."""
+
+    enabled = True
+
+    def record_action(self, session: GameSession, action: str, payload: dict[str, Any]) -> None:
+        entry: dict[str, Any] = {"action": action, "payload": copy.deepcopy(payload)}
+        if isinstance(session.rng, CounterRandom):
+            # Draw index before the action, so a replay can jump straight to it.
+            entry["rng_index"] = session.rng.counter
+        session.action_history.append(entry)
+
+    def record_trace(self, session: GameSession, entry: dict[str, Any]) -> None:
+        session.diagnostics.append(entry)
+
+        log_level = logging.INFO if entry["level"] == "info" else logging.DEBUG
+        logger.log(log_level, "engine_trace", extra={"trace": entry})
+
+    def record_check(self, session: GameSession, check_key: str, success: bool) -> None:
+        return None
+
+
+class NullTraceRecorder:
+    """Recorder for simulation and bulk replays where nobody reads the trace."""
+
+    enabled = False
+
+    def record_action(self, session: GameSession, action: str, payload: dict[str, Any]) -> None:
+        return None
+
+    def record_trace(self, session: GameSession, entry: dict[str, Any]) -> None:
+        return None
+
+    def record_check(self, session: GameSession, check_key: str, success: bool) -> None:
+        return None
+
+
+class CheckTallyRecorder(NullTraceRecorder):
+    """Null recorder that still collects (check_key, success) pairs for per-run simulation records."""
+
+    def __init__(self) -> None:
+        self.checks: list[tuple[str, bool]] = []
+
+    def record_check(self, session: GameSession, check_key: str, success: bool) -> None:
+        self.checks.append((check_key, success))
@@ -1,12 +1,43 @@
 from __future__ import annotations
 
-import base64
-import pickle
+import os
 import random
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from typing import Any, Protocol
 
-from app.models.state import GameState
+from app.engine.rng import deserialize_rng, new_rng, serialize_rng
+from app.models.state import GameState, Outcome
+
+# A finished game with traces comes to about 1 MB by ``estimate_session_bytes``
+# (0.4-7 MB over seeded runs), so the byte budget fits the session limit's worth
+# of them and neither limit silently undercuts the other.
+DEFAULT_MAX_SESSIONS = 1_000
+DEFAULT_SESSION_TTL = 6 * 60 * 60.0
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Resident size per part of a session, measured with tracemalloc over finished
+# games: the state plus its RNG, one trace entry, one action entry.
+SESSION_BASE_BYTES = 96_000
+TRACE_ENTRY_BYTES = 6_000
+ACTION_ENTRY_BYTES = 600
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return int(raw)
+
+
+class SessionConflictError(RuntimeError):
+    """A save lost a race: the stored game changed after this session was read."""
+
+    def __init__(self, game_id: str) -> None:
+        super().__init__(f"Game {game_id} was changed by another request; reload it and retry")
+        self.game_id = game_id
 
 
 @dataclass
@@ -15,21 +46,39 @@ class GameSession:
     rng: random.Random
     diagnostics: list[dict[str, Any]] = field(default_factory=list)
     action_history: list[dict[str, Any]] = field(default_factory=list)
+    # Replay entries a repository has already persisted and not kept in the two
+    # lists above; the lists hold only what was recorded after them.
+    stored_actions: int = 0
+    stored_diagnostics: int = 0
+    # Row version this session was read at or last written as, for compare-and-swap saves.
+    version: int = 0
+    # Live model calls this session has made since its last snapshot; their
+    # results cannot be replayed, so the next logged action must snapshot.
+    unsnapshotted_model_calls: int = 0
+    history_loader: Callable[[], tuple[list[dict[str, Any]], list[dict[str, Any]]]] | None = field(
+        default=None, repr=False, compare=False
+    )
+
+    def full_history(self) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """(action_history, diagnostics) from the first action, fetching the persisted prefix if any."""
+        if self.history_loader is None or not (self.stored_actions or self.stored_diagnostics):
+            return self.action_history, self.diagnostics
+        stored_actions, stored_diagnostics = self.history_loader()
+        return (
+            stored_actions[: self.stored_actions] + self.action_history,
+            stored_diagnostics[: self.stored_diagnostics] + self.diagnostics,
+        )
 
     def serialize_state(self) -> str:
         return self.state.model_dump_json()
 
     def serialize_rng(self) -> str:
-        payload = pickle.dumps(self.rng.getstate())
-        return base64.b64encode(payload).decode("ascii")
+        return serialize_rng(self.rng)
 
     @classmethod
     def from_serialized(cls, state_json: str, rng_state: str) -> GameSession:
         state = GameState.model_validate_json(state_json)
-        rng = random.Random()
-        payload = base64.b64decode(rng_state.encode("ascii"))
-        rng.setstate(pickle.loads(payload))
-        return cls(state=state, rng=rng)
+        return cls(state=state, rng=deserialize_rng(rng_state))
 
 
 class StateRepository(Protocol):
@@ -41,29 +90,166 @@ class StateRepository(Protocol):
 
     def reset(self, game_id: str | None = None) -> None: ...
 
+    def close(self) -> None: ...
+
+
+def estimate_session_bytes(session: GameSession) -> int:
+    """Approximate resident size of a session, from its entry counts alone so it stays O(1)."""
+    return (
+        SESSION_BASE_BYTES
+        + len(session.diagnostics) * TRACE_ENTRY_BYTES
+        + len(session.action_history) * ACTION_ENTRY_BYTES
+    )
+
+
+class _Entry:
+    __slots__ = ("session", "last_access", "size")
+
+    def __init__(self, session: GameSession, last_access: float, size: int) -> None:
+        self.session = session
+        self.last_access = last_access
+        self.size = size
+
 
 class InMemoryRepository:
-    def __init__(self) -> None:
-        self._sessions: dict[str, GameSession] = {}
+    """Sessions held in process, bounded by count, idle time and an estimated byte budget.
+
+    Entries sit in an ``OrderedDict`` in last-access order, so the least
+    recently used session is always at the front and eviction is O(1).
+    Finished games are also kept in their own access-ordered index and are
+    evicted first, so a long tail of finished games cannot push out one still
+    being played. A session idle for longer than ``ttl_seconds`` is dropped
+    the next time the repository is touched; because idle sessions collect at
+    the front, that sweep only looks at the ones it removes. Sizes come from
+    ``estimate_session_bytes`` and are refreshed on every ``save``. The limits
+    default to ``INMEMORY_MAX_SESSIONS``, ``INMEMORY_SESSION_TTL`` (seconds)
+    and ``INMEMORY_MAX_BYTES``; ``0`` turns a limit off. The session being
+    saved is never evicted by its own save. ``stats()`` reports the counters.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int | None = None,
+        ttl_seconds: float | None = None,
+        max_bytes: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_sessions = (
+            max_sessions if max_sessions is not None else _env_int("INMEMORY_MAX_SESSIONS", DEFAULT_MAX_SESSIONS)
+        )
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("INMEMORY_SESSION_TTL") or DEFAULT_SESSION_TTL)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int("INMEMORY_MAX_BYTES", DEFAULT_MAX_BYTES)
+        if self.max_sessions < 0 or self.ttl_seconds < 0 or self.max_bytes < 0:
+            raise ValueError("InMemoryRepository limits must be non-negative")
+        self._clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.total_bytes = 0
+        self._sessions: OrderedDict[str, _Entry] = OrderedDict()
+        self._finished: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
 
     def create(self, state: GameState) -> GameSession:
         session = GameSession(
             state=state,
-            rng=random.Random(state.seed),
+            rng=new_rng(state.seed),
             diagnostics=[],
             action_history=[],
         )
-        self._sessions[state.game_id] = session
+        self._store(session)
         return session
 
     def get(self, game_id: str) -> GameSession | None:
-        return self._sessions.get(game_id)
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            entry = self._sessions.get(game_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry.last_access = now
+            self._sessions.move_to_end(game_id)
+            if game_id in self._finished:
+                self._finished.move_to_end(game_id)
+            self.hits += 1
+            return entry.session
 
     def save(self, session: GameSession) -> None:
-        self._sessions[session.state.game_id] = session
+        self._store(session)
 
     def reset(self, game_id: str | None = None) -> None:
-        if game_id is None:
-            self._sessions.clear()
+        with self._lock:
+            if game_id is None:
+                self._sessions.clear()
+                self._finished.clear()
+                self.total_bytes = 0
+                return
+            entry = self._sessions.pop(game_id, None)
+            self._finished.pop(game_id, None)
+            if entry is not None:
+                self.total_bytes -= entry.size
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _store(self, session: GameSession) -> None:
+        game_id = session.state.game_id
+        size = estimate_session_bytes(session)
+        with self._lock:
+            now = self._clock()
+            previous = self._sessions.pop(game_id, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self._expire(now)
+            self._sessions[game_id] = _Entry(session, now, size)
+            self.total_bytes += size
+            if session.state.outcome == Outcome.ONGOING:
+                self._finished.pop(game_id, None)
+            else:
+                self._finished[game_id] = None
+                self._finished.move_to_end(game_id)
+            while len(self._sessions) > 1 and (
+                (self.max_sessions and len(self._sessions) > self.max_sessions)
+                or (self.max_bytes and self.total_bytes > self.max_bytes)
+            ):
+                self._evict_one(keep=game_id)
+
+    def _evict_one(self, keep: str) -> None:
+        """Drop the least recently used finished game, or the least recently used game if none is finished."""
+        victim = next(iter(self._finished), None)
+        if victim is None or victim == keep:
+            victim = next(iter(self._sessions))
+        evicted = self._sessions.pop(victim)
+        self._finished.pop(victim, None)
+        self.total_bytes -= evicted.size
+        self.evictions += 1
+
+    def _expire(self, now: float) -> None:
+        if not self.ttl_seconds:
             return
-        self._sessions.pop(game_id, None)
+        cutoff = now - self.ttl_seconds
+        while self._sessions:
+            entry = next(iter(self._sessions.values()))
+            if entry.last_access > cutoff:
+                return
+            game_id, _ = self._sessions.popitem(last=False)
+            self._finished.pop(game_id, None)
+            self.total_bytes -= entry.size
+            self.expirations += 1
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from app.engine.repository import GameSession, SessionConflictError
+from app.engine.repository_sqlite import PendingSave, SQLiteRepository, _env_int
+from app.models.state import GameState
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("write_through", "write_behind")
+DEFAULT_CACHE_SESSIONS = 1024
+DEFAULT_MAX_STALENESS = 1.0
+
+
+class CachedRepository:
+    """Bounded LRU of live sessions in front of a SQLite repository.
+
+    A cache hit returns the session object itself, so a player's next
+    ``/act`` skips the SELECT, the state validation and the RNG restore.
+    ``save`` always serializes the session right away, in the request's
+    thread. In ``write_through`` mode it also writes the rows then. In
+    ``write_behind`` mode it queues them instead, and a background thread
+    writes everything queued in one transaction every ``max_staleness / 2``
+    seconds. So a save reaches disk within about ``max_staleness``, and a
+    crash loses at most that much. Queued writes are also flushed when a
+    session is evicted, before a missed ``get`` or a replay reads storage,
+    and on ``close``.
+
+    Because every request for a game shares that one object, concurrent
+    requests for the same game must be serialized. ``GameEngine`` does this
+    with its per-game locks (``GAME_LOCKS``, on by default) and refuses a
+    cache when they are off. When a request fails, the engine calls
+    ``discard`` so a half-applied change never reaches a later save.
+
+    A cached session may be stale if another process also writes the file.
+    The backing store's compare-and-swap catches that on the next write. In
+    ``write_through`` mode the save raises ``SessionConflictError`` and the
+    session is dropped from the cache, so a retry reloads the stored game.
+    ``write_behind`` could only find out at flush time, after the client was
+    told its actions succeeded. So it claims sole access to the database and
+    refuses to start if any other repository has the file open. If a conflict
+    still happens, the losing game's queued writes are dropped, counted in
+    ``conflicts`` and ``lost_saves``, and logged as an error. The other games
+    in the batch are still written.
+    """
+
+    def __init__(
+        self,
+        backing: SQLiteRepository,
+        *,
+        max_sessions: int | None = None,
+        mode: str | None = None,
+        max_staleness: float | None = None,
+    ) -> None:
+        self.backing = backing
+        self.max_sessions = (
+            max_sessions if max_sessions is not None else _env_int("SESSION_CACHE_SIZE", DEFAULT_CACHE_SESSIONS)
+        )
+        if self.max_sessions <= 0:
+            raise ValueError("max_sessions must be positive")
+        self.mode = (mode or os.getenv("SESSION_CACHE_MODE") or "write_through").strip().lower()
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f"Unsupported session cache mode: {self.mode}")
+        if max_staleness is None:
+            max_staleness = float(os.getenv("SESSION_CACHE_MAX_STALENESS") or DEFAULT_MAX_STALENESS)
+        if max_staleness <= 0:
+            raise ValueError("max_staleness must be positive")
+        self.max_staleness = max_staleness
+        if self.mode == "write_behind":
+            backing.claim_sole_access()
+
+        self.hits = 0
+        self.misses = 0
+        self.conflicts = 0
+        self.lost_saves = 0
+        self._sessions: OrderedDict[str, GameSession] = OrderedDict()
+        self._pending: dict[str, list[PendingSave]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: threading.Thread | None = None
+        if self.mode == "write_behind":
+            self._flusher = threading.Thread(target=self._flush_periodically, name="session-cache-flush", daemon=True)
+            self._flusher.start()
+
+    def create(self, state: GameState) -> GameSession:
+        # Queued writes of an earlier game under this id must not land on top of the new one.
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(state.game_id, None)
+            session = self.backing.create(state)
+        self._remember(session)
+        return session
+
+    def get(self, game_id: str) -> GameSession | None:
+        with self._lock:
+            session = self._sessions.get(game_id)
+            if session is not None:
+                self._sessions.move_to_end(game_id)
+                self.hits += 1
+                return session
+            self.misses += 1
+        self.flush_game(game_id)
+        session = self.backing.get(game_id)
+        if session is None:
+            return None
+        self._remember(session)
+        return session
+
+    def save(self, session: GameSession) -> None:
+        pending = self.backing.prepare_save(session)
+        if self.mode == "write_through":
+            try:
+                self.backing.write_batch([pending])
+            except SessionConflictError:
+                self._forget(session.state.game_id)
+                raise
+            self.backing.mark_saved(session, pending)
+        else:
+            # The queued rows now own these replay entries; flush() persists them.
+            self.backing.mark_saved(session, pending)
+            with self._lock:
+                self._pending.setdefault(pending.game_id, []).append(pending)
+        self._remember(session)
+
+    def reset(self, game_id: str | None = None) -> None:
+        # Under the flush lock so an in-flight flush cannot write the game back afterwards.
+        with self._flush_lock:
+            with self._lock:
+                if game_id is None:
+                    self._sessions.clear()
+                    self._pending.clear()
+                else:
+                    self._sessions.pop(game_id, None)
+                    self._pending.pop(game_id, None)
+            self.backing.reset(game_id)
+
+    def discard(self, game_id: str) -> None:
+        """Drop the cached session so the next ``get`` reloads what was last saved."""
+        self._forget(game_id)
+
+    def flush(self) -> None:
+        """Write every queued save in one transaction.
+
+        Games that lost a version conflict are dropped from the batch and
+        counted in ``conflicts`` and ``lost_saves``. On any other failure the
+        saves stay queued for the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            while batch:
+                try:
+                    self.backing.write_batch([item for items in batch.values() for item in items])
+                    return
+                except SessionConflictError as exc:
+                    if exc.game_id not in batch:
+                        self._requeue(batch)
+                        raise
+                    # Something else wrote this game despite the claim; its queued writes are lost.
+                    lost = batch.pop(exc.game_id)
+                    with self._lock:
+                        self.conflicts += 1
+                        self.lost_saves += len(lost)
+                    logger.error("session_cache_write_conflict game_id=%s lost_saves=%d", exc.game_id, len(lost))
+                    self._forget(exc.game_id)
+                except BaseException:
+                    self._requeue(batch)
+                    raise
+
+    def flush_game(self, game_id: str) -> None:
+        with self._lock:
+            queued = game_id in self._pending
+        if queued:
+            self.flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self.backing.close()
+
+    def _requeue(self, batch: dict[str, list[PendingSave]]) -> None:
+        """Put an unwritten batch back ahead of anything queued since, for the next flush."""
+        with self._lock:
+            for game_id, items in self._pending.items():
+                batch.setdefault(game_id, []).extend(items)
+            self._pending = batch
+
+    def _forget(self, game_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(game_id, None)
+
+    def _remember(self, session: GameSession) -> None:
+        game_id = session.state.game_id
+        loader = session.history_loader
+        if loader is not None and not isinstance(loader, _FlushThenLoad):
+            session.history_loader = _FlushThenLoad(self, game_id, loader)
+        with self._lock:
+            self._sessions[game_id] = session
+            self._sessions.move_to_end(game_id)
+            evicted_queued = False
+            while len(self._sessions) > self.max_sessions:
+                evicted_id, _ = self._sessions.popitem(last=False)
+                evicted_queued = evicted_queued or evicted_id in self._pending
+        if evicted_queued:
+            self.flush()
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(self.max_staleness / 2):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("session_cache_flush_failed")
+
+
+class _FlushThenLoad:
+    """History loader for a cached session: replays read storage, so the game's queued writes land first."""
+
+    def __init__(self, cache: CachedRepository, game_id: str, loader: Any) -> None:
+        self.cache = cache
+        self.game_id = game_id
+        self.loader = loader
+
+    def __call__(self) -> Any:
+        self.cache.flush_game(self.game_id)
+        return self.loader()
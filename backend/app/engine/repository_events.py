@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from app.engine.repository import GameSession, SessionConflictError
+from app.engine.repository_sqlite import INSERT_ACTION, PendingSave, SQLiteRepository, _env_int
+from app.engine.rng import new_rng
+from app.models.state import GameState
+
+if TYPE_CHECKING:
+    from app.engine.graph import EventGraph
+    from app.engine.runtime import GameEngine
+
+DEFAULT_SNAPSHOT_INTERVAL = 16
+# Recorded by the engine itself rather than applied through act_session, so never replayed.
+UNREPLAYABLE_ACTIONS = frozenset({"new_game"})
+LATEST = 1 << 62
+
+
+class EventSourcedRepository(SQLiteRepository):
+    """SQLite sessions kept as an action log plus a full snapshot every ``snapshot_interval`` actions.
+
+    ``save`` appends the new ``(action, payload)`` rows to ``actions`` and
+    writes nothing else until the log crosses the next multiple of the
+    interval, so a typical ``/act`` inserts one small row instead of the whole
+    state. ``get`` loads the latest snapshot and re-runs the later actions
+    through a headless engine, which is deterministic given state and RNG.
+    Court steps whose lines or support shift came from the model, and the
+    engine's own ``new_game`` setup, cannot be re-run, so a save that includes
+    one is snapshotted at once; replays never call the model. Snapshots are
+    kept, which makes ``state_at`` cheap point-in-time history. Traces are
+    not persisted in this mode.
+
+    The ``(game_id, seq)`` key of the action log does the job of the session
+    version: a save appends at the sequence number its session was read at,
+    so the second of two racing saves hits the key and raises
+    ``SessionConflictError``.
+    """
+
+    tables = (*SQLiteRepository.tables, "snapshots")
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        snapshot_interval: int | None = None,
+        graph: EventGraph | None = None,
+        **options: Any,
+    ) -> None:
+        self.snapshot_interval = (
+            snapshot_interval
+            if snapshot_interval is not None
+            else _env_int("EVENT_SNAPSHOT_INTERVAL", DEFAULT_SNAPSHOT_INTERVAL)
+        )
+        if self.snapshot_interval <= 0:
+            raise ValueError("snapshot_interval must be positive")
+        self._graph = graph
+        self._replayer: GameEngine | None = None
+        super().__init__(db_path, **options)
+
+    def _initialize(self) -> None:
+        super()._initialize()
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    game_id TEXT NOT NULL,
+                    action_seq INTEGER NOT NULL,
+                    state_json TEXT NOT NULL,
+                    rng_state TEXT NOT NULL,
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (game_id, action_seq)
+                )
+                """
+            )
+
+    def create(self, state: GameState) -> GameSession:
+        session = GameSession(state=state, rng=new_rng(state.seed))
+        with self._connection() as conn:
+            self._discard_history(conn, state.game_id)
+            self._insert_snapshot(conn, state.game_id, 0, *self._dump_session(session))
+        session.history_loader = partial(self._load_history, state.game_id)
+        return session
+
+    def get(self, game_id: str) -> GameSession | None:
+        return self._rebuild(game_id, LATEST)
+
+    def state_at(self, game_id: str, action_count: int) -> GameState | None:
+        """State right after the first ``action_count`` logged actions (``new_game`` included)."""
+        if action_count < 0:
+            raise ValueError("action_count must be non-negative")
+        session = self._rebuild(game_id, action_count)
+        return session.state if session is not None else None
+
+    def prepare_save(self, session: GameSession) -> PendingSave:
+        from app.assistant.court_dialogue import take_live_call_count
+
+        # Read in the request's own context: a deferred write may run on another thread.
+        # Kept on the session, since a save with no action rows (entering court) has
+        # nothing to snapshot yet and the call belongs to the next logged action.
+        session.unsnapshotted_model_calls += take_live_call_count()
+        action_rows = self._new_action_rows(session)
+        before = session.stored_actions
+        total = before + len(action_rows)
+        snapshot = bool(action_rows) and (
+            session.unsnapshotted_model_calls > 0
+            or total // self.snapshot_interval > before // self.snapshot_interval
+            or any(row[2] in UNREPLAYABLE_ACTIONS for row in action_rows)
+        )
+        if not snapshot:
+            # Without a snapshot only the action rows are written; a rebuild repeats the rest.
+            return PendingSave(game_id=session.state.game_id, state_json=None, rng_state=None, action_rows=action_rows)
+        state_data, rng_state = self._dump_session(session)
+        return PendingSave(
+            game_id=session.state.game_id,
+            state_json=state_data,
+            rng_state=rng_state,
+            action_rows=action_rows,
+            snapshot_seq=total,
+        )
+
+    def _write_pending(self, conn: sqlite3.Connection, item: PendingSave) -> None:
+        if item.action_rows:
+            try:
+                conn.executemany(INSERT_ACTION, item.action_rows)
+            except sqlite3.IntegrityError as exc:
+                raise SessionConflictError(item.game_id) from exc
+        if item.snapshot_seq is not None:
+            self._insert_snapshot(conn, item.game_id, item.snapshot_seq, item.state_json, item.rng_state)
+
+    def mark_saved(self, session: GameSession, pending: PendingSave) -> None:
+        # Traces are not persisted in this mode.
+        session.diagnostics.clear()
+        if pending.snapshot_seq is not None:
+            session.unsnapshotted_model_calls = 0
+        super().mark_saved(session, pending)
+
+    def _insert_snapshot(
+        self,
+        conn: sqlite3.Connection,
+        game_id: str,
+        action_seq: int,
+        state_json: str | bytes | None,
+        rng_state: str | None,
+    ) -> None:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO snapshots (game_id, action_seq, state_json, rng_state)
+            VALUES (?, ?, ?, ?)
+            """,
+            (game_id, action_seq, state_json, rng_state),
+        )
+
+    def _rebuild(self, game_id: str, action_count: int) -> GameSession | None:
+        with self._connection() as conn:
+            snapshot = conn.execute(
+                """
+                SELECT action_seq, state_json, rng_state FROM snapshots
+                WHERE game_id = ? AND action_seq <= ?
+                ORDER BY action_seq DESC LIMIT 1
+                """,
+                (game_id, action_count),
+            ).fetchone()
+            if snapshot is None:
+                return None
+            rows = conn.execute(
+                "SELECT seq, action, payload_json FROM actions WHERE game_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (game_id, snapshot["action_seq"], action_count),
+            ).fetchall()
+
+        session = self._load_session(snapshot["state_json"], snapshot["rng_state"])
+        if rows:
+            from app.assistant.court_dialogue import live_calls_disabled
+
+            replayer = self._replay_engine()
+            with live_calls_disabled():
+                for row in rows:
+                    try:
+                        replayer.act_session(session, row["action"], json.loads(row["payload_json"]))
+                    except Exception as exc:
+                        raise RuntimeError(
+                            f"Game {game_id} cannot be rebuilt: logged action {row['seq']} "
+                            f"({row['action']}) failed to replay: {exc}"
+                        ) from exc
+        session.stored_actions = snapshot["action_seq"] + len(rows)
+        session.history_loader = partial(self._load_history, game_id)
+        return session
+
+    def _replay_engine(self) -> GameEngine:
+        if self._replayer is None:
+            from app.engine.runtime import GameEngine
+
+            self._replayer = GameEngine.headless(graph=self._graph)
+        return self._replayer
@@ -1,73 +1,420 @@
 from __future__ import annotations
 
-import random
+import json
+import os
+import queue
 import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
+from typing import Any
 
-from app.engine.repository import GameSession
+from app.engine.codec import decode_session, encode_session
+from app.engine.repository import GameSession, SessionConflictError, _env_int
+from app.engine.rng import new_rng
 from app.models.state import GameState
 
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+SESSION_CODECS = ("json", "binary")
+# SQLite gives every connection to these its own database, so no sidecar lock is needed.
+PRIVATE_DATABASES = (":memory:", "")
+# anyio's default worker-thread limit, which is what FastAPI runs sync endpoints on.
+DEFAULT_POOL_SIZE = 40
+DEFAULT_CACHE_SIZE = -16_000  # negative means KiB, so about 16 MB per connection
+DEFAULT_MMAP_SIZE = 64 * 1024 * 1024
+INSERT_ACTION = "INSERT INTO actions (game_id, seq, action, payload_json, rng_index) VALUES (?, ?, ?, ?, ?)"
+
+
+@dataclass
+class PendingSave:
+    """One session's rows, serialized by ``prepare_save`` and persisted later by ``write_batch``."""
+
+    game_id: str
+    state_json: str | bytes | None
+    rng_state: str | None
+    action_rows: list[tuple[Any, ...]]
+    trace_rows: list[tuple[Any, ...]] = field(default_factory=list)
+    snapshot_seq: int | None = None
+    # Version the session row gets from this write; the write only applies over version - 1.
+    version: int | None = None
+
 
 class SQLiteRepository:
-    def __init__(self, db_path: str) -> None:
+    """Sessions in one SQLite file, served from a pool of persistent connections.
+
+    Connections are opened lazily, up to ``pool_size``, and each call checks
+    one out for its transaction and hands it back, so after warm-up a request
+    no longer pays for ``connect`` and pragma setup. The pool is LIFO, so a busy
+    thread keeps getting the connection it just used. Every connection runs in
+    WAL mode, which lets readers proceed while a writer commits. With
+    ``synchronous=NORMAL`` a commit does not fsync; the WAL is synced at
+    checkpoints instead. ``synchronous``, ``cache_size``, ``mmap_size`` and
+    ``pool_size`` default to the ``SQLITE_SYNCHRONOUS``, ``SQLITE_CACHE_SIZE``,
+    ``SQLITE_MMAP_SIZE`` and ``SQLITE_POOL_SIZE`` environment variables.
+
+    Replay data lives in the append-only ``actions`` and ``traces`` tables,
+    keyed by ``(game_id, seq)``. ``save`` inserts only the entries recorded
+    since the last save and then drops them from the session, so a long game
+    never rewrites or re-reads its history on each ``/act``. ``get`` loads no
+    history: the session's ``history_loader`` fetches it when a replay asks.
+
+    Each session row carries a ``version``. ``save`` is a compare-and-swap:
+    it updates the row only if the version is still the one the session was
+    read at, and raises ``SessionConflictError`` otherwise. When two requests
+    race on one game, the loser fails instead of overwriting the winner's
+    state and RNG, and several processes can share the file without a
+    global lock. ``create`` replaces any earlier game under the same id and
+    keeps counting versions from it, so a session still held from the old
+    game cannot overwrite the new one.
+
+    While open, a repository holds a shared lock on the ``<db>-owner``
+    sidecar file. A write-behind cache calls ``claim_sole_access`` to turn it
+    into an exclusive lock. That fails while any other repository, in this
+    process or another, has the file open, and it keeps new ones out until
+    the cache closes. ``:memory:`` and ``""`` (a temporary file) databases
+    are private to each connection, so they get no sidecar.
+
+    Session state is written as JSON unless ``codec`` (or ``SESSION_CODEC``)
+    is ``binary``, the compact codec from ``app.engine.codec``: it stores
+    fewer bytes but encodes and decodes no faster. Rows in either format are
+    read back.
+    """
+
+    tables: tuple[str, ...] = ("sessions", "actions", "traces")
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        pool_size: int | None = None,
+        synchronous: str | None = None,
+        cache_size: int | None = None,
+        mmap_size: int | None = None,
+        busy_timeout: float = 5.0,
+        codec: str | None = None,
+    ) -> None:
         self.db_path = db_path
+        self.pool_size = pool_size if pool_size is not None else _env_int("SQLITE_POOL_SIZE", DEFAULT_POOL_SIZE)
+        if self.pool_size <= 0:
+            raise ValueError("pool_size must be positive")
+        self.synchronous = (synchronous or os.getenv("SQLITE_SYNCHRONOUS") or "NORMAL").strip().upper()
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unsupported SQLite synchronous mode: {self.synchronous}")
+        self.cache_size = cache_size if cache_size is not None else _env_int("SQLITE_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+        self.mmap_size = mmap_size if mmap_size is not None else _env_int("SQLITE_MMAP_SIZE", DEFAULT_MMAP_SIZE)
+        self.busy_timeout = busy_timeout
+        self.codec = (codec or os.getenv("SESSION_CODEC") or "json").strip().lower()
+        if self.codec not in SESSION_CODECS:
+            raise ValueError(f"Unsupported session codec: {self.codec}")
+
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        self._owner: sqlite3.Connection | None = None
         self._initialize()
 
     def _connect(self) -> sqlite3.Connection:
-        connection = sqlite3.connect(self.db_path)
+        # Handed between worker threads through the pool, never used by two at once.
+        connection = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
         connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"PRAGMA synchronous={self.synchronous}")
+        connection.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
         return connection
 
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a pooled connection for one transaction (committed, or rolled back on error)."""
+        conn = self._checkout()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._checkin(conn)
+
+    def _checkout(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError("SQLiteRepository is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.pool_size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._connect()
+            except BaseException:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.busy_timeout)
+        except queue.Empty:
+            raise RuntimeError(f"No SQLite connection free after {self.busy_timeout}s") from None
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.put(conn)
+                return
+        conn.close()
+
     def _initialize(self) -> None:
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        with self._connect() as conn:
+        self._join()
+        with self._connection() as conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS sessions (
                     game_id TEXT PRIMARY KEY,
                     state_json TEXT NOT NULL,
                     rng_state TEXT NOT NULL,
-                    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(sessions)")}
+            if "version" not in columns:
+                conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS actions (
+                    game_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    action TEXT NOT NULL,
+                    payload_json TEXT NOT NULL,
+                    rng_index INTEGER,
+                    PRIMARY KEY (game_id, seq)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS traces (
+                    game_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    entry_json TEXT NOT NULL,
+                    PRIMARY KEY (game_id, seq)
                 )
                 """
             )
 
     def create(self, state: GameState) -> GameSession:
-        session = GameSession(state=state, rng=random.Random(state.seed))
-        self.save(session)
+        session = GameSession(state=state, rng=new_rng(state.seed))
+        pending = self.prepare_save(session)
+        with self._connection() as conn:
+            self._discard_history(conn, state.game_id)
+            conn.execute(
+                """
+                INSERT INTO sessions (game_id, state_json, rng_state, version, updated_at)
+                VALUES (?, ?, ?, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT(game_id) DO UPDATE SET
+                    state_json = excluded.state_json,
+                    rng_state = excluded.rng_state,
+                    version = sessions.version + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (state.game_id, pending.state_json, pending.rng_state),
+            )
+            pending.version = conn.execute(
+                "SELECT version FROM sessions WHERE game_id = ?", (state.game_id,)
+            ).fetchone()["version"]
+            self._write_history(conn, pending)
+        self.mark_saved(session, pending)
         return session
 
     def get(self, game_id: str) -> GameSession | None:
-        with self._connect() as conn:
+        with self._connection() as conn:
             row = conn.execute(
-                "SELECT state_json, rng_state FROM sessions WHERE game_id = ?", (game_id,)
+                """
+                SELECT
+                    state_json,
+                    rng_state,
+                    version,
+                    (SELECT COALESCE(MAX(seq) + 1, 0) FROM actions WHERE game_id = sessions.game_id) AS action_count,
+                    (SELECT COALESCE(MAX(seq) + 1, 0) FROM traces WHERE game_id = sessions.game_id) AS trace_count
+                FROM sessions WHERE game_id = ?
+                """,
+                (game_id,),
             ).fetchone()
 
         if row is None:
             return None
 
-        return GameSession.from_serialized(row["state_json"], row["rng_state"])
+        session = self._load_session(row["state_json"], row["rng_state"])
+        session.stored_actions = row["action_count"]
+        session.stored_diagnostics = row["trace_count"]
+        session.version = row["version"]
+        session.history_loader = partial(self._load_history, game_id)
+        return session
 
     def save(self, session: GameSession) -> None:
-        state_json = session.serialize_state()
-        rng_state = session.serialize_rng()
+        pending = self.prepare_save(session)
+        self.write_batch([pending])
+        self.mark_saved(session, pending)
 
-        with self._connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO sessions (game_id, state_json, rng_state, updated_at)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(game_id) DO UPDATE SET
-                    state_json = excluded.state_json,
-                    rng_state = excluded.rng_state,
-                    updated_at = CURRENT_TIMESTAMP
-                """,
-                (session.state.game_id, state_json, rng_state),
+    def prepare_save(self, session: GameSession) -> PendingSave:
+        """Serialize what ``save`` would write, without touching the database or the session."""
+        game_id = session.state.game_id
+        state_data, rng_state = self._dump_session(session)
+        return PendingSave(
+            game_id=game_id,
+            state_json=state_data,
+            rng_state=rng_state,
+            action_rows=self._new_action_rows(session),
+            trace_rows=[
+                (game_id, session.stored_diagnostics + offset, json.dumps(entry, ensure_ascii=False))
+                for offset, entry in enumerate(session.diagnostics)
+            ],
+            version=session.version + 1,
+        )
+
+    def _dump_session(self, session: GameSession) -> tuple[str | bytes, str]:
+        """Values for the ``state_json`` and ``rng_state`` columns.
+
+        With the binary codec the blob carries the RNG as well and ``rng_state``
+        is left empty. SQLite keeps a BLOB as is in a TEXT column, so both kinds
+        of row can share the table and ``_load_session`` tells them apart.
+        """
+        if self.codec == "binary":
+            return encode_session(session), ""
+        return session.serialize_state(), session.serialize_rng()
+
+    @staticmethod
+    def _load_session(state_data: str | bytes, rng_state: str) -> GameSession:
+        if isinstance(state_data, bytes):
+            return decode_session(state_data)
+        return GameSession.from_serialized(state_data, rng_state)
+
+    def write_batch(self, pending: list[PendingSave]) -> None:
+        """Persist prepared saves, in order, in a single transaction; one conflict rolls back the whole batch."""
+        if not pending:
+            return
+        with self._connection() as conn:
+            for item in pending:
+                self._write_pending(conn, item)
+
+    def _write_pending(self, conn: sqlite3.Connection, item: PendingSave) -> None:
+        updated = conn.execute(
+            """
+            UPDATE sessions SET state_json = ?, rng_state = ?, version = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE game_id = ? AND version = ?
+            """,
+            (item.state_json, item.rng_state, item.version, item.game_id, item.version - 1),
+        ).rowcount
+        if not updated:
+            raise SessionConflictError(item.game_id)
+        self._write_history(conn, item)
+
+    def _write_history(self, conn: sqlite3.Connection, item: PendingSave) -> None:
+        if item.action_rows:
+            conn.executemany(INSERT_ACTION, item.action_rows)
+        if item.trace_rows:
+            conn.executemany("INSERT INTO traces (game_id, seq, entry_json) VALUES (?, ?, ?)", item.trace_rows)
+
+    def mark_saved(self, session: GameSession, pending: PendingSave) -> None:
+        """Hand the prepared replay entries over to storage: count them as stored and drop them from the session."""
+        session.stored_actions += len(pending.action_rows)
+        session.stored_diagnostics += len(pending.trace_rows)
+        del session.action_history[: len(pending.action_rows)]
+        del session.diagnostics[: len(pending.trace_rows)]
+        if pending.version is not None:
+            session.version = pending.version
+        if session.history_loader is None:
+            session.history_loader = partial(self._load_history, pending.game_id)
+
+    def _new_action_rows(self, session: GameSession) -> list[tuple[Any, ...]]:
+        game_id = session.state.game_id
+        return [
+            (
+                game_id,
+                session.stored_actions + offset,
+                entry["action"],
+                json.dumps(entry.get("payload", {}), ensure_ascii=False),
+                entry.get("rng_index"),
             )
+            for offset, entry in enumerate(session.action_history)
+        ]
+
+    def _load_history(self, game_id: str) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        with self._connection() as conn:
+            action_rows = conn.execute(
+                "SELECT action, payload_json, rng_index FROM actions WHERE game_id = ? ORDER BY seq", (game_id,)
+            ).fetchall()
+            trace_rows = conn.execute(
+                "SELECT entry_json FROM traces WHERE game_id = ? ORDER BY seq", (game_id,)
+            ).fetchall()
+
+        actions: list[dict[str, Any]] = []
+        for row in action_rows:
+            entry: dict[str, Any] = {"action": row["action"], "payload": json.loads(row["payload_json"])}
+            if row["rng_index"] is not None:
+                entry["rng_index"] = row["rng_index"]
+            actions.append(entry)
+        return actions, [json.loads(row["entry_json"]) for row in trace_rows]
+
+    def _discard_history(self, conn: sqlite3.Connection, game_id: str) -> None:
+        """Drop every row of an earlier game under ``game_id`` except its session row, whose version carries on."""
+        for table in self.tables:
+            if table != "sessions":
+                conn.execute(f"DELETE FROM {table} WHERE game_id = ?", (game_id,))
 
     def reset(self, game_id: str | None = None) -> None:
-        with self._connect() as conn:
-            if game_id is None:
-                conn.execute("DELETE FROM sessions")
+        with self._connection() as conn:
+            for table in self.tables:
+                if game_id is None:
+                    conn.execute(f"DELETE FROM {table}")
+                else:
+                    conn.execute(f"DELETE FROM {table} WHERE game_id = ?", (game_id,))
+
+    def claim_sole_access(self) -> None:
+        """Make this the only repository on the file until it closes, or raise ``RuntimeError``."""
+        if self._owner is None:
+            # A private database has no file another repository could open.
+            return
+        try:
+            self._owner.execute("BEGIN EXCLUSIVE")
+            self._owner.execute("COMMIT")
+        except sqlite3.OperationalError:
+            # The failed attempt may still hold a pending lock that would shut out everyone else.
+            self._owner.close()
+            self._join()
+            raise RuntimeError(f"{self.db_path} is shared with another repository") from None
+
+    def _join(self) -> None:
+        if self.db_path in PRIVATE_DATABASES:
+            return
+        # Exclusive locking mode keeps the first lock taken for the connection's lifetime.
+        owner = sqlite3.connect(f"{self.db_path}-owner", timeout=0, isolation_level=None, check_same_thread=False)
+        try:
+            owner.execute("PRAGMA locking_mode=EXCLUSIVE")
+            owner.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        except sqlite3.OperationalError:
+            owner.close()
+            raise RuntimeError(f"{self.db_path} is held by a write-behind session cache") from None
+        self._owner = owner
+
+    def close(self) -> None:
+        """Close idle connections now and checked-out ones as they come back; later calls raise."""
+        with self._lock:
+            self._closed = True
+            owner, self._owner = self._owner, None
+        if owner is not None:
+            owner.close()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
                 return
-            conn.execute("DELETE FROM sessions WHERE game_id = ?", (game_id,))
+            conn.close()
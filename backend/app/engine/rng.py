@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import pickle
+import random
+
+from app.models.zobrist import MASK64, mix
+
+COUNTER_TAG = "ctr1"
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+RNG_BACKENDS = ("mt", "counter")
+
+
+class CounterRandom(random.Random):
+    """Counter-based generator behind the ``random.Random`` surface.
+
+    Draw ``i`` is ``splitmix64(key + i * gamma)`` with the key derived from the
+    seed, so the whole state is ``(seed, counter)``: it serializes to a short
+    tagged string and ``jump(index)`` moves to any draw without generating the
+    ones before it. ``uniform``, ``choice`` and the other helpers come from
+    ``random.Random`` on top of ``random()`` and ``getrandbits()``.
+    """
+
+    def __init__(self, seed: int | str | None = None, counter: int = 0) -> None:
+        super().__init__(seed)
+        self.counter = counter
+
+    def seed(self, a: int | str | bytes | None = None, version: int = 2) -> None:
+        if a is None:
+            a = int.from_bytes(os.urandom(8), "little")
+        elif not isinstance(a, int):
+            raw = a if isinstance(a, bytes) else str(a).encode("utf-8")
+            a = int.from_bytes(hashlib.sha512(raw).digest()[:8], "little")
+        self.seed_value = a
+        self._key = mix(a & MASK64)
+        self.counter = 0
+        self.gauss_next = None
+
+    def _next64(self) -> int:
+        self.counter += 1
+        return mix((self._key + self.counter * GOLDEN_GAMMA) & MASK64)
+
+    def random(self) -> float:
+        return (self._next64() >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k: int) -> int:
+        if k < 0:
+            raise ValueError("number of bits must be non-negative")
+        if k <= 64:
+            return self._next64() >> (64 - k) if k else 0
+        words = (k + 63) // 64
+        value = 0
+        for _ in range(words):
+            value = (value << 64) | self._next64()
+        return value >> (words * 64 - k)
+
+    def jump(self, index: int) -> None:
+        """Position the generator so the next draw is draw number ``index + 1``."""
+        if index < 0:
+            raise ValueError("RNG index must be non-negative")
+        self.counter = index
+        self.gauss_next = None
+
+    def getstate(self) -> tuple[str, int, int]:
+        return (COUNTER_TAG, self.seed_value, self.counter)
+
+    def setstate(self, state: tuple[str, int, int]) -> None:
+        tag, seed, counter = state
+        if tag != COUNTER_TAG:
+            raise ValueError(f"Unsupported counter RNG state: {tag}")
+        self.seed(seed)
+        self.counter = counter
+
+    def serialize(self) -> str:
+        return f"{COUNTER_TAG}:{self.seed_value}:{self.counter}"
+
+
+def new_rng(seed: int, backend: str | None = None) -> random.Random:
+    """Generator for a new session; ``RNG_BACKEND=counter`` opts into CounterRandom."""
+    name = (backend or os.getenv("RNG_BACKEND", "mt")).strip().lower()
+    if name == "mt":
+        return random.Random(seed)
+    if name == "counter":
+        return CounterRandom(seed)
+    raise ValueError(f"Unsupported RNG backend: {name}")
+
+
+def serialize_rng(rng: random.Random) -> str:
+    if isinstance(rng, CounterRandom):
+        return rng.serialize()
+    payload = pickle.dumps(rng.getstate())
+    return base64.b64encode(payload).decode("ascii")
+
+
+def deserialize_rng(text: str) -> random.Random:
+    """Inverse of serialize_rng; untagged text is the legacy pickled Mersenne Twister state."""
+    if text.startswith(f"{COUNTER_TAG}:"):
+        _, seed, counter = text.split(":")
+        return CounterRandom(int(seed), int(counter))
+    rng = random.Random()
+    payload = base64.b64decode(text.encode("ascii"))
+    rng.setstate(pickle.loads(payload))
+    return rng
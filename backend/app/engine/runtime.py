@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import copy
-import logging
 import os
 import random
 import uuid
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from pathlib import Path
 from typing import Any
 
@@ -19,42 +20,82 @@ from app.engine.court import (
     settle_court_session,
     should_trigger_court,
 )
-from app.engine.conditions import evaluate_condition
-from app.engine.effects import add_log, apply_effects
-from app.engine.graph import EventGraph, load_graph
+from app.engine.effects import add_log
+from app.engine.graph import EventGraph, load_default_graph
+from app.engine.journal import ChangeJournal
+from app.engine.locks import GameLocks
 from app.engine.map_catalog import PLACE_ORDER
-from app.engine.repository import InMemoryRepository, StateRepository
+from app.engine.recorder import NullTraceRecorder, SessionTraceRecorder, TraceRecorder
+from app.engine.repository import GameSession, InMemoryRepository, StateRepository
+from app.engine.repository_cache import CachedRepository
+from app.engine.repository_events import EventSourcedRepository
 from app.engine.repository_sqlite import SQLiteRepository
+from app.engine.rng import new_rng
+from app.models import zobrist
 from app.models.court import CourtStrategy
 from app.models.event_graph import NodeType
 from app.models.state import EventView, GameState, OptionView, Outcome, Phase
 
-logger = logging.getLogger(__name__)
-
 
 class GameEngine:
-    def __init__(self, repository: StateRepository | None = None, graph: EventGraph | None = None) -> None:
+    def __init__(
+        self,
+        repository: StateRepository | None = None,
+        graph: EventGraph | None = None,
+        recorder: TraceRecorder | None = None,
+        locks: GameLocks | None = None,
+    ) -> None:
+        self.graph = graph if graph is not None else load_default_graph()
         self.repository = repository or self._build_repository_from_env()
-        if graph is not None:
-            self.graph = graph
-        else:
-            data_path = Path(__file__).resolve().parent.parent / "data" / "events.json"
-            self.graph = load_graph(data_path)
+        self.recorder = recorder or SessionTraceRecorder()
+        if locks is None and os.getenv("GAME_LOCKS", "1").strip().lower() in {"1", "true", "yes", "on"}:
+            locks = GameLocks()
+        if locks is None and isinstance(self.repository, CachedRepository):
+            raise ValueError("A session cache shares one live session per game and requires GAME_LOCKS")
+        self.locks = locks
+
+    @classmethod
+    def headless(cls, graph: EventGraph | None = None, recorder: TraceRecorder | None = None) -> GameEngine:
+        """Engine for bulk play via new_session/act_session; the repository is never touched.
+
+        Tracing is off unless a recorder is passed, since bulk runs never read it.
+        """
+        return cls(repository=InMemoryRepository(), graph=graph, recorder=recorder or NullTraceRecorder())
 
     def _build_repository_from_env(self) -> StateRepository:
         backend = os.getenv("REPOSITORY_BACKEND", "inmemory").strip().lower()
-        if backend == "sqlite":
+        if backend in {"sqlite", "sqlite_events"}:
             default_path = Path(__file__).resolve().parents[2] / "data" / "game_sessions.db"
             db_path = os.getenv("SQLITE_PATH", str(default_path))
-            return SQLiteRepository(db_path=db_path)
+            if backend == "sqlite_events":
+                repository: SQLiteRepository = EventSourcedRepository(db_path=db_path, graph=self.graph)
+            else:
+                repository = SQLiteRepository(db_path=db_path)
+            if os.getenv("SESSION_CACHE_MODE", "off").strip().lower() in {"", "off"}:
+                return repository
+            return CachedRepository(repository)
         return InMemoryRepository()
 
     def new_game(self, game_id: str | None = None, seed: int | None = None) -> GameState:
+        state = self._initial_state(game_id, seed)
+        with self._locked(state.game_id):
+            session = self.repository.create(state)
+            self._start_session(session)
+            self.repository.save(session)
+        return session.state
+
+    def new_session(self, game_id: str | None = None, seed: int | None = None) -> GameSession:
+        state = self._initial_state(game_id, seed)
+        session = GameSession(state=state, rng=new_rng(state.seed))
+        self._start_session(session)
+        return session
+
+    def _initial_state(self, game_id: str | None, seed: int | None) -> GameState:
         gid = game_id or str(uuid.uuid4())
         if seed is None:
             seed = random.SystemRandom().randint(1, 2_147_483_647)
 
-        initial = GameState(
+        return GameState(
             game_id=gid,
             chapter=1,
             turn=1,
@@ -86,7 +127,9 @@ class GameEngine:
             seed=seed,
             roll_count=0,
         )
-        session = self.repository.create(initial)
+
+    def _start_session(self, session: GameSession) -> None:
+        seed = session.state.seed
         self._record_action(session, "new_game", {"seed": seed})
         self._trace(
             session,
@@ -100,82 +143,125 @@ class GameEngine:
         self._maybe_start_court_on_phase_entry(session)
         self._resolve_checks(session)
         self._evaluate_outcome(session)
-        self.repository.save(session)
-        return session.state
 
     def get_state(self, game_id: str) -> GameState:
-        session = self._require_session(game_id)
-        if self._ensure_court_session(session):
-            self.repository.save(session)
+        with self._locked(game_id), self._discard_on_error(game_id):
+            session = self._require_session(game_id)
+            if self._ensure_court_session(session):
+                self.repository.save(session)
         return session.state
 
+    def snapshot_state(self, game_id: str) -> GameState:
+        """A deep copy of the game's state taken under its lock, so readers never see a half-applied action."""
+        with self._locked(game_id):
+            return self._require_session(game_id).state.model_copy(deep=True)
+
     def get_replay(self, game_id: str) -> dict[str, Any]:
         session = self._require_session(game_id)
+        actions, diagnostics = session.full_history()
         return {
             "game_id": session.state.game_id,
             "seed": session.state.seed,
-            "actions": copy.deepcopy(session.action_history),
-            "diagnostics": copy.deepcopy(session.diagnostics),
+            "actions": copy.deepcopy(actions),
+            "diagnostics": copy.deepcopy(diagnostics),
         }
 
     def reset(self, game_id: str | None = None) -> None:
         self.repository.reset(game_id)
 
+    def close(self) -> None:
+        self.repository.close()
+
     def act(self, game_id: str, action: str, payload: dict[str, Any] | None = None) -> GameState:
-        session = self._require_session(game_id)
-        state = session.state
+        with self._locked(game_id), self._discard_on_error(game_id):
+            session = self._require_session(game_id)
+
+            if self._ensure_court_session(session):
+                self.repository.save(session)
 
-        if self._ensure_court_session(session):
+            if session.state.outcome != Outcome.ONGOING:
+                return session.state
+
+            self._apply_action(session, action, payload)
             self.repository.save(session)
+        return session.state
 
-        if state.outcome != Outcome.ONGOING:
-            return state
+    def _locked(self, game_id: str) -> AbstractContextManager[None]:
+        """Serialize this process's requests for one game; a no-op when locking is off."""
+        return self.locks.hold(game_id) if self.locks is not None else nullcontext()
+
+    @contextmanager
+    def _discard_on_error(self, game_id: str) -> Iterator[None]:
+        """A failed request may have half-changed a cached session; drop it so the next one reloads storage."""
+        try:
+            yield
+        except Exception:
+            if isinstance(self.repository, CachedRepository):
+                self.repository.discard(game_id)
+            raise
 
+    def act_session(self, session: GameSession, action: str, payload: dict[str, Any] | None = None) -> GameState:
+        self._ensure_court_session(session)
+
+        if session.state.outcome != Outcome.ONGOING:
+            return session.state
+
+        self._apply_action(session, action, payload)
+        return session.state
+
+    def _apply_action(self, session: GameSession, action: str, payload: dict[str, Any] | None) -> None:
+        state = session.state
         payload = payload or {}
         action = self._normalize_action(action)
-        before = self._snapshot_state(state)
+        journal = ChangeJournal.begin(state) if self.recorder.enabled else None
+        recorded = len(session.action_history)
         self._record_action(session, action, payload)
         self._trace(session, level="info", event="action", action=action, payload=payload)
 
-        if action == "choose_option":
-            option_id = payload.get("option_id")
-            if not isinstance(option_id, str):
-                raise ValueError("choose_option requires payload.option_id")
-            if state.court.is_active:
-                self._court_strategy(session, self._legacy_option_to_strategy(option_id))
-            else:
-                self._choose_option(session, option_id)
-        elif action == "next_turn":
-            if state.court.is_active:
+        try:
+            if action == "choose_option":
+                option_id = payload.get("option_id")
+                if not isinstance(option_id, str):
+                    raise ValueError("choose_option requires payload.option_id")
+                if state.court.is_active:
+                    self._court_strategy(session, self._legacy_option_to_strategy(option_id))
+                else:
+                    self._choose_option(session, option_id)
+            elif action == "next_turn":
+                if state.court.is_active:
+                    self._court_fast_forward(session)
+                else:
+                    self._next_turn(session)
+            elif action == "court_strategy":
+                strategy_raw = payload.get("strategy")
+                if not isinstance(strategy_raw, str):
+                    raise ValueError("court_strategy requires payload.strategy")
+                self._court_strategy(session, strategy_raw)
+            elif action == "court_statement":
+                statement = payload.get("statement")
+                strategy_hint = payload.get("strategy_hint")
+                if not isinstance(statement, str) or not statement.strip():
+                    raise ValueError("court_statement requires payload.statement")
+                self._court_statement(session, statement.strip(), strategy_hint if isinstance(strategy_hint, str) else None)
+            elif action == "court_fast_forward":
                 self._court_fast_forward(session)
             else:
-                self._next_turn(session)
-        elif action == "court_strategy":
-            strategy_raw = payload.get("strategy")
-            if not isinstance(strategy_raw, str):
-                raise ValueError("court_strategy requires payload.strategy")
-            self._court_strategy(session, strategy_raw)
-        elif action == "court_statement":
-            statement = payload.get("statement")
-            strategy_hint = payload.get("strategy_hint")
-            if not isinstance(statement, str) or not statement.strip():
-                raise ValueError("court_statement requires payload.statement")
-            self._court_statement(session, statement.strip(), strategy_hint if isinstance(strategy_hint, str) else None)
-        elif action == "court_fast_forward":
-            self._court_fast_forward(session)
-        else:
-            raise ValueError(f"Unsupported action: {action}")
+                raise ValueError(f"Unsupported action: {action}")
 
-        self._evaluate_outcome(session)
-        self._trace_state_diff(session, action, before, state)
-        self.repository.save(session)
-        return state
+            self._evaluate_outcome(session)
+        except Exception:
+            # A rejected action is not part of the game; kept in the history it would fail again on replay.
+            del session.action_history[recorded:]
+            raise
+        finally:
+            changes = journal.finish() if journal is not None else None
+        if zobrist.VERIFY:
+            state.zobrist_hash()
+        if changes:
+            self._trace_state_diff(session, action, changes)
 
     def _record_action(self, session, action: str, payload: dict[str, Any]) -> None:
-        session.action_history.append({"action": action, "payload": copy.deepcopy(payload)})
-
-    def _snapshot_state(self, state: GameState) -> dict[str, Any]:
-        return state.model_dump(mode="python")
+        self.recorder.record_action(session, action, payload)
 
     def _trace(
         self,
@@ -192,6 +278,8 @@ class GameEngine:
         node_id: str | None = None,
         extra: dict[str, Any] | None = None,
     ) -> None:
+        if not self.recorder.enabled:
+            return
         state = session.state
         entry: dict[str, Any] = {
             "level": level,
@@ -209,27 +297,17 @@ class GameEngine:
         if extra:
             entry.update(extra)
 
-        session.diagnostics.append(entry)
+        self.recorder.record_trace(session, entry)
 
-        log_level = logging.INFO if level == "info" else logging.DEBUG
-        logger.log(log_level, "engine_trace", extra={"trace": entry})
-
-    def _trace_state_diff(self, session, action: str, before: dict[str, Any], state: GameState) -> None:
-        after = state.model_dump(mode="python")
-        diff: dict[str, dict[str, Any]] = {}
-        for key, old_value in before.items():
-            new_value = after.get(key)
-            if old_value != new_value:
-                diff[key] = {"before": old_value, "after": new_value}
-        if diff:
-            self._trace(
-                session,
-                level="debug",
-                event="state_diff",
-                action=action,
-                payload=None,
-                extra={"changes": diff},
-            )
+    def _trace_state_diff(self, session, action: str, changes: dict[str, dict[str, Any]]) -> None:
+        self._trace(
+            session,
+            level="debug",
+            event="state_diff",
+            action=action,
+            payload=None,
+            extra={"changes": changes},
+        )
 
     def _normalize_action(self, action: str) -> str:
         if action in {"recover_choice", "court_choice", "defense_choice"}:
@@ -390,10 +468,8 @@ class GameEngine:
         if node.node_type != NodeType.CHOICE:
             return changed
 
-        for option in node.options:
-            if not evaluate_condition(option.condition, state):
-                continue
-            apply_effects(state, option.effects)
+        for option in self.graph.enabled_options(node, state):
+            self.graph.apply_option_effects(node, option, state)
             self._transition(session, option.next)
             return True
 
@@ -456,10 +532,10 @@ class GameEngine:
         if option is None:
             raise ValueError("Unknown option id")
 
-        if not evaluate_condition(option.condition, state):
+        if not self.graph.option_enabled(node, option, state):
             raise ValueError("Option condition not satisfied")
 
-        apply_effects(state, option.effects)
+        self.graph.apply_option_effects(node, option, state)
         self._transition(session, option.next)
 
     def _transition(self, session, next_node_id: str, *, autostart_court: bool = True) -> None:
@@ -532,7 +608,7 @@ class GameEngine:
                     OptionView(
                         id=opt.id,
                         label=opt.label,
-                        disabled=not evaluate_condition(opt.condition, state),
+                        disabled=not self.graph.option_enabled(node, opt, state),
                     )
                 )
 
@@ -551,6 +627,7 @@ class GameEngine:
             if check_key:
                 success, roll, probability = roll_check(check_key, state, session.rng)
                 add_log(state, f"检定[{check_key}]：{roll:.2f} / {probability:.2f}。")
+                self.recorder.record_check(session, check_key, success)
             else:
                 success = True
 
@@ -568,11 +645,11 @@ class GameEngine:
             )
 
             if success:
-                apply_effects(state, node.success_effects)
+                self.graph.apply_check_effects(node, True, state)
                 state.court.momentum = min(4, state.court.momentum + 1)
                 next_node = node.success_next
             else:
-                apply_effects(state, node.fail_effects)
+                self.graph.apply_check_effects(node, False, state)
                 state.court.momentum = max(-4, state.court.momentum - 1)
                 next_node = node.fail_next
 
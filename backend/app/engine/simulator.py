@@ -1,13 +1,33 @@
 ﻿from __future__ import annotations
 
+import csv
+import json
+import math
 import random
-from dataclasses import dataclass
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Any, TextIO
 
 from app.engine import balance
-from app.engine.conditions import evaluate_condition
+from app.engine.policy import DEFAULT_POLICY, Policy
+from app.engine.recorder import CheckTallyRecorder
+from app.engine.repository import GameSession
 from app.engine.runtime import GameEngine
 from app.models.event_graph import NodeType
-from app.models.state import Outcome
+from app.models.state import GameState, Outcome
+
+
+DOOM_CHAIN_NODE = "doom_total_offensive"
+DOOM_CHAIN_NODES = {DOOM_CHAIN_NODE, "doom_defense_check"}
+
+TERMINATION_WIN = "win"
+TERMINATION_CORE_LOST = "core_lost"
+TERMINATION_POST_ZHUGE = "post_zhuge_collapse"
+TERMINATION_DOOM_CHAIN = "doom_chain"
+TERMINATION_OTHER_DEFEAT = "defeat_other"
+TERMINATION_TURN_CAP = "turn_cap"
 
 
 @dataclass
@@ -17,6 +37,48 @@ class SimulationSummary:
     defeats: int
     stuck_runs: int
     avg_turns: float
+    total_turns: int = 0
+    # termination class -> run count, and termination class -> {last ongoing node -> run count}
+    terminations: dict[str, int] = field(default_factory=dict)
+    last_nodes: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def add_run(self, state: GameState, last_node: str) -> None:
+        self.runs += 1
+        self.total_turns += state.turn
+        self.avg_turns = self.total_turns / self.runs
+        if state.outcome == Outcome.WIN:
+            self.wins += 1
+        elif state.outcome == Outcome.DEFEAT_SHU:
+            self.defeats += 1
+        else:
+            self.stuck_runs += 1
+        self.record(classify_termination(state, last_node), last_node)
+
+    def record(self, termination: str, last_node: str) -> None:
+        self.terminations[termination] = self.terminations.get(termination, 0) + 1
+        nodes = self.last_nodes.setdefault(termination, {})
+        nodes[last_node] = nodes.get(last_node, 0) + 1
+
+    @classmethod
+    def merge(cls, parts: list[SimulationSummary]) -> SimulationSummary:
+        runs = sum(part.runs for part in parts)
+        total_turns = sum(part.total_turns for part in parts)
+        merged = cls(
+            runs=runs,
+            wins=sum(part.wins for part in parts),
+            defeats=sum(part.defeats for part in parts),
+            stuck_runs=sum(part.stuck_runs for part in parts),
+            avg_turns=total_turns / runs if runs else 0.0,
+            total_turns=total_turns,
+        )
+        for part in parts:
+            for termination, count in part.terminations.items():
+                merged.terminations[termination] = merged.terminations.get(termination, 0) + count
+            for termination, nodes in part.last_nodes.items():
+                merged_nodes = merged.last_nodes.setdefault(termination, {})
+                for node_id, count in nodes.items():
+                    merged_nodes[node_id] = merged_nodes.get(node_id, 0) + count
+        return merged
 
     @property
     def win_rate(self) -> float:
@@ -27,128 +89,350 @@ class SimulationSummary:
         return self.defeats / self.runs if self.runs else 0.0
 
 
-def simulate(n: int = 2000, seed: int = 42) -> SimulationSummary:
-    wins = 0
-    defeats = 0
-    stuck = 0
-    total_turns = 0
+@dataclass
+class RunRecord:
+    index: int
+    seed: int
+    outcome: str
+    turns: int
+    terminal_node: str
+    court_sessions: int
+    peak_doom: int
+    checks: list[tuple[str, bool]] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "index": self.index,
+            "seed": self.seed,
+            "outcome": self.outcome,
+            "turns": self.turns,
+            "terminal_node": self.terminal_node,
+            "court_sessions": self.court_sessions,
+            "peak_doom": self.peak_doom,
+            "checks": [[check_key, success] for check_key, success in self.checks],
+        }
 
-    for i in range(n):
-        engine = GameEngine()
-        game_seed = seed + i
-        state = engine.new_game(game_id=f"sim-{i}", seed=game_seed)
-        policy_rng = random.Random(seed * 1000 + i)
 
-        steps = 0
-        while state.outcome == Outcome.ONGOING and steps < balance.MAX_TURNS_PER_RUN:
-            if state.court.is_active:
-                strategy = _pick_court_strategy(state, policy_rng)
-                statement = _statement_for_strategy(strategy)
-                state = engine.act(
-                    state.game_id,
-                    "court_statement",
-                    {"statement": statement, "strategy_hint": strategy},
-                )
-                steps += 1
-                continue
-
-            node = engine.graph.get(state.current_node_id)
-            if node.node_type == NodeType.CHOICE:
-                enabled = [opt for opt in node.options if evaluate_condition(opt.condition, state)]
-                if enabled and policy_rng.random() < 0.95:
-                    chosen = _weighted_choice(enabled, policy_rng)
-                    state = engine.act(state.game_id, "choose_option", {"option_id": chosen.id})
-                else:
-                    state = engine.act(state.game_id, "next_turn", {})
-            else:
-                state = engine.act(state.game_id, "next_turn", {})
-            steps += 1
+RUN_RECORD_CSV_FIELDS = (
+    "index",
+    "seed",
+    "outcome",
+    "turns",
+    "terminal_node",
+    "court_sessions",
+    "peak_doom",
+    "checks",
+)
+
+
+@dataclass
+class AdaptiveSummary:
+    summary: SimulationSummary
+    win_rate_low: float
+    win_rate_high: float
+    stop_reason: str
+
+    @property
+    def runs(self) -> int:
+        return self.summary.runs
+
+
+def simulate(n: int = 2000, seed: int = 42, workers: int | None = None) -> SimulationSummary:
+    return _simulate_span(seed, 0, n, workers)
+
+
+def simulate_adaptive(
+    seed: int = 42,
+    *,
+    width: float = 0.02,
+    band: tuple[float, float] | None = None,
+    confidence: float = 0.95,
+    method: str = "wilson",
+    batch: int = 250,
+    max_runs: int = 20_000,
+    workers: int | None = None,
+) -> AdaptiveSummary:
+    """Play batches until the win-rate interval is narrow enough or decides the band.
+
+    Runs are the same seed sequence as simulate(), so the result after N runs
+    equals simulate(n=N, seed=seed). Stop reasons: ``converged`` (interval no
+    wider than ``width``), ``inside_band``/``below_band``/``above_band`` (the
+    interval lies wholly inside or outside ``band``) and ``max_runs``.
+    """
+    if method not in INTERVAL_METHODS:
+        raise ValueError(f"Unknown interval method: {method}")
+    if batch <= 0 or max_runs <= 0:
+        raise ValueError("batch and max_runs must be positive")
+
+    interval = INTERVAL_METHODS[method]
+    parts: list[SimulationSummary] = []
+    runs = 0
+    while True:
+        stop = min(max_runs, runs + batch)
+        parts.append(_simulate_span(seed, runs, stop, workers))
+        runs = stop
+        summary = SimulationSummary.merge(parts)
+        low, high = interval(summary.wins, summary.runs, confidence)
+
+        reason = None
+        if band is not None and high < band[0]:
+            reason = "below_band"
+        elif band is not None and low > band[1]:
+            reason = "above_band"
+        elif band is not None and band[0] <= low and high <= band[1]:
+            reason = "inside_band"
+        elif high - low <= width:
+            reason = "converged"
+        elif runs >= max_runs:
+            reason = "max_runs"
+
+        if reason is not None:
+            return AdaptiveSummary(summary=summary, win_rate_low=low, win_rate_high=high, stop_reason=reason)
+
+
+def wilson_interval(successes: int, trials: int, confidence: float = 0.95) -> tuple[float, float]:
+    if trials <= 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rate = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (rate + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def clopper_pearson_interval(successes: int, trials: int, confidence: float = 0.95) -> tuple[float, float]:
+    """Exact binomial interval, found by bisection on the binomial CDF (no scipy dependency)."""
+    if trials <= 0:
+        return 0.0, 1.0
+    tail = (1 - confidence) / 2
+    low = 0.0 if successes == 0 else _bisect(lambda p: 1 - _binomial_cdf(successes - 1, trials, p) - tail)
+    high = 1.0 if successes == trials else _bisect(lambda p: tail - _binomial_cdf(successes, trials, p))
+    return low, high
+
+
+INTERVAL_METHODS: dict[str, Callable[[int, int, float], tuple[float, float]]] = {
+    "wilson": wilson_interval,
+    "clopper_pearson": clopper_pearson_interval,
+}
+
+
+def _binomial_cdf(k: int, n: int, p: float) -> float:
+    if p <= 0.0:
+        return 1.0
+    if p >= 1.0:
+        return 1.0 if k >= n else 0.0
+    log_p = math.log(p)
+    log_q = math.log1p(-p)
+    log_n = math.lgamma(n + 1)
+    return min(
+        1.0,
+        sum(
+            math.exp(log_n - math.lgamma(i + 1) - math.lgamma(n - i + 1) + i * log_p + (n - i) * log_q)
+            for i in range(k + 1)
+        ),
+    )
 
+
+def _bisect(increasing: Callable[[float], float], iterations: int = 60) -> float:
+    low, high = 0.0, 1.0
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        if increasing(middle) < 0:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def _simulate_span(seed: int, start: int, stop: int, workers: int | None) -> SimulationSummary:
+    n = stop - start
+    if workers is None or workers <= 1 or n <= 1:
+        return simulate_range(seed, start, stop)
+
+    shards = [(start + low, start + high) for low, high in shard_ranges(n, workers)]
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        futures = [pool.submit(simulate_range, seed, low, high) for low, high in shards]
+        partials = [future.result() for future in futures]
+    return SimulationSummary.merge(partials)
+
+
+def shard_ranges(n: int, workers: int) -> list[tuple[int, int]]:
+    """Split run indices ``0..n`` into at most ``workers`` contiguous, near-equal ``(start, stop)`` ranges."""
+    shard_count = max(1, min(workers, n))
+    size, extra = divmod(n, shard_count)
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    for index in range(shard_count):
+        stop = start + size + (1 if index < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def classify_termination(state: GameState, last_node: str | None = None) -> str:
+    """Why a finished (or abandoned) run ended.
+
+    Defeats are attributed to the most specific cause: losing the core
+    territory, then the doom chain, then collapsing after Zhuge Liang's death.
+    The doom chain is checked before the post-Zhuge era because late games
+    usually end through it. Its flag is cleared on the way to DEFEAT_SHU, so
+    the node the run was on before it ended counts as evidence too.
+    """
+    if state.outcome == Outcome.WIN:
+        return TERMINATION_WIN
+    if state.outcome == Outcome.ONGOING:
+        return TERMINATION_TURN_CAP
+    if state.flags.get("core_lost", False):
+        return TERMINATION_CORE_LOST
+    if state.flags.get("doom_chain_active", False) or last_node in DOOM_CHAIN_NODES:
+        return TERMINATION_DOOM_CHAIN
+    if state.flags.get("post_zhuge_era", False):
+        return TERMINATION_POST_ZHUGE
+    return TERMINATION_OTHER_DEFEAT
+
+
+def simulate_range(seed: int, start: int, stop: int, policy: Policy = DEFAULT_POLICY) -> SimulationSummary:
+    """Play runs ``start..stop`` of a ``seed`` batch in this process.
+
+    Run i is seeded exactly as in ``simulate``, so summaries of disjoint
+    ranges merge into the summary of the whole batch.
+    """
+    summary = SimulationSummary(runs=0, wins=0, defeats=0, stuck_runs=0, avg_turns=0.0)
+    engine = GameEngine.headless()
+    for i in range(start, stop):
+        state, last_node = play_tracked(engine, seed, i, policy)
+        summary.add_run(state, last_node)
+    return summary
+
+
+def play_tracked(engine: GameEngine, seed: int, i: int, policy: Policy = DEFAULT_POLICY) -> tuple[GameState, str]:
+    """Play run ``i`` of a ``seed`` batch and also return the last node it occupied while still ongoing."""
+    last_node = ""
+
+    def track_last_node(state: GameState) -> None:
+        nonlocal last_node
         if state.outcome == Outcome.ONGOING:
-            for _ in range(balance.MAX_TURNS_PER_RUN):
-                if state.court.is_active:
-                    strategy = _pick_court_strategy(state, policy_rng)
-                    statement = _statement_for_strategy(strategy)
-                    state = engine.act(
-                        state.game_id,
-                        "court_statement",
-                        {"statement": statement, "strategy_hint": strategy},
-                    )
-                else:
-                    state = engine.act(state.game_id, "next_turn", {})
-                if state.outcome != Outcome.ONGOING:
-                    break
-
-        total_turns += state.turn
+            last_node = state.current_node_id
 
-        if state.outcome == Outcome.WIN:
-            wins += 1
-        elif state.outcome == Outcome.DEFEAT_SHU:
-            defeats += 1
+    state = play_one(engine, seed, i, on_action=track_last_node, policy=policy)
+    return state, last_node
+
+
+def iter_runs(n: int = 2000, seed: int = 42, start: int = 0) -> Iterator[RunRecord]:
+    """Yield one RunRecord per game as it finishes; run i uses the same seeds as simulate()."""
+    recorder = CheckTallyRecorder()
+    engine = GameEngine.headless(recorder=recorder)
+    for i in range(start, start + n):
+        recorder.checks = []
+        peak_doom = balance.INITIAL_DOOM
+
+        def track_doom(state: GameState) -> None:
+            nonlocal peak_doom
+            peak_doom = max(peak_doom, state.doom)
+
+        state = play_one(engine, seed, i, on_action=track_doom)
+        yield RunRecord(
+            index=i,
+            seed=seed + i,
+            outcome=state.outcome.value,
+            turns=state.turn,
+            terminal_node=state.current_node_id,
+            court_sessions=state.court.session_id,
+            peak_doom=peak_doom,
+            checks=recorder.checks,
+        )
+
+
+def write_jsonl(records: Iterable[RunRecord], fp: TextIO) -> int:
+    count = 0
+    for record in records:
+        fp.write(json.dumps(record.to_dict(), ensure_ascii=False, separators=(",", ":")))
+        fp.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(records: Iterable[RunRecord], fp: TextIO) -> int:
+    writer = csv.DictWriter(fp, fieldnames=RUN_RECORD_CSV_FIELDS)
+    writer.writeheader()
+    count = 0
+    for record in records:
+        row = record.to_dict()
+        row["checks"] = "|".join(f"{check_key}:{int(success)}" for check_key, success in record.checks)
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def play_one(
+    engine: GameEngine,
+    seed: int,
+    i: int,
+    on_action: Callable[[GameState], None] | None = None,
+    policy: Policy = DEFAULT_POLICY,
+) -> GameState:
+    """Play run ``i`` of a ``seed`` batch in a new session on ``engine``; ``on_action`` sees every state."""
+    game_seed = seed + i
+    session = engine.new_session(game_id=f"sim-{i}", seed=game_seed)
+    if on_action is not None:
+        on_action(session.state)
+    return play_session(engine, session, random.Random(seed * 1000 + i), on_action=on_action, policy=policy)
+
+
+def play_session(
+    engine: GameEngine,
+    session: GameSession,
+    policy_rng: random.Random,
+    on_action: Callable[[GameState], None] | None = None,
+    policy: Policy = DEFAULT_POLICY,
+) -> GameState:
+    """Drive an existing session to the end with ``policy``; mutates the session."""
+    state = session.state
+    steps = 0
+    while state.outcome == Outcome.ONGOING and steps < balance.MAX_TURNS_PER_RUN:
+        if state.court.is_active:
+            strategy = policy.court_strategy(state, policy_rng)
+            statement = policy.court_statement(strategy)
+            state = engine.act_session(
+                session,
+                "court_statement",
+                {"statement": statement, "strategy_hint": strategy},
+            )
+            if on_action is not None:
+                on_action(state)
+            steps += 1
+            continue
+
+        node = engine.graph.get(state.current_node_id)
+        if node.node_type == NodeType.CHOICE:
+            enabled = engine.graph.enabled_options(node, state)
+            chosen = policy.choose_option(state, enabled, policy_rng) if enabled else None
+            if chosen is not None:
+                state = engine.act_session(session, "choose_option", {"option_id": chosen.id})
+            else:
+                state = engine.act_session(session, "next_turn", {})
         else:
-            defeats += 1
-
-    return SimulationSummary(
-        runs=n,
-        wins=wins,
-        defeats=defeats,
-        stuck_runs=stuck,
-        avg_turns=total_turns / n if n else 0.0,
-    )
+            state = engine.act_session(session, "next_turn", {})
+        if on_action is not None:
+            on_action(state)
+        steps += 1
 
+    if state.outcome == Outcome.ONGOING:
+        for _ in range(balance.MAX_TURNS_PER_RUN):
+            if state.court.is_active:
+                strategy = policy.court_strategy(state, policy_rng)
+                statement = policy.court_statement(strategy)
+                state = engine.act_session(
+                    session,
+                    "court_statement",
+                    {"statement": statement, "strategy_hint": strategy},
+                )
+            else:
+                state = engine.act_session(session, "next_turn", {})
+            if on_action is not None:
+                on_action(state)
+            if state.outcome != Outcome.ONGOING:
+                break
 
-def _weighted_choice(options, rng: random.Random):
-    danger_ids = {"field_battle", "cede_outskirts", "postpone_attack", "fallback_defense", "reorganize", "pull_back"}
-    progress_ids = {
-        "advance_ch3",
-        "launch_final",
-        "steady_siege",
-        "hold_one_turn",
-        "claim_victory",
-        "continue_hold",
-        "enter_ch4",
-        "enter_ch2",
-    }
-    rebuild_ids = {"recover_food", "recover_morale", "appease_court", "stabilize_front"}
-
-    weighted: list[tuple[float, object]] = []
-    total = 0.0
-    for opt in options:
-        weight = 1.0
-        if opt.id in danger_ids:
-            weight = 0.2
-        elif opt.id in progress_ids:
-            weight = 2.2
-        elif opt.id in rebuild_ids:
-            weight = 1.3
-        weighted.append((weight, opt))
-        total += weight
-
-    ticket = rng.uniform(0, total)
-    cursor = 0.0
-    for weight, opt in weighted:
-        cursor += weight
-        if ticket <= cursor:
-            return opt
-    return weighted[-1][1]
-
-
-def _pick_court_strategy(state, rng: random.Random) -> str:  # noqa: ANN001
-    tags = set(state.court.current_issue_tags)
-    if state.court.support < 40 and ("morale" in tags or "momentum" in tags):
-        return "emotional_mobilization"
-    if "supply" in tags or "risk" in tags or "stability" in tags:
-        return "rational_argument"
-    if state.court.time_pressure <= 1 and state.court.support < 60:
-        return "authority_pressure"
-    if state.court.temperature < 20 and rng.random() < 0.4:
-        return "emotional_mobilization"
-    return "rational_argument"
-
-
-def _statement_for_strategy(strategy: str) -> str:
-    if strategy == "authority_pressure":
-        return "请陛下立军令，先统一指挥链与问责。"
-    if strategy == "emotional_mobilization":
-        return "将士士气可用，请以民心与军心支持前线再进。"
-    return "我给出粮草与里程证据，按可行性推进北伐。"
+    return state
@@ -0,0 +1,480 @@
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, NamedTuple
+
+from app.engine import balance
+from app.engine.checks import probability_for_check
+from app.engine.court import (
+    COURT_TRIGGER_INTERVAL,
+    begin_court_session,
+    resolve_court_strategy,
+    should_trigger_court,
+)
+from app.engine.effects import apply_effects
+from app.engine.graph import EventGraph
+from app.engine.recorder import NullTraceRecorder
+from app.engine.repository import GameSession
+from app.engine.runtime import GameEngine
+from app.engine.policy import option_weight, pick_court_strategy, statement_for_strategy
+from app.models.court import CourtBattleModifier, CourtState, CourtStrategy
+from app.models.event_graph import NodeType
+from app.models.state import EventView, GameState, Outcome, Phase
+
+CHOOSE_PROBABILITY = 0.95
+# Any turn past the first with room for turns_since_court below it.
+LATER_TURN = COURT_TRIGGER_INTERVAL + 2
+
+
+class SolverState(NamedTuple):
+    """Everything that influences the game's future under the simulator policy.
+
+    Absolute turn numbers are folded into ``first_turn`` and ``turns_since_court``
+    (capped at the court cadence), which is all the rules read.
+    """
+
+    node: str
+    chapter: int
+    phase: Phase
+    outcome: Outcome
+    food: int
+    morale: int
+    politics: int
+    wei_pressure: int
+    health: int
+    doom: int
+    longyou_turns: int
+    guanzhong_turns: int
+    longyou_collapsed: bool
+    post_zhuge: bool
+    doom_chain: bool
+    core_lost: bool
+    momentum: int
+    first_turn: bool
+    turns_since_court: int
+    court_pending: bool
+    court_return_phase: str
+    modifier_id: str | None
+    modifier_turns: int
+
+
+@dataclass(frozen=True)
+class CourtOutcome:
+    """One branch of a court session: the edict it ends with and its net food/morale/politics change."""
+
+    probability: float
+    modifier: CourtBattleModifier
+    delta: dict[str, int]
+
+
+class CourtModel:
+    """Discrete stand-in for a court session.
+
+    A real session draws continuous noise and carries NPC memory, so it has no
+    finite outcome set. Outcomes are sampled once per coarse stat bucket by
+    playing real sessions through the court module with the simulator's court
+    policy, then grouped by the edict they produce with rounded mean stat deltas.
+    """
+
+    def __init__(self, samples: int = 48, seed: int = 7) -> None:
+        self.samples = samples
+        self.seed = seed
+        self._cache: dict[tuple[int, ...], list[CourtOutcome]] = {}
+
+    def outcomes(self, state: GameState) -> list[CourtOutcome]:
+        bucket = (
+            int(state.food < 65),
+            int(state.morale > 72),
+            state.court.momentum,
+            state.politics // 10,
+            state.morale // 10,
+            state.wei_pressure,
+        )
+        cached = self._cache.get(bucket)
+        if cached is None:
+            cached = self._sample(state, bucket)
+            self._cache[bucket] = cached
+        return cached
+
+    def _sample(self, state: GameState, bucket: tuple[int, ...]) -> list[CourtOutcome]:
+        rng = random.Random(hash((self.seed, bucket)))
+        tallies: dict[str, tuple[CourtBattleModifier, int, dict[str, int]]] = {}
+        for _ in range(self.samples):
+            trial = state.model_copy(deep=True)
+            trial.court = CourtState(momentum=state.court.momentum)
+            trial.phase = Phase(state.court.return_phase) if state.phase == Phase.COURT else state.phase
+            before = {key: getattr(trial, key) for key in ("food", "morale", "politics")}
+            begin_court_session(trial, rng)
+            while trial.court.is_active:
+                strategy = pick_court_strategy(trial, rng)
+                resolve_court_strategy(trial, CourtStrategy(strategy), rng, statement=statement_for_strategy(strategy))
+
+            modifier = trial.court.active_modifier
+            if modifier is None:
+                continue
+            modifier_seen, count, totals = tallies.get(modifier.id, (modifier, 0, {key: 0 for key in before}))
+            for key, value in before.items():
+                totals[key] += getattr(trial, key) - value
+            tallies[modifier.id] = (modifier_seen, count + 1, totals)
+
+        outcomes: list[CourtOutcome] = []
+        for modifier, count, totals in tallies.values():
+            delta = {key: int(round(total / count)) for key, total in totals.items()}
+            outcomes.append(CourtOutcome(probability=count / self.samples, modifier=modifier, delta=delta))
+        return outcomes
+
+
+@dataclass
+class SolveReport:
+    """``unresolved_probability`` bounds the error; ``expected_turns`` is over resolved games."""
+
+    win_probability: float
+    defeat_probability: float
+    unresolved_probability: float
+    expected_turns: float
+    states: int
+    peak_frontier: int
+    steps: int
+    solve_seconds: float
+
+    @property
+    def win_bounds(self) -> tuple[float, float]:
+        """The true win rate lies in this range, since every unresolved run may still be won."""
+        return self.win_probability, self.win_probability + self.unresolved_probability
+
+    @property
+    def conclusive(self) -> bool:
+        """False when more mass is unresolved than won, so ``win_probability`` is only a lower bound."""
+        return self.unresolved_probability <= self.win_probability
+
+
+class _NeedsBranch(Exception):
+    pass
+
+
+class _ScriptedRandom:
+    """Replays a fixed success/failure script for check rolls and tracks its probability."""
+
+    def __init__(self, script: tuple[bool, ...], state: GameState, graph: EventGraph) -> None:
+        self.script = script
+        self.state = state
+        self.graph = graph
+        self.position = 0
+        self.probability = 1.0
+
+    def random(self) -> float:
+        if self.position >= len(self.script):
+            raise _NeedsBranch
+        success = self.script[self.position]
+        self.position += 1
+        node = self.graph.get(self.state.current_node_id)
+        chance = probability_for_check(node.check or "", self.state)
+        self.probability *= chance if success else 1.0 - chance
+        return 0.0 if success else 1.0
+
+
+class _SolverEngine(GameEngine):
+    """GameEngine whose court sessions are left pending for the court model to resolve."""
+
+    def _next_turn(self, session) -> None:
+        state = session.state
+        if should_trigger_court(state):
+            state.court.is_active = True
+            state.court.return_phase = state.phase.value
+            state.phase = Phase.COURT
+            return
+        self._advance_battle_turn(session)
+
+    def _maybe_start_court_on_phase_entry(self, session) -> None:
+        state = session.state
+        if state.phase == Phase.COURT and not state.court.is_active and state.current_node_id == "court_hub":
+            state.court.is_active = True
+            state.court.return_phase = Phase.FINAL.value if state.chapter >= 5 else Phase.CAMPAIGN.value
+
+
+class ExactSolver:
+    """Outcome probabilities for the simulator policy by propagating probability mass over game states.
+
+    Check rolls are enumerated exactly through the real engine with a scripted
+    RNG; policy choices use the simulator's option weights; court sessions are
+    chance nodes drawn from ``court_model``. Each step moves the whole frontier
+    forward one action. Identical states reached by different paths are merged
+    (transposition table) and each state's transitions are memoized.
+
+    The reachable state space of the full game runs past a million states, so
+    the walk is bounded: mass below ``prune_below``, mass beyond the
+    ``max_frontier`` most likely states, and mass still ongoing after
+    ``max_steps`` is reported as ``unresolved_probability`` rather than guessed.
+    ``resolution`` > 1 lumps food/morale/politics onto a coarser grid, trading
+    exactness for coverage. On the default graph the bounded walk leaves far
+    more mass unresolved than it resolves as wins, so check
+    ``SolveReport.conclusive`` before reading ``win_probability`` as a rate.
+    """
+
+    def __init__(
+        self,
+        graph: EventGraph | None = None,
+        court_model: CourtModel | None = None,
+        *,
+        prune_below: float = 1e-9,
+        max_steps: int = balance.MAX_TURNS_PER_RUN,
+        max_states: int = 1_000_000,
+        max_frontier: int | None = 20_000,
+        resolution: int = 1,
+    ) -> None:
+        self.engine = _SolverEngine(graph=graph, recorder=NullTraceRecorder())
+        self.graph = self.engine.graph
+        self.court_model = court_model or CourtModel()
+        self.prune_below = prune_below
+        self.max_steps = max_steps
+        self.max_states = max_states
+        self.max_frontier = max_frontier
+        self.resolution = resolution
+        self._modifiers: dict[str, CourtBattleModifier] = {}
+        self._memo: dict[SolverState, list[tuple[float, SolverState, int]]] = {}
+        self._court_template = CourtState(npcs={})
+        self._state_template = self.engine._initial_state("solver", 0).model_copy(
+            update={"current_event": EventView(text="", options=[]), "court": self._court_template}
+        )
+
+    def solve(self) -> SolveReport:
+        started = time.perf_counter()
+        initial = self.engine._initial_state("solver", 1)
+
+        # frontier maps state -> (probability, probability-weighted turn count)
+        frontier: dict[SolverState, tuple[float, float]] = {}
+        for probability, key, turns in self._expand_action(self._key(initial), self._start):
+            self._accumulate(frontier, key, probability, probability * (initial.turn + turns))
+
+        win = defeat = pruned = weighted_turns = 0.0
+        peak_frontier = len(frontier)
+        steps = 0
+        while frontier and steps < self.max_steps:
+            steps += 1
+            following: dict[SolverState, tuple[float, float]] = {}
+            for key, (mass, mass_turns) in frontier.items():
+                if key.outcome != Outcome.ONGOING:
+                    weighted_turns += mass_turns
+                    if key.outcome == Outcome.WIN:
+                        win += mass
+                    else:
+                        defeat += mass
+                    continue
+                if mass < self.prune_below:
+                    pruned += mass
+                    continue
+                for probability, next_key, turns in self._transitions(key):
+                    self._accumulate(
+                        following,
+                        next_key,
+                        mass * probability,
+                        probability * (mass_turns + mass * turns),
+                    )
+            if self.max_frontier is not None and len(following) > self.max_frontier:
+                ranked = sorted(following.items(), key=lambda item: item[1][0], reverse=True)
+                pruned += sum(mass for _, (mass, _) in ranked[self.max_frontier :])
+                following = dict(ranked[: self.max_frontier])
+            frontier = following
+            peak_frontier = max(peak_frontier, len(frontier))
+
+        resolved = win + defeat
+        return SolveReport(
+            win_probability=win,
+            defeat_probability=defeat,
+            unresolved_probability=pruned + sum(mass for mass, _ in frontier.values()),
+            expected_turns=weighted_turns / resolved if resolved else 0.0,
+            states=len(self._memo),
+            peak_frontier=peak_frontier,
+            steps=steps,
+            solve_seconds=time.perf_counter() - started,
+        )
+
+    @staticmethod
+    def _accumulate(
+        frontier: dict[SolverState, tuple[float, float]],
+        key: SolverState,
+        mass: float,
+        mass_turns: float,
+    ) -> None:
+        current = frontier.get(key)
+        if current is not None:
+            mass += current[0]
+            mass_turns += current[1]
+        frontier[key] = (mass, mass_turns)
+
+    def _transitions(self, key: SolverState) -> list[tuple[float, SolverState, int]]:
+        cached = self._memo.get(key)
+        if cached is None:
+            if len(self._memo) >= self.max_states:
+                raise RuntimeError(f"State space exceeds max_states={self.max_states}")
+            cached = self._court_transitions(key) if key.court_pending else self._policy_transitions(key)
+            self._memo[key] = cached
+        return cached
+
+    def _policy_transitions(self, key: SolverState) -> list[tuple[float, SolverState, int]]:
+        node = self.graph.get(key.node)
+        enabled = []
+        if node.node_type == NodeType.CHOICE:
+            probe = self._materialize(key)
+            enabled = self.graph.enabled_options(node, probe)
+        if not enabled:
+            return self._expand_action(key, self._next_turn)
+
+        total = sum(option_weight(option.id) for option in enabled)
+        results = [
+            (probability * (1.0 - CHOOSE_PROBABILITY), next_key, turns)
+            for probability, next_key, turns in self._expand_action(key, self._next_turn)
+        ]
+        for option in enabled:
+            share = CHOOSE_PROBABILITY * option_weight(option.id) / total
+            results.extend(
+                (probability * share, next_key, turns)
+                for probability, next_key, turns in self._expand_action(key, self._choose(option.id))
+            )
+        return results
+
+    def _court_transitions(self, key: SolverState) -> list[tuple[float, SolverState, int]]:
+        probe = self._materialize(key)
+        results: list[tuple[float, SolverState, int]] = []
+        for outcome in self.court_model.outcomes(probe):
+            self._modifiers.setdefault(outcome.modifier.id, outcome.modifier)
+            results.extend(
+                (probability * outcome.probability, next_key, turns)
+                for probability, next_key, turns in self._expand_action(key, self._settle(outcome))
+            )
+        return results
+
+    def _expand_action(
+        self,
+        key: SolverState,
+        action: Callable[[GameSession], None],
+    ) -> list[tuple[float, SolverState, int]]:
+        results: list[tuple[float, SolverState, int]] = []
+        scripts: list[tuple[bool, ...]] = [()]
+        while scripts:
+            script = scripts.pop()
+            state = self._materialize(key)
+            rng = _ScriptedRandom(script, state, self.graph)
+            session = GameSession(state=state, rng=rng)  # type: ignore[arg-type]
+            turn = state.turn
+            try:
+                action(session)
+            except _NeedsBranch:
+                scripts.append(script + (True,))
+                scripts.append(script + (False,))
+                continue
+            results.append((rng.probability, self._key(state), state.turn - turn))
+        return results
+
+    def _start(self, session: GameSession) -> None:
+        self.engine._start_session(session)
+
+    def _next_turn(self, session: GameSession) -> None:
+        self.engine._next_turn(session)
+        self.engine._evaluate_outcome(session)
+
+    def _choose(self, option_id: str) -> Callable[[GameSession], None]:
+        def action(session: GameSession) -> None:
+            self.engine._choose_option(session, option_id)
+            self.engine._evaluate_outcome(session)
+
+        return action
+
+    def _settle(self, outcome: CourtOutcome) -> Callable[[GameSession], None]:
+        def action(session: GameSession) -> None:
+            state = session.state
+            apply_effects(state, {"delta": outcome.delta})
+            state.court.is_active = False
+            state.court.last_trigger_turn = state.turn
+            state.court.active_modifier = outcome.modifier.model_copy()
+            self.engine._finalize_court_resolution(session)
+            self.engine._evaluate_outcome(session)
+
+        return action
+
+    def _key(self, state: GameState) -> SolverState:
+        court = state.court
+        modifier = court.active_modifier
+        if modifier is not None:
+            self._modifiers.setdefault(modifier.id, modifier)
+        return SolverState(
+            node=state.current_node_id,
+            chapter=state.chapter,
+            phase=state.phase,
+            outcome=state.outcome,
+            food=self._snap(state.food),
+            morale=self._snap(state.morale),
+            politics=self._snap(state.politics),
+            wei_pressure=state.wei_pressure,
+            health=state.health,
+            doom=state.doom,
+            longyou_turns=state.longyou_turns,
+            guanzhong_turns=state.guanzhong_turns,
+            longyou_collapsed=state.longyou_collapsed,
+            post_zhuge=bool(state.flags.get("post_zhuge_era", False)),
+            doom_chain=bool(state.flags.get("doom_chain_active", False)),
+            core_lost=bool(state.flags.get("core_lost", False)),
+            momentum=court.momentum,
+            first_turn=state.turn <= 1,
+            turns_since_court=min(COURT_TRIGGER_INTERVAL, state.turn - court.last_trigger_turn),
+            court_pending=court.is_active,
+            court_return_phase=court.return_phase,
+            modifier_id=modifier.id if modifier is not None else None,
+            modifier_turns=modifier.turns_remaining if modifier is not None else 0,
+        )
+
+    def _snap(self, value: int) -> int:
+        if self.resolution <= 1:
+            return value
+        return int(round(value / self.resolution)) * self.resolution
+
+    def _materialize(self, key: SolverState) -> GameState:
+        turn = 1 if key.first_turn else LATER_TURN
+        modifier = None
+        if key.modifier_id is not None:
+            modifier = self._modifiers[key.modifier_id].model_copy(update={"turns_remaining": key.modifier_turns})
+        # The engine mutates lists and dicts in place, so each state gets its own containers.
+        court = self._court_template.model_copy(
+            deep=True,
+            update={
+                "is_active": key.court_pending,
+                "return_phase": key.court_return_phase,
+                "momentum": key.momentum,
+                "last_trigger_turn": turn - key.turns_since_court,
+                "active_modifier": modifier,
+            },
+        )
+        return self._state_template.model_copy(
+            update={
+                "chapter": key.chapter,
+                "turn": turn,
+                "phase": key.phase,
+                "outcome": key.outcome,
+                "food": key.food,
+                "morale": key.morale,
+                "politics": key.politics,
+                "wei_pressure": key.wei_pressure,
+                "health": key.health,
+                "doom": key.doom,
+                "longyou_turns": key.longyou_turns,
+                "guanzhong_turns": key.guanzhong_turns,
+                "longyou_collapsed": key.longyou_collapsed,
+                "flags": {
+                    "post_zhuge_era": key.post_zhuge,
+                    "doom_chain_active": key.doom_chain,
+                    "core_lost": key.core_lost,
+                },
+                "log": [],
+                "current_node_id": key.node,
+                "controlled_locations": [],
+                "current_event": EventView(text="", options=[]),
+                "court": court,
+            },
+        )
+
+
+def solve(graph: EventGraph | None = None, court_model: CourtModel | None = None, **options: Any) -> SolveReport:
+    return ExactSolver(graph=graph, court_model=court_model, **options).solve()
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import random
+from collections.abc import Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from app.engine import balance
+from app.engine.graph import DEFAULT_GRAPH_PATH
+from app.engine.policy import DEFAULT_POLICY, get_policy
+from app.engine.simulator import SimulationSummary, simulate_range
+
+CHECK_PREFIX = "CHECK_BASE_PROB."
+SCALAR_KNOBS = {
+    "DOOM_THRESHOLD",
+    "POST_ZHUGE_SUCCESS_MULTIPLIER",
+    "POST_ZHUGE_DOOM_BONUS",
+    "POST_ZHUGE_EFFICIENCY_MULTIPLIER",
+    "POST_ZHUGE_POLITICS_BONUS",
+}
+
+# Code that decides how a game plays out; any edit here invalidates cached sweep points.
+ENGINE_SOURCE_DIRS = (Path(__file__).resolve().parent, Path(__file__).resolve().parents[1] / "models")
+
+Overrides = dict[str, float]
+
+
+@dataclass
+class SweepResult:
+    overrides: Overrides
+    summary: SimulationSummary
+    cached: bool = False
+
+
+def validate_overrides(overrides: Mapping[str, float]) -> None:
+    for name in overrides:
+        if name in SCALAR_KNOBS:
+            continue
+        if name.startswith(CHECK_PREFIX) and name[len(CHECK_PREFIX) :] in balance.CHECK_BASE_PROB:
+            continue
+        raise ValueError(f"Unknown balance knob: {name}")
+
+
+@contextmanager
+def applied_overrides(overrides: Mapping[str, float]) -> Iterator[None]:
+    """Patch balance constants for the duration of the block; engine code reads them at call time."""
+    validate_overrides(overrides)
+    saved = {name: getattr(balance, name) for name in SCALAR_KNOBS}
+    saved_checks = balance.CHECK_BASE_PROB
+    checks = dict(saved_checks)
+    try:
+        for name, value in overrides.items():
+            if name.startswith(CHECK_PREFIX):
+                checks[name[len(CHECK_PREFIX) :]] = float(value)
+            elif isinstance(saved[name], int):
+                setattr(balance, name, int(value))
+            else:
+                setattr(balance, name, float(value))
+        balance.CHECK_BASE_PROB = checks
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(balance, name, value)
+        balance.CHECK_BASE_PROB = saved_checks
+
+
+def grid(axes: Mapping[str, Sequence[float]]) -> list[Overrides]:
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def random_points(ranges: Mapping[str, tuple[float, float]], count: int, seed: int = 0) -> list[Overrides]:
+    rng = random.Random(seed)
+    points: list[Overrides] = []
+    for _ in range(count):
+        point: Overrides = {}
+        for name, (low, high) in ranges.items():
+            if isinstance(low, int) and isinstance(high, int):
+                point[name] = rng.randint(low, high)
+            else:
+                point[name] = round(rng.uniform(low, high), 4)
+        points.append(point)
+    return points
+
+
+def balance_digest() -> str:
+    """Digest of every balance constant as currently loaded, including hand edits to balance.py."""
+    constants = {name: value for name, value in vars(balance).items() if name.isupper()}
+    encoded = json.dumps(constants, separators=(",", ":"), sort_keys=True, default=repr).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def engine_source_digest() -> str:
+    digest = hashlib.sha256()
+    for directory in ENGINE_SOURCE_DIRS:
+        for path in sorted(directory.glob("*.py")):
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def point_key(
+    overrides: Mapping[str, float],
+    runs: int,
+    seed: int,
+    policy: str = DEFAULT_POLICY.name,
+    events_path: Path = DEFAULT_GRAPH_PATH,
+) -> str:
+    """Cache key over everything that determines a point's summary."""
+    events_digest = hashlib.sha256(events_path.read_bytes()).hexdigest()
+    payload = {
+        "events": events_digest,
+        "balance": balance_digest(),
+        "engine": engine_source_digest(),
+        "overrides": sorted(overrides.items()),
+        "seeds": [seed, runs],
+        "policy": policy,
+    }
+    encoded = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class SweepCache:
+    """One JSON file per evaluated point, named by point_key()."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def get(self, key: str) -> SimulationSummary | None:
+        path = self.directory / f"{key}.json"
+        if not path.exists():
+            return None
+        return SimulationSummary(**json.loads(path.read_text(encoding="utf-8")))
+
+    def put(self, key: str, summary: SimulationSummary) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{key}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(asdict(summary)), encoding="utf-8")
+        tmp_path.replace(path)
+
+
+def evaluate_point(
+    overrides: Mapping[str, float],
+    runs: int,
+    seed: int,
+    policy: str = DEFAULT_POLICY.name,
+) -> SimulationSummary:
+    with applied_overrides(overrides):
+        return simulate_range(seed, 0, runs, get_policy(policy))
+
+
+def run_sweep(
+    points: Sequence[Mapping[str, float]],
+    runs: int = 500,
+    seed: int = 42,
+    *,
+    policy: str = DEFAULT_POLICY.name,
+    cache: SweepCache | None = None,
+    workers: int | None = None,
+) -> list[SweepResult]:
+    """Evaluate each point on the same seed range, reusing cached summaries where present."""
+    get_policy(policy)
+    for overrides in points:
+        validate_overrides(overrides)
+
+    results: list[SweepResult | None] = [None] * len(points)
+    pending: list[tuple[int, str]] = []
+    for index, overrides in enumerate(points):
+        key = point_key(overrides, runs, seed, policy)
+        summary = cache.get(key) if cache is not None else None
+        if summary is None:
+            pending.append((index, key))
+        else:
+            results[index] = SweepResult(overrides=dict(overrides), summary=summary, cached=True)
+
+    if workers is None or workers <= 1 or len(pending) <= 1:
+        computed = [evaluate_point(points[index], runs, seed, policy) for index, _ in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            futures = [pool.submit(evaluate_point, dict(points[index]), runs, seed, policy) for index, _ in pending]
+            computed = [future.result() for future in futures]
+
+    for (index, key), summary in zip(pending, computed):
+        if cache is not None:
+            cache.put(key, summary)
+        results[index] = SweepResult(overrides=dict(points[index]), summary=summary)
+    return [result for result in results if result is not None]
+
+
+def format_table(results: Sequence[SweepResult], sort_by: str = "win_rate", descending: bool = True) -> str:
+    columns = {
+        "win_rate": lambda result: result.summary.win_rate,
+        "avg_turns": lambda result: result.summary.avg_turns,
+        "defeat_rate": lambda result: result.summary.defeat_rate,
+    }
+    if sort_by not in columns:
+        raise ValueError(f"Unknown sort column: {sort_by}")
+
+    ordered = sorted(results, key=columns[sort_by], reverse=descending)
+    knobs = sorted({name for result in results for name in result.overrides})
+    header = [*knobs, "win_rate", "avg_turns", "runs", "cached"]
+    rows = [header]
+    for result in ordered:
+        rows.append(
+            [
+                *(_format_value(result.overrides.get(name, "")) for name in knobs),
+                f"{result.summary.win_rate:.4f}",
+                f"{result.summary.avg_turns:.3f}",
+                str(result.summary.runs),
+                "yes" if result.cached else "",
+            ]
+        )
+    widths = [max(len(row[column]) for row in rows) for column in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
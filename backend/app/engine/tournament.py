@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from statistics import NormalDist
+
+from app.engine.policy import Policy, get_policy
+from app.engine.runtime import GameEngine
+from app.engine.simulator import SimulationSummary, play_tracked, shard_ranges, wilson_interval
+from app.models.state import Outcome
+
+
+@dataclass
+class PolicyResult:
+    name: str
+    summary: SimulationSummary
+    win_rate_low: float
+    win_rate_high: float
+
+
+@dataclass
+class PairedComparison:
+    """Win-rate difference ``policy - baseline`` over games played on identical seeds."""
+
+    policy: str
+    baseline: str
+    win_rate_diff: float
+    low: float
+    high: float
+    discordant_games: int
+
+
+@dataclass
+class TournamentReport:
+    runs: int
+    seed: int
+    results: list[PolicyResult]
+    comparisons: list[PairedComparison]
+
+
+def run_tournament(
+    policies: Sequence[Policy | str],
+    n: int = 1000,
+    seed: int = 42,
+    *,
+    confidence: float = 0.95,
+    workers: int | None = None,
+) -> TournamentReport:
+    """Play every policy on the same n game seeds and compare each against the first.
+
+    Game i uses engine seed ``seed + i`` and policy RNG seed ``seed * 1000 + i``
+    for every policy (common random numbers), so the per-game outcome pairs
+    share their luck and the paired interval is much tighter than comparing
+    two independent win rates.
+    """
+    resolved = [get_policy(policy) if isinstance(policy, str) else policy for policy in policies]
+    if not resolved:
+        raise ValueError("At least one policy is required")
+    names = [policy.name for policy in resolved]
+    if len(set(names)) != len(names):
+        raise ValueError("Policy names must be unique")
+
+    played = _play_all(resolved, n, seed, workers)
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    results: list[PolicyResult] = []
+    for policy, (summary, _) in zip(resolved, played):
+        low, high = wilson_interval(summary.wins, n, confidence)
+        results.append(PolicyResult(name=policy.name, summary=summary, win_rate_low=low, win_rate_high=high))
+
+    baseline_wins = played[0][1]
+    comparisons: list[PairedComparison] = []
+    for policy, (_, wins) in zip(resolved[1:], played[1:]):
+        diffs = [int(won) - int(base_won) for won, base_won in zip(wins, baseline_wins)]
+        mean = sum(diffs) / n if n else 0.0
+        variance = sum((diff - mean) ** 2 for diff in diffs) / (n - 1) if n > 1 else 0.0
+        margin = z * math.sqrt(variance / n) if n else 0.0
+        comparisons.append(
+            PairedComparison(
+                policy=policy.name,
+                baseline=resolved[0].name,
+                win_rate_diff=mean,
+                low=mean - margin,
+                high=mean + margin,
+                discordant_games=sum(1 for diff in diffs if diff),
+            )
+        )
+
+    return TournamentReport(runs=n, seed=seed, results=results, comparisons=comparisons)
+
+
+def _play_all(
+    policies: list[Policy],
+    n: int,
+    seed: int,
+    workers: int | None,
+) -> list[tuple[SimulationSummary, list[bool]]]:
+    if workers is None or workers <= 1:
+        return [_play_games(policy, seed, 0, n) for policy in policies]
+
+    shards = shard_ranges(n, max(1, workers // len(policies)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            [pool.submit(_play_games, policy, seed, start, stop) for start, stop in shards] for policy in policies
+        ]
+        played: list[tuple[SimulationSummary, list[bool]]] = []
+        for policy_futures in futures:
+            parts = [future.result() for future in policy_futures]
+            played.append(
+                (SimulationSummary.merge([summary for summary, _ in parts]), [won for _, wins in parts for won in wins])
+            )
+        return played
+
+
+def _play_games(policy: Policy, seed: int, start: int, stop: int) -> tuple[SimulationSummary, list[bool]]:
+    """Summary for runs [start, stop) plus each run's win flag, in seed order, for pairing."""
+    engine = GameEngine.headless()
+    summary = SimulationSummary(runs=0, wins=0, defeats=0, stuck_runs=0, avg_turns=0.0)
+    wins: list[bool] = []
+    for i in range(start, stop):
+        state, last_node = play_tracked(engine, seed, i, policy)
+        summary.add_run(state, last_node)
+        wins.append(state.outcome == Outcome.WIN)
+    return summary, wins
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    np = None
+
+from app.engine import balance
+from app.engine.graph import EventGraph, load_default_graph
+from app.engine.repository import GameSession
+from app.engine.runtime import GameEngine
+from app.models.court import CourtStrategy
+from app.models.event_graph import NodeType
+from app.models.state import GameState, Outcome, Phase
+
+PHASES = list(Phase)
+COURT_STRATEGIES = [strategy.value for strategy in CourtStrategy]
+STAT_FEATURES = 13
+COURT_FEATURES = 5
+
+
+class VectorGameEnv:
+    """Batched, gym-style driver for N independent games.
+
+    Actions are integers into a fixed table: 0 is ``next_turn``, then one slot
+    per option id in the graph, then one slot per court strategy.
+    ``action_mask()`` marks the legal slots for each game. A game that is
+    still ongoing after ``MAX_TURNS_PER_RUN`` steps is truncated, the same cap
+    the simulator uses. Finished and truncated games ignore further actions
+    and report ``done`` until the next ``reset``.
+
+    This is a batching convenience, not a vectorised engine: each game is a
+    full ``GameState`` stepped through the engine in turn, so a step costs
+    about N single-game actions and only the observations and masks come back
+    as arrays. ``BatchSimulator`` is the vectorised path, for the fixed
+    simulator policy only. Court sessions use the offline dialogue fallbacks;
+    the environment never calls the model.
+    """
+
+    def __init__(self, num_envs: int, graph: EventGraph | None = None) -> None:
+        if np is None:
+            raise RuntimeError("VectorGameEnv requires numpy: python -m pip install numpy")
+        if num_envs <= 0:
+            raise ValueError("num_envs must be positive")
+
+        self.num_envs = num_envs
+        self.engine = GameEngine.headless(graph=graph or load_default_graph())
+        self.graph = self.engine.graph
+        self.node_ids = sorted(self.graph.nodes)
+        self._node_index = {node_id: index for index, node_id in enumerate(self.node_ids)}
+        self.option_ids = sorted({option.id for node in self.graph.nodes.values() for option in node.options})
+        self._option_action = {option_id: 1 + index for index, option_id in enumerate(self.option_ids)}
+        self._strategy_offset = 1 + len(self.option_ids)
+        self.num_actions = self._strategy_offset + len(COURT_STRATEGIES)
+        self.observation_size = STAT_FEATURES + len(PHASES) + len(self.node_ids) + COURT_FEATURES
+        self.sessions: list[GameSession] = []
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+
+    def action_name(self, action: int) -> str:
+        if action == 0:
+            return "next_turn"
+        if action < self._strategy_offset:
+            return f"choose_option:{self.option_ids[action - 1]}"
+        return f"court_strategy:{COURT_STRATEGIES[action - self._strategy_offset]}"
+
+    def reset(self, seeds: Sequence[int]) -> tuple[Any, Any]:
+        if len(seeds) != self.num_envs:
+            raise ValueError(f"reset expects {self.num_envs} seeds, got {len(seeds)}")
+        from app.assistant.court_dialogue import live_calls_disabled
+
+        with live_calls_disabled():
+            self.sessions = [
+                self.engine.new_session(game_id=f"env-{index}", seed=int(seed)) for index, seed in enumerate(seeds)
+            ]
+            for session in self.sessions:
+                # Open a pending court now so the first mask already offers court strategies.
+                self.engine._ensure_court_session(session)
+        self.steps[:] = 0
+        self.truncated[:] = False
+        return self.observations(), self.action_mask()
+
+    def step(self, actions: Sequence[int]) -> tuple[Any, Any, Any, list[dict[str, Any]]]:
+        """Apply one action per game; returns (observations, rewards, dones, infos).
+
+        Rewards are +1 on the step a game is won, -1 on the step it is lost.
+        Every action is validated before any game moves, so an illegal action
+        raises ``ValueError`` with the whole batch untouched. ``infos[i]["truncated"]``
+        is true once game i has hit the step cap without finishing.
+        """
+        if not self.sessions:
+            raise ValueError("reset must be called before step")
+        if len(actions) != self.num_envs:
+            raise ValueError(f"step expects {self.num_envs} actions, got {len(actions)}")
+        from app.assistant.court_dialogue import live_calls_disabled
+
+        with live_calls_disabled():
+            return self._step(actions)
+
+    def _step(self, actions: Sequence[int]) -> tuple[Any, Any, Any, list[dict[str, Any]]]:
+        commands = [
+            self._decode(session.state, int(action)) if self._live(index) else None
+            for index, (session, action) in enumerate(zip(self.sessions, actions))
+        ]
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        infos: list[dict[str, Any]] = []
+        for index, (session, command) in enumerate(zip(self.sessions, commands)):
+            state = session.state
+            if command is not None:
+                state = self.engine.act_session(session, *command)
+                self.engine._ensure_court_session(session)
+                self.steps[index] += 1
+                if state.outcome == Outcome.WIN:
+                    rewards[index] = 1.0
+                elif state.outcome == Outcome.DEFEAT_SHU:
+                    rewards[index] = -1.0
+                elif self.steps[index] >= balance.MAX_TURNS_PER_RUN:
+                    self.truncated[index] = True
+            dones[index] = not self._live(index)
+            infos.append(
+                {
+                    "node": state.current_node_id,
+                    "turn": state.turn,
+                    "outcome": state.outcome.value,
+                    "truncated": bool(self.truncated[index]),
+                }
+            )
+        return self.observations(), rewards, dones, infos
+
+    def observations(self) -> Any:
+        observations = np.zeros((self.num_envs, self.observation_size), dtype=np.float32)
+        for index, session in enumerate(self.sessions):
+            self._encode(session.state, observations[index])
+        return observations
+
+    def action_mask(self) -> Any:
+        mask = np.zeros((self.num_envs, self.num_actions), dtype=bool)
+        for index, session in enumerate(self.sessions):
+            if not self._live(index):
+                continue
+            state = session.state
+            mask[index, 0] = True
+            if state.court.is_active:
+                mask[index, self._strategy_offset :] = True
+                continue
+            node = self.graph.get(state.current_node_id)
+            if node.node_type != NodeType.CHOICE:
+                continue
+            for option in self.graph.enabled_options(node, state):
+                mask[index, self._option_action[option.id]] = True
+        return mask
+
+    def _live(self, index: int) -> bool:
+        return self.sessions[index].state.outcome == Outcome.ONGOING and not self.truncated[index]
+
+    def _decode(self, state: GameState, action: int) -> tuple[str, dict[str, Any]]:
+        if action < 0 or action >= self.num_actions:
+            raise ValueError(f"Action out of range: {action}")
+        if action == 0:
+            return "next_turn", {}
+        if action >= self._strategy_offset:
+            if not state.court.is_active:
+                raise ValueError("Court strategy chosen outside a court session")
+            return "court_strategy", {"strategy": COURT_STRATEGIES[action - self._strategy_offset]}
+
+        option_id = self.option_ids[action - 1]
+        node = self.graph.get(state.current_node_id)
+        enabled = not state.court.is_active and any(
+            option.id == option_id and self.graph.option_enabled(node, option, state) for option in node.options
+        )
+        if not enabled:
+            raise ValueError(f"Option {option_id} is not available at {state.current_node_id}")
+        return "choose_option", {"option_id": option_id}
+
+    def _encode(self, state: GameState, out: Any) -> None:
+        out[0] = state.chapter / 5
+        out[1] = state.turn / balance.MAX_TURNS_PER_RUN
+        out[2] = state.food / balance.MAX_FOOD_BASE
+        out[3] = state.morale / balance.MAX_MORALE
+        out[4] = state.politics / balance.MAX_POLITICS
+        out[5] = state.wei_pressure / balance.MAX_WEI_PRESSURE
+        out[6] = state.health / balance.INITIAL_HEALTH
+        out[7] = state.doom / balance.MAX_DOOM
+        out[8] = state.longyou_turns / 5
+        out[9] = state.guanzhong_turns / 3
+        out[10] = float(state.longyou_collapsed)
+        out[11] = float(state.flags.get("post_zhuge_era", False))
+        out[12] = float(state.flags.get("doom_chain_active", False))
+
+        offset = STAT_FEATURES
+        out[offset + PHASES.index(state.phase)] = 1.0
+        offset += len(PHASES)
+        out[offset + self._node_index[state.current_node_id]] = 1.0
+        offset += len(self.node_ids)
+
+        court = state.court
+        out[offset] = float(court.is_active)
+        out[offset + 1] = court.support / 100
+        out[offset + 2] = court.temperature / 100
+        out[offset + 3] = court.time_pressure / max(1, court.max_time_pressure)
+        out[offset + 4] = court.momentum / 4
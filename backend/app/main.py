@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -13,9 +15,16 @@ except ModuleNotFoundError:  # pragma: no cover - optional during local bootstra
 
 load_dotenv(Path(__file__).resolve().parents[1] / ".env")
 
-from app.api.routes import router
+from app.api.routes import router, shutdown
 
-app = FastAPI(title="Three Kingdoms Northern Expedition MVP", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    yield
+    shutdown()
+
+
+app = FastAPI(title="Three Kingdoms Northern Expedition MVP", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
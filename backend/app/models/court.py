@@ -4,6 +4,8 @@ from enum import Enum
 
 from pydantic import BaseModel, Field
 
+from app.models.zobrist import ZobristModel, mix, nested_hash, salt
+
 
 class CourtStrategy(str, Enum):
     RATIONAL = "rational_argument"
@@ -31,7 +33,9 @@ class CourtNpcConfig(BaseModel):
     event_hooks: list[str] = Field(default_factory=list)
 
 
-class CourtNpcState(BaseModel):
+class CourtNpcState(ZobristModel):
+    zobrist_fields = frozenset({"stance", "influence", "resentment", "ignored_rounds"})
+
     id: str
     display_name: str
     persona_tag: str
@@ -54,7 +58,7 @@ class CourtMessage(BaseModel):
     text: str
 
 
-class CourtBattleModifier(BaseModel):
+class CourtBattleModifier(ZobristModel):
     id: str
     title: str
     description: str
@@ -72,6 +76,9 @@ class CourtBattleModifier(BaseModel):
     risk_level: str = "medium"
 
 
+CourtBattleModifier.zobrist_fields = frozenset(CourtBattleModifier.model_fields)
+
+
 class CourtResolution(BaseModel):
     session_id: int
     turn_resolved: int
@@ -226,7 +233,22 @@ def default_court_npc_states() -> dict[str, CourtNpcState]:
     return states
 
 
-class CourtState(BaseModel):
+class CourtState(ZobristModel):
+    zobrist_fields = frozenset(
+        {
+            "is_active",
+            "return_phase",
+            "temperature",
+            "support",
+            "time_pressure",
+            "max_time_pressure",
+            "last_trigger_turn",
+            "resentment_event_fired",
+            "momentum",
+            "current_issue_tags",
+        }
+    )
+
     is_active: bool = False
     session_id: int = 0
     return_phase: str = "campaign"
@@ -246,3 +268,12 @@ class CourtState(BaseModel):
     resentment_event_fired: bool = False
     momentum: int = 0
     current_rebound_events: list[str] = Field(default_factory=list)
+
+    def _zobrist_nested(self, full: bool = False) -> int:
+        value = mix(nested_hash(self.active_modifier, full) ^ salt("@active_modifier", None))
+        resolution = self.last_resolution
+        if resolution is not None:
+            value ^= salt("@last_resolution", (resolution.session_id, resolution.result.value))
+        for npc_id, npc in self.npcs.items():
+            value ^= mix(nested_hash(npc, full) ^ salt("@npc", npc_id))
+        return value
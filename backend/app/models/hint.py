@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+
+class OptionHint(BaseModel):
+    option_id: str
+    label: str
+    rollouts: int
+    wins: int
+    # None when the budget ran out before this option got a rollout.
+    win_rate: float | None = None
+
+
+class HintView(BaseModel):
+    game_id: str
+    node_id: str
+    state_hash: str
+    budget_ms: int
+    elapsed_ms: float
+    cached: bool = False
+    recommended_option_id: str | None = None
+    options: list[OptionHint] = Field(default_factory=list)
@@ -5,6 +5,7 @@ from enum import Enum
 from pydantic import BaseModel, Field
 
 from app.models.court import CourtState
+from app.models.zobrist import ZobristModel, mix, nested_hash, salt
 
 class Phase(str, Enum):
     CAMPAIGN = "campaign"
@@ -31,7 +32,33 @@ class EventView(BaseModel):
     options: list[OptionView] = Field(default_factory=list)
 
 
-class GameState(BaseModel):
+class GameState(ZobristModel):
+    """Full game state; ``zobrist_hash()`` identifies the mechanically relevant part of it.
+
+    Ids, logs, the seed/roll counter and presentation fields (event text,
+    location, route progress) are left out, so two games in the same situation
+    hash equal however they got there.
+    """
+
+    zobrist_fields = frozenset(
+        {
+            "chapter",
+            "turn",
+            "phase",
+            "outcome",
+            "food",
+            "morale",
+            "politics",
+            "wei_pressure",
+            "health",
+            "doom",
+            "longyou_turns",
+            "guanzhong_turns",
+            "longyou_collapsed",
+            "current_node_id",
+        }
+    )
+
     game_id: str
     chapter: int
     turn: int
@@ -57,3 +84,9 @@ class GameState(BaseModel):
     seed: int
     roll_count: int
     court: CourtState = Field(default_factory=CourtState)
+
+    def _zobrist_nested(self, full: bool = False) -> int:
+        value = mix(nested_hash(self.court, full) ^ salt("@court", None))
+        for flag, enabled in self.flags.items():
+            value ^= salt("@flag", (flag, enabled))
+        return value
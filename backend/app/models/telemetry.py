@@ -8,6 +8,7 @@ from pydantic import BaseModel, Field
 class ReplayAction(BaseModel):
     action: str
     payload: dict[str, Any] = Field(default_factory=dict)
+    rng_index: int | None = None
 
 
 class TraceEntry(BaseModel):
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from enum import Enum
+from functools import lru_cache
+from typing import Any, ClassVar
+
+from pydantic import BaseModel, PrivateAttr
+
+MASK64 = (1 << 64) - 1
+VERIFY = os.getenv("STATE_HASH_VERIFY", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+class ZobristMismatchError(AssertionError):
+    pass
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    return value
+
+
+@lru_cache(maxsize=1 << 16)
+def salt(name: str, value: Any) -> int:
+    """Key for an already-hashable value; also used to tag nested components."""
+    digest = hashlib.blake2b(repr((name, value)).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def zobrist_key(name: str, value: Any) -> int:
+    """Stable 64-bit key for one (field, value) pair; identical in every process."""
+    return salt(name, _normalize(value))
+
+
+def mix(value: int) -> int:
+    """splitmix64 finalizer, used to fold a nested model's hash in without XOR cancelling."""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+_setattr = BaseModel.__setattr__
+
+
+class ZobristModel(BaseModel):
+    """Model whose ``zobrist_fields`` keep an XOR-of-keys hash current on every assignment.
+
+    Assigning a hashed field XORs out the old (field, value) key and XORs in the
+    new one, so engine code keeps mutating plain attributes and the hash stays
+    O(1) per change. Containers that are mutated in place (dicts of flags or
+    NPCs) cannot be observed that way; subclasses fold those in from
+    ``_zobrist_nested()`` when the hash is read. With ``STATE_HASH_VERIFY=1``
+    every read is checked against a full recomputation.
+
+    The same hook tells an attached change journal (``_journal``) about each
+    assignment before it happens.
+    """
+
+    zobrist_fields: ClassVar[frozenset[str]] = frozenset()
+
+    _zobrist: int | None = PrivateAttr(default=None)
+    _journal: Any = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        private = self.__pydantic_private__
+        if private:
+            journal = private["_journal"]
+            if journal is not None and name[0] != "_":
+                journal.touch()
+            if name in self.zobrist_fields:
+                current = private["_zobrist"]
+                if current is not None:
+                    old = self.__dict__[name]
+                    _setattr(self, name, value)
+                    private["_zobrist"] = current ^ zobrist_key(name, old) ^ zobrist_key(name, self.__dict__[name])
+                    return
+        _setattr(self, name, value)
+
+    def model_copy(self, *, update: dict[str, Any] | None = None, deep: bool = False) -> Any:
+        copied = super().model_copy(update=update, deep=deep)
+        copied.__pydantic_private__["_journal"] = None
+        if update:
+            # update= writes __dict__ directly, so the carried-over hash is stale.
+            copied.__pydantic_private__["_zobrist"] = None
+        return copied
+
+    def zobrist_hash(self) -> int:
+        private = self.__pydantic_private__
+        value = private["_zobrist"]
+        if value is None:
+            value = private["_zobrist"] = self._zobrist_fields_full()
+        value ^= self._zobrist_nested()
+        if VERIFY:
+            expected = self.zobrist_full()
+            if value != expected:
+                raise ZobristMismatchError(
+                    f"{type(self).__name__} incremental hash {value:016x} != recomputed {expected:016x}"
+                )
+        return value
+
+    def zobrist_full(self) -> int:
+        """Recompute from scratch, ignoring the incremental value."""
+        return self._zobrist_fields_full() ^ self._zobrist_nested(full=True)
+
+    def _zobrist_fields_full(self) -> int:
+        value = 0
+        for name in self.zobrist_fields:
+            value ^= zobrist_key(name, self.__dict__[name])
+        return value
+
+    def _zobrist_nested(self, full: bool = False) -> int:
+        return 0
+
+
+def nested_hash(model: ZobristModel | None, full: bool) -> int:
+    if model is None:
+        return 0
+    return model.zobrist_full() if full else model.zobrist_hash()
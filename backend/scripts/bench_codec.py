@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.engine.codec import decode_session, encode_session
+from app.engine.repository import GameSession
+from app.engine.rng import new_rng
+from app.engine.runtime import GameEngine
+from app.engine.simulator import play_session
+
+
+def _sample_sessions(games: int, every: int, rng_backend: str) -> list[GameSession]:
+    """Copies of sessions taken every ``every`` actions through ``games`` full games."""
+    engine = GameEngine.headless()
+    samples: list[GameSession] = []
+    for seed in range(games):
+        session = GameSession(state=engine.new_session(f"bench-{seed}", seed).state, rng=new_rng(seed, rng_backend))
+        steps = 0
+
+        def sample(_state: object) -> None:
+            nonlocal steps
+            steps += 1
+            if steps % every == 0:
+                samples.append(decode_session(encode_session(session)))
+
+        play_session(engine, session, random.Random(seed), on_action=sample)
+        samples.append(decode_session(encode_session(session)))
+    return samples
+
+
+def _per_call_us(fn: Callable[[object], object], items: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - started)
+    return best / len(items) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对比二进制会话编码与 JSON 状态 + pickle RNG 的体积与编解码耗时。")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--every", type=int, default=4, help="每隔多少个动作采样一次会话")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rng", choices=["mt", "counter"], default="mt")
+    args = parser.parse_args()
+
+    sessions = _sample_sessions(args.games, args.every, args.rng)
+    json_rows = [(session.serialize_state(), session.serialize_rng()) for session in sessions]
+    blobs = [encode_session(session) for session in sessions]
+    json_sizes = [len(state.encode("utf-8")) + len(rng) for state, rng in json_rows]
+    blob_sizes = [len(blob) for blob in blobs]
+
+    timings = {
+        "json 编码": _per_call_us(lambda s: (s.serialize_state(), s.serialize_rng()), sessions, args.repeat),
+        "json 解码": _per_call_us(lambda row: GameSession.from_serialized(*row), json_rows, args.repeat),
+        "binary 编码": _per_call_us(encode_session, sessions, args.repeat),
+        "binary 解码": _per_call_us(decode_session, blobs, args.repeat),
+    }
+
+    print(f"样本会话={len(sessions)} rng={args.rng}")
+    print(
+        f"体积 json+rng: 平均 {statistics.mean(json_sizes):.0f} B  "
+        f"binary: 平均 {statistics.mean(blob_sizes):.0f} B  "
+        f"({statistics.mean(blob_sizes) / statistics.mean(json_sizes):.0%})"
+    )
+    for label, micros in timings.items():
+        print(f"{label}: {micros:.1f} µs/会话")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
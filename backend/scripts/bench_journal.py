@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.engine import runtime
+from app.engine.journal import ChangeJournal
+from app.engine.recorder import SessionTraceRecorder
+from app.engine.runtime import GameEngine
+from app.engine.simulator import play_one
+from app.models.state import GameState
+
+_bookkeeping = 0.0
+
+
+class _TimedChangeJournal(ChangeJournal):
+    def __init__(self, state: GameState) -> None:
+        global _bookkeeping
+        started = time.perf_counter()
+        super().__init__(state)
+        _bookkeeping += time.perf_counter() - started
+
+    def touch(self) -> None:
+        global _bookkeeping
+        started = time.perf_counter()
+        super().touch()
+        _bookkeeping += time.perf_counter() - started
+
+    def finish(self) -> dict[str, dict[str, Any]]:
+        global _bookkeeping
+        started = time.perf_counter()
+        changes = super().finish()
+        _bookkeeping += time.perf_counter() - started
+        return changes
+
+
+class _FullDumpJournal:
+    """The diff computed before ChangeJournal: dump the whole state before and after the action."""
+
+    def __init__(self, state: GameState) -> None:
+        global _bookkeeping
+        started = time.perf_counter()
+        self.state = state
+        self.before = state.model_dump(mode="python")
+        _bookkeeping += time.perf_counter() - started
+
+    @classmethod
+    def begin(cls, state: GameState) -> _FullDumpJournal:
+        return cls(state)
+
+    def finish(self) -> dict[str, dict[str, Any]]:
+        global _bookkeeping
+        started = time.perf_counter()
+        after = self.state.model_dump(mode="python")
+        changes = {key: {"before": value, "after": after[key]} for key, value in self.before.items() if value != after[key]}
+        _bookkeeping += time.perf_counter() - started
+        return changes
+
+
+def _time_runs(journal: type, runs: int, seed: int) -> tuple[float, float, int]:
+    """(total seconds, diff bookkeeping seconds, actions) for ``runs`` traced games."""
+    global _bookkeeping
+    runtime.ChangeJournal = journal
+    _bookkeeping = 0.0
+    engine = GameEngine.headless(recorder=SessionTraceRecorder())
+    actions = 0
+
+    def count(state: GameState) -> None:
+        nonlocal actions
+        actions += 1
+
+    started = time.perf_counter()
+    for i in range(runs):
+        play_one(engine, seed, i, on_action=count)
+    return time.perf_counter() - started, _bookkeeping, actions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对比 ChangeJournal 与整份 model_dump 生成 state_diff 的开销。")
+    parser.add_argument("--runs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results: dict[str, list[tuple[float, float, int]]] = {"journal": [], "full_dump": []}
+    try:
+        for _ in range(args.repeat):
+            results["journal"].append(_time_runs(_TimedChangeJournal, args.runs, args.seed))
+            results["full_dump"].append(_time_runs(_FullDumpJournal, args.runs, args.seed))
+    finally:
+        runtime.ChangeJournal = ChangeJournal
+
+    print(f"runs={args.runs} seed={args.seed} repeat={args.repeat} (best of repeats)")
+    for name, samples in results.items():
+        total = min(sample[0] for sample in samples)
+        bookkeeping = min(sample[1] for sample in samples)
+        actions = samples[0][2]
+        print(
+            f"{name:9s}: actions={actions} per_action={total / actions * 1e6:.1f}us "
+            f"diff_bookkeeping={bookkeeping / actions * 1e6:.1f}us"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
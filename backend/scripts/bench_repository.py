@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.engine.policy import DEFAULT_POLICY
+from app.engine.repository_cache import CachedRepository
+from app.engine.repository_events import EventSourcedRepository
+from app.engine.repository_sqlite import SQLiteRepository
+from app.engine.runtime import GameEngine
+from app.models.event_graph import NodeType
+from app.models.state import Outcome
+
+
+def _play(engine: GameEngine, game_id: str, seed: int, max_actions: int) -> int:
+    """Drive one game through the repository-backed engine.act path, like /act requests would."""
+    state = engine.new_game(game_id=game_id, seed=seed)
+    rng = random.Random(seed)
+    actions = 0
+    while state.outcome == Outcome.ONGOING and actions < max_actions:
+        if state.court.is_active:
+            strategy = DEFAULT_POLICY.court_strategy(state, rng)
+            payload = {"statement": DEFAULT_POLICY.court_statement(strategy), "strategy_hint": strategy}
+            state = engine.act(game_id, "court_statement", payload)
+        else:
+            node = engine.graph.get(state.current_node_id)
+            enabled = engine.graph.enabled_options(node, state) if node.node_type == NodeType.CHOICE else []
+            chosen = DEFAULT_POLICY.choose_option(state, enabled, rng) if enabled else None
+            if chosen is not None:
+                state = engine.act(game_id, "choose_option", {"option_id": chosen.id})
+            else:
+                state = engine.act(game_id, "next_turn", {})
+        actions += 1
+    return actions
+
+
+BACKENDS = {"sqlite": SQLiteRepository, "sqlite_events": EventSourcedRepository}
+
+
+def _run(
+    backend: str, cache: str, codec: str, db_path: str, workers: int, games: int, max_actions: int
+) -> tuple[float, int]:
+    repository = BACKENDS[backend](db_path, codec=codec)
+    if cache != "off":
+        repository = CachedRepository(repository, mode=cache)
+    engine = GameEngine(repository=repository)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        counts = pool.map(lambda i: _play(engine, f"bench-{workers}-{i}", 1000 + i, max_actions), range(games))
+        total = sum(counts)
+    elapsed = time.perf_counter() - started
+    repository.close()
+    return elapsed, total
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="测量 SQLite 存储下并发 act 的吞吐。")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="sqlite")
+    parser.add_argument("--cache", choices=["off", "write_through", "write_behind"], default="off")
+    parser.add_argument("--codec", choices=["json", "binary"], default="json")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--games", type=int, default=32)
+    parser.add_argument("--max-actions", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            db_path = Path(tmp) / f"bench-{workers}.db"
+            elapsed, actions = _run(
+                args.backend, args.cache, args.codec, str(db_path), workers, args.games, args.max_actions
+            )
+            size = sum(path.stat().st_size for path in Path(tmp).glob(f"{db_path.name}*"))
+            print(
+                f"backend={args.backend} cache={args.cache} codec={args.codec} workers={workers} actions={actions} 耗时={elapsed:.2f}s "
+                f"吞吐={actions / elapsed:.0f} act/s 数据库={size / actions / 1024:.1f} KiB/act"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
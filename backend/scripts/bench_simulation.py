@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.engine.recorder import NullTraceRecorder, SessionTraceRecorder, TraceRecorder
+from app.engine.runtime import GameEngine
+from app.engine.simulator import play_one
+
+
+def _time_runs(recorder: TraceRecorder, runs: int, seed: int) -> tuple[float, int]:
+    engine = GameEngine.headless(recorder=recorder)
+    total_turns = 0
+    started = time.perf_counter()
+    for i in range(runs):
+        total_turns += play_one(engine, seed, i).turn
+    return time.perf_counter() - started, total_turns
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对比开启/关闭追踪记录时的模拟吞吐。")
+    parser.add_argument("--runs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    traced_seconds, traced_turns = _time_runs(SessionTraceRecorder(), args.runs, args.seed)
+    null_seconds, null_turns = _time_runs(NullTraceRecorder(), args.runs, args.seed)
+
+    if traced_turns != null_turns:
+        print(f"结果不一致: traced turns={traced_turns} null turns={null_turns}")
+        return 1
+
+    print(f"runs={args.runs} seed={args.seed}")
+    print(f"SessionTraceRecorder: {traced_seconds:.3f}s ({args.runs / traced_seconds:.1f} runs/s)")
+    print(f"NullTraceRecorder:    {null_seconds:.3f}s ({args.runs / null_seconds:.1f} runs/s)")
+    print(f"speedup: {traced_seconds / null_seconds:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
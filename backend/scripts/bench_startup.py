@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+IMPORT_PROBE = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "import app.main\n"
+    "elapsed = time.perf_counter() - started\n"
+    "print('httpx' in sys.modules)\n"
+    "print(elapsed)\n"
+)
+GRAPH_PROBE = (
+    "import time\n"
+    "from app.engine.graph import load_default_graph\n"
+    "started = time.perf_counter()\n"
+    "load_default_graph()\n"
+    "print(time.perf_counter() - started)\n"
+)
+
+
+def _run_probe(probe: str, env: dict[str, str]) -> list[str]:
+    """Run the probe in a fresh interpreter so nothing is warm except the OS file cache."""
+    completed = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=BACKEND_ROOT,
+        env={**os.environ, **env},
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return completed.stdout.strip().splitlines()
+
+
+def _time_probe(probe: str, env: dict[str, str]) -> float:
+    return float(_run_probe(probe, env)[-1])
+
+
+def _median_ms(samples: list[float]) -> float:
+    return statistics.median(samples) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="在全新进程中测量冷启动耗时（导入 app.main、事件图加载）。")
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    imports = [_time_probe(IMPORT_PROBE, {}) for _ in range(args.repeat)]
+    httpx_loaded = _run_probe(IMPORT_PROBE, {})[0] == "True"
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        no_snapshot = [_time_probe(GRAPH_PROBE, {"GRAPH_SNAPSHOT": "0"}) for _ in range(args.repeat)]
+        snapshot_env = {"GRAPH_SNAPSHOT": "1", "GRAPH_SNAPSHOT_DIR": cache_dir}
+        cold = _time_probe(GRAPH_PROBE, snapshot_env)
+        warm = [_time_probe(GRAPH_PROBE, snapshot_env) for _ in range(args.repeat)]
+
+    print(f"repeat={args.repeat}")
+    print(f"import app.main: {_median_ms(imports):.1f} ms (min {min(imports) * 1000:.1f} ms)")
+    print(f"导入后已加载 httpx: {'是' if httpx_loaded else '否'}")
+    print(f"事件图加载 无快照(json+校验+编译): {_median_ms(no_snapshot):.2f} ms")
+    print(f"事件图加载 首次(生成快照):       {cold * 1000:.2f} ms")
+    print(f"事件图加载 命中快照:             {_median_ms(warm):.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
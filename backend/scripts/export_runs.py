@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.engine.simulator import iter_runs, write_csv, write_jsonl
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="逐局导出模拟记录（流式写入，内存占用恒定）。")
+    parser.add_argument("output", help="输出文件路径，- 表示标准输出")
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    args = parser.parse_args()
+
+    writer = write_csv if args.format == "csv" else write_jsonl
+    records = iter_runs(n=args.runs, seed=args.seed)
+    if args.output == "-":
+        count = writer(records, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as fp:
+            count = writer(records, fp)
+    print(f"已写入 {count} 局记录", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.engine.policy import POLICIES
+from app.engine.tournament import run_tournament
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="在相同种子上对比多个模拟策略（配对置信区间）。")
+    parser.add_argument("--policies", default=",".join(POLICIES), help="逗号分隔，第一个为基准策略")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    args = parser.parse_args()
+
+    try:
+        report = run_tournament(
+            [name.strip() for name in args.policies.split(",") if name.strip()],
+            n=args.runs,
+            seed=args.seed,
+            confidence=args.confidence,
+            workers=args.workers,
+        )
+    except ValueError as exc:
+        print(f"对局失败: {exc}")
+        return 2
+
+    print(f"runs={report.runs} seed={report.seed}")
+    for result in report.results:
+        print(
+            f"{result.name:<10} win_rate={result.summary.win_rate:.4f} "
+            f"[{result.win_rate_low:.4f}, {result.win_rate_high:.4f}] avg_turns={result.summary.avg_turns:.3f}"
+        )
+    for comparison in report.comparisons:
+        print(
+            f"{comparison.policy} - {comparison.baseline}: {comparison.win_rate_diff:+.4f} "
+            f"[{comparison.low:+.4f}, {comparison.high:+.4f}] discordant={comparison.discordant_games}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
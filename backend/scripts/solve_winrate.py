@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.engine.solver import CourtModel, ExactSolver
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="按模拟策略求解胜率区间（概率质量前向传播）；未解决的概率质量超过胜率时以非零码退出。"
+    )
+    parser.add_argument("--max-frontier", type=int, default=20_000)
+    parser.add_argument("--max-steps", type=int, default=220)
+    parser.add_argument("--prune-below", type=float, default=1e-9)
+    parser.add_argument("--resolution", type=int, default=1, help="粮草/士气/政治的合并粒度，1 为不合并")
+    parser.add_argument("--court-samples", type=int, default=48)
+    parser.add_argument("--allow-unresolved", action="store_true", help="结果不收敛时仍以 0 退出")
+    args = parser.parse_args()
+
+    solver = ExactSolver(
+        court_model=CourtModel(samples=args.court_samples),
+        prune_below=args.prune_below,
+        max_steps=args.max_steps,
+        max_frontier=args.max_frontier,
+        resolution=args.resolution,
+    )
+    report = solver.solve()
+
+    low, high = report.win_bounds
+    print(f"win_probability={report.win_probability:.6f}")
+    print(f"win_bounds=[{low:.6f}, {high:.6f}]")
+    print(f"defeat_probability={report.defeat_probability:.6f}")
+    print(f"unresolved_probability={report.unresolved_probability:.6f}")
+    print(f"expected_turns={report.expected_turns:.3f}")
+    print(f"states={report.states} peak_frontier={report.peak_frontier} steps={report.steps}")
+    print(f"solve_seconds={report.solve_seconds:.2f}")
+    if not report.conclusive:
+        print(
+            "警告：未解决的概率质量大于胜率，win_probability 只是下界，不是精确胜率。"
+            "请调大 --max-frontier / 调小 --prune-below，或用 --resolution 合并状态后重试；"
+            "需要估计值时请改用蒙特卡洛模拟（app.engine.simulator.simulate）。",
+            file=sys.stderr,
+        )
+        return 0 if args.allow_unresolved else 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.engine.sweep import SweepCache, format_table, grid, random_points, run_sweep
+
+DEFAULT_CACHE_DIR = BACKEND_ROOT / ".sweep_cache"
+
+
+def _parse_number(text: str) -> float:
+    value = float(text)
+    return int(value) if value.is_integer() and "." not in text else value
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="批量扫描平衡参数，按胜率/平均回合排序输出。")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=v1,v2,...")
+    parser.add_argument("--range", action="append", default=[], metavar="NAME=low:high")
+    parser.add_argument("--samples", type=int, default=0, help="配合 --range 随机抽取的点数")
+    parser.add_argument("--sample-seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--sort", choices=["win_rate", "avg_turns", "defeat_rate"], default="win_rate")
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        axes = {}
+        for item in args.grid:
+            name, values = item.split("=", 1)
+            axes[name] = [_parse_number(value) for value in values.split(",")]
+        ranges = {}
+        for item in args.range:
+            name, bounds = item.split("=", 1)
+            low, high = bounds.split(":", 1)
+            ranges[name] = (_parse_number(low), _parse_number(high))
+    except ValueError:
+        print("参数格式错误：--grid NAME=v1,v2 / --range NAME=low:high")
+        return 2
+
+    points = grid(axes) if axes else []
+    if ranges:
+        points.extend(random_points(ranges, args.samples or 10, seed=args.sample_seed))
+    if not points:
+        points = [{}]
+
+    cache = None if args.no_cache else SweepCache(args.cache_dir)
+    try:
+        results = run_sweep(points, runs=args.runs, seed=args.seed, cache=cache, workers=args.workers)
+    except ValueError as exc:
+        print(f"扫描失败: {exc}")
+        return 2
+
+    print(format_table(results, sort_by=args.sort, descending=not args.ascending))
+    fresh = sum(1 for result in results if not result.cached)
+    print(f"points={len(results)} computed={fresh} cached={len(results) - fresh}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
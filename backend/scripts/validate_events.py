@@ -100,7 +100,7 @@ def _validate_semantics(data_path: Path, data: dict[str, Any]) -> None:
         print(f"  file: {data_path}")
         print(f"  error: {exc}")
         print(
-            "  hint: 检查节点可达性、buffer 区进出边、route 与 location 是否一致，"
+            "  hint: 检查节点可达性、buffer 区进出边、route 与 location 是否一致、condition 与 effects 字段是否有效，"
             "以及所有 next/success_next/fail_next 是否指向存在节点。"
         )
         raise SystemExit(1) from exc
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import itertools
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.engine.batch_simulator import BatchSimulator, cross_check_batch, simulate_batch
+from app.engine.conditions import CONDITIONS
+from app.engine.runtime import GameEngine
+
+
+def test_batch_simulation_is_reproducible_for_same_seed() -> None:
+    first = simulate_batch(n=300, seed=5)
+    second = simulate_batch(n=300, seed=5)
+
+    assert first == second
+    assert first.runs == 300
+    assert first.wins + first.defeats + first.stuck_runs == 300
+
+
+def test_batch_win_and_defeat_rates_match_scalar_engine() -> None:
+    report = cross_check_batch(n=1200, seed=42, scalar_runs=400)
+
+    assert report.passed, report
+
+
+def test_batch_conditions_match_the_engine_on_every_condition() -> None:
+    template = GameEngine.headless()._initial_state("conditions", 1)
+    states = []
+    for chapter, longyou, food, collapsed, post_zhuge in itertools.product(
+        (1, 3, 5), (4, 5), (64, 65, 70), (False, True), (False, True)
+    ):
+        state = template.model_copy(deep=True)
+        state.chapter, state.longyou_turns, state.guanzhong_turns = chapter, longyou, longyou - 2
+        state.food, state.wei_pressure, state.longyou_collapsed = food, chapter, collapsed
+        state.flags["post_zhuge_era"] = post_zhuge
+        states.append(state)
+
+    batch = BatchSimulator(n=len(states))
+    for key, values in batch.stats.items():
+        values[:] = [getattr(state, key) for state in states]
+    batch.longyou_collapsed[:] = [state.longyou_collapsed for state in states]
+    batch._flag("post_zhuge_era")[:] = [state.flags["post_zhuge_era"] for state in states]
+
+    everyone = np.arange(len(states))
+    for name, check in CONDITIONS.items():
+        assert batch._condition(name, everyone).tolist() == [check(state) for state in states], name
+    with pytest.raises(ValueError, match="Unknown condition"):
+        batch._condition("chapter_is_9", everyone)
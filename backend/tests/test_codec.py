@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import random
+import sqlite3
+
+import pytest
+
+from app.engine.codec import CODEC_MAGIC, CODEC_VERSION, decode_session, encode_session
+from app.engine.repository import GameSession
+from app.engine.repository_sqlite import SQLiteRepository
+from app.engine.rng import new_rng
+from app.engine.runtime import GameEngine
+from app.engine.simulator import play_session
+from app.models.court import CourtBattleModifier, CourtHistoryEntry, CourtResolution, CourtResult
+from app.models.state import OptionView
+
+
+def _assert_round_trip(session: GameSession) -> GameSession:
+    restored = decode_session(encode_session(session))
+    assert restored.state.model_dump_json() == session.state.model_dump_json()
+    assert restored.state.zobrist_hash() == session.state.zobrist_hash()
+    assert restored.rng.getstate() == session.rng.getstate()
+    return restored
+
+
+@pytest.mark.parametrize("backend", ["mt", "counter"])
+def test_every_state_of_played_games_round_trips(backend) -> None:
+    engine = GameEngine.headless()
+    for seed in range(6):
+        session = GameSession(state=engine.new_session(f"g-{seed}", seed).state, rng=new_rng(seed, backend))
+        play_session(engine, session, random.Random(seed), on_action=lambda _state: _assert_round_trip(session))
+
+
+def test_decoded_session_plays_on_identically() -> None:
+    engine = GameEngine.headless()
+    original = engine.new_session("fork", 21)
+    for _ in range(5):
+        engine.act_session(original, "next_turn", {})
+    restored = decode_session(encode_session(original))
+
+    final = play_session(engine, original, random.Random(3))
+    replayed = play_session(engine, restored, random.Random(3))
+    assert replayed.model_dump() == final.model_dump()
+
+
+def test_randomized_states_round_trip() -> None:
+    engine = GameEngine.headless()
+    rng = random.Random(2024)
+    alphabet = "abcxyz_0\x00é诸葛亮🐎"
+
+    def text() -> str:
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+    for index in range(40):
+        session = engine.new_session(f"r-{index}", rng.randint(-(2**70), 2**70))
+        state = session.state
+        for name in ("food", "morale", "politics", "doom", "turn", "roll_count"):
+            setattr(state, name, rng.randint(-(2**31), 2**31 - 1))
+        state.route_progress = rng.uniform(-1, 1)
+        state.active_route_id = rng.choice([None, text()])
+        state.flags = {text() + str(n): rng.random() < 0.5 for n in range(rng.randint(0, 70))}
+        state.log = [text() for _ in range(rng.randint(0, 20))]
+        state.controlled_locations = [text() for _ in range(rng.randint(0, 5))]
+        state.current_event.options = [
+            OptionView(id=text(), label=text(), disabled=rng.random() < 0.5) for _ in range(rng.randint(0, 40))
+        ]
+
+        court = state.court
+        court.is_active = rng.random() < 0.5
+        court.resentment_event_fired = rng.random() < 0.5
+        court.momentum = rng.randint(-9, 9)
+        court.current_issue_tags = [text() for _ in range(rng.randint(0, 4))]
+        modifier = CourtBattleModifier(
+            id=text(),
+            title=text(),
+            description=text(),
+            turns_remaining=rng.randint(0, 4),
+            check_modifier=rng.uniform(-0.2, 0.2),
+            failure_penalty_doom=rng.randint(-3, 3),
+        )
+        court.active_modifier = rng.choice([None, modifier])
+        court.last_resolution = rng.choice(
+            [
+                None,
+                CourtResolution(
+                    session_id=rng.randint(0, 9),
+                    turn_resolved=rng.randint(0, 30),
+                    result=rng.choice(list(CourtResult)),
+                    summary=text(),
+                    support=rng.randint(0, 100),
+                    temperature=rng.randint(-50, 50),
+                    triggered_events=[text()],
+                    modifier=rng.choice([None, modifier]),
+                ),
+            ]
+        )
+        court.history = [
+            CourtHistoryEntry(
+                session_id=n,
+                turn_resolved=rng.randint(0, 30),
+                result=rng.choice(list(CourtResult)),
+                support=rng.randint(0, 100),
+                temperature=rng.randint(-50, 50),
+                modifier_id=rng.choice([None, text()]),
+            )
+            for n in range(rng.randint(0, 5))
+        ]
+        npc = court.npcs["wei_yan"]
+        npc.stance = rng.randint(-100, 100)
+        npc.resentment = rng.randint(0, 9)
+        if rng.random() < 0.5:
+            # Off-catalog profiles are stored in full.
+            npc.dialogue_style_tags = [text()]
+            court.npcs["guest"] = npc.model_copy(update={"id": "guest", "display_name": text()})
+        if rng.random() < 0.5:
+            session.rng.gauss(0, 1)
+
+        _assert_round_trip(session)
+
+
+def test_binary_blob_is_smaller_than_json_and_pickle() -> None:
+    engine = GameEngine.headless()
+    session = engine.new_session("size", 8)
+    play_session(engine, session, random.Random(8))
+    blob = encode_session(session)
+    assert len(blob) * 2 < len(session.serialize_state().encode("utf-8")) + len(session.serialize_rng())
+
+
+def test_malformed_blobs_are_rejected() -> None:
+    session = GameEngine.headless().new_session("bad", 1)
+    blob = encode_session(session)
+
+    with pytest.raises(ValueError, match="Not a session blob"):
+        decode_session(b"XYZ" + blob[3:])
+    with pytest.raises(ValueError, match="version"):
+        decode_session(CODEC_MAGIC + bytes([CODEC_VERSION + 1]) + blob[4:])
+    for cut in (2, 30, len(blob) // 2, len(blob) - 1):
+        with pytest.raises(ValueError):
+            decode_session(blob[:cut])
+
+    session.state.food = 2**31
+    with pytest.raises(ValueError, match="int32"):
+        encode_session(session)
+
+
+def test_sqlite_repository_reads_rows_in_either_codec(tmp_path) -> None:
+    db_path = str(tmp_path / "sessions.db")
+    repository = SQLiteRepository(db_path)
+    assert repository.codec == "json"
+    GameEngine(repository=repository).new_game(game_id="old", seed=4)
+    binary = GameEngine(repository=SQLiteRepository(db_path, codec="binary"))
+    binary.new_game(game_id="new", seed=4)
+
+    with sqlite3.connect(db_path) as conn:
+        rows = dict(conn.execute("SELECT game_id, state_json FROM sessions").fetchall())
+    assert isinstance(rows["old"], str)
+    assert rows["new"].startswith(CODEC_MAGIC)
+
+    for game_id in ("old", "new"):
+        binary.act(game_id, "next_turn", {})
+    old, new = binary.get_state("old"), binary.get_state("new")
+    assert old.model_dump(exclude={"game_id"}) == new.model_dump(exclude={"game_id"})
+    with pytest.raises(ValueError):
+        SQLiteRepository(db_path, codec="msgpack")
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import pickle
+from pathlib import Path
+
+from app.engine.graph import DEFAULT_GRAPH_PATH, default_snapshot_dir, graph_snapshot_key, load_graph
+
+
+def _copy_events(tmp_path: Path) -> Path:
+    path = tmp_path / "events.json"
+    path.write_bytes(DEFAULT_GRAPH_PATH.read_bytes())
+    return path
+
+
+def test_snapshot_is_written_then_reused(tmp_path: Path, monkeypatch) -> None:
+    path = _copy_events(tmp_path)
+    cache = tmp_path / "cache"
+
+    cold = load_graph(path, snapshot_dir=cache)
+    snapshots = list(cache.glob("events.*.graph.pickle"))
+    assert len(snapshots) == 1
+
+    def _no_validate(*args, **kwargs):
+        raise AssertionError("snapshot hit must not re-validate the model")
+
+    monkeypatch.setattr("app.engine.graph.GraphModel.model_validate", _no_validate)
+    warm = load_graph(path, snapshot_dir=cache)
+    assert warm.start_node == cold.start_node
+    assert warm.nodes == cold.nodes
+    assert warm.conditions.keys() == cold.conditions.keys()
+
+
+def test_snapshot_regenerates_when_source_changes(tmp_path: Path) -> None:
+    path = _copy_events(tmp_path)
+    cache = tmp_path / "cache"
+    load_graph(path, snapshot_dir=cache)
+    (old_snapshot,) = cache.glob("events.*.graph.pickle")
+
+    path.write_bytes(path.read_bytes() + b"\n")
+    load_graph(path, snapshot_dir=cache)
+
+    (new_snapshot,) = cache.glob("events.*.graph.pickle")
+    assert new_snapshot != old_snapshot
+    payload = pickle.loads(new_snapshot.read_bytes())
+    assert payload["key"] == graph_snapshot_key(path.read_bytes())
+
+
+def test_corrupt_or_mismatched_snapshot_is_a_miss(tmp_path: Path) -> None:
+    path = _copy_events(tmp_path)
+    cache = tmp_path / "cache"
+    load_graph(path, snapshot_dir=cache)
+    (snapshot,) = cache.glob("events.*.graph.pickle")
+
+    snapshot.write_bytes(b"not a pickle")
+    assert load_graph(path, snapshot_dir=cache).start_node
+    assert pickle.loads(snapshot.read_bytes())["key"] == graph_snapshot_key(path.read_bytes())
+
+    payload = pickle.loads(snapshot.read_bytes())
+    snapshot.write_bytes(pickle.dumps({"key": "0" * 64, "model": payload["model"]}))
+    load_graph(path, snapshot_dir=cache)
+    assert pickle.loads(snapshot.read_bytes())["key"] == graph_snapshot_key(path.read_bytes())
+
+
+def test_invalid_graph_is_loaded_but_not_snapshotted(tmp_path: Path) -> None:
+    data = json.loads(DEFAULT_GRAPH_PATH.read_text(encoding="utf-8-sig"))
+    data["nodes"] = [node for node in data["nodes"] if node["id"] != "WIN"]
+    path = tmp_path / "events.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    cache = tmp_path / "cache"
+    graph = load_graph(path, snapshot_dir=cache)
+    assert "WIN" not in graph.nodes
+    assert not list(cache.glob("*.graph.pickle"))
+
+
+def test_default_graph_snapshot_is_opt_in_and_outside_the_source_tree(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.delenv("GRAPH_SNAPSHOT", raising=False)
+    monkeypatch.delenv("GRAPH_SNAPSHOT_DIR", raising=False)
+    assert default_snapshot_dir() is None
+
+    monkeypatch.setenv("GRAPH_SNAPSHOT", "1")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    directory = default_snapshot_dir()
+    assert directory is not None and directory.is_relative_to(tmp_path)
+    assert not directory.is_relative_to(DEFAULT_GRAPH_PATH.parents[2])
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.assistant import court_dialogue
+from app.engine import hints
+from app.engine.hints import HintService
+from app.engine.locks import GameLocks
+from app.engine.repository import InMemoryRepository
+from app.engine.runtime import GameEngine
+
+
+def _engine_with_game(game_id: str = "hint-game", seed: int = 2024) -> GameEngine:
+    engine = GameEngine(repository=InMemoryRepository())
+    engine.new_game(game_id=game_id, seed=seed)
+    return engine
+
+
+def test_hint_scores_each_enabled_option_without_touching_the_session() -> None:
+    engine = _engine_with_game()
+    session = engine.repository.get("hint-game")
+    state_before = session.state.model_dump()
+    rng_before = session.rng.getstate()
+
+    view = HintService(engine).hint("hint-game", budget_ms=50)
+
+    assert view.node_id == state_before["current_node_id"]
+    assert {hint.option_id for hint in view.options} == {
+        option["id"] for option in state_before["current_event"]["options"] if not option["disabled"]
+    }
+    assert all(hint.rollouts >= 1 for hint in view.options)
+    assert view.recommended_option_id in {hint.option_id for hint in view.options}
+    assert session.state.model_dump() == state_before
+    assert session.rng.getstate() == rng_before
+
+
+def test_repeated_hint_for_same_state_is_served_from_cache() -> None:
+    engine = _engine_with_game()
+    service = HintService(engine)
+
+    first = service.hint("hint-game", budget_ms=20)
+    second = service.hint("hint-game", budget_ms=20)
+
+    assert not first.cached
+    assert second.cached
+    assert second.options == first.options
+
+
+def test_hint_requires_a_known_game() -> None:
+    with pytest.raises(KeyError):
+        HintService(GameEngine(repository=InMemoryRepository())).hint("missing")
+
+
+def test_cached_hint_is_not_reused_for_a_larger_budget() -> None:
+    engine = _engine_with_game()
+    service = HintService(engine)
+
+    service.hint("hint-game", budget_ms=20)
+    larger = service.hint("hint-game", budget_ms=60)
+    smaller = service.hint("hint-game", budget_ms=30)
+
+    assert not larger.cached
+    assert smaller.cached
+    assert smaller.budget_ms == 60
+
+
+def test_unsampled_options_report_no_win_rate(monkeypatch) -> None:
+    engine = _engine_with_game()
+    service = HintService(engine)
+    # Simulate a budget that expired before any rollout finished.
+    monkeypatch.setattr(service, "_run_inline", lambda state, option_ids, *_: dict.fromkeys(option_ids, (0, 0)))
+
+    view = service.hint("hint-game", budget_ms=20)
+
+    assert all(hint.win_rate is None for hint in view.options)
+    assert view.recommended_option_id is None
+
+
+def test_rollouts_never_call_the_model(monkeypatch) -> None:
+    engine = _engine_with_game()
+    seen: list[bool] = []
+    real_play_session = hints.play_session
+
+    def recording_play_session(*args, **kwargs):  # noqa: ANN002, ANN003
+        seen.append(court_dialogue._live_calls_allowed.get())
+        return real_play_session(*args, **kwargs)
+
+    monkeypatch.setattr(hints, "play_session", recording_play_session)
+    HintService(engine).hint("hint-game", budget_ms=20)
+
+    assert seen and not any(seen)
+    assert court_dialogue._live_calls_allowed.get()
+
+
+def test_hint_snapshots_the_state_under_the_game_lock() -> None:
+    engine = GameEngine(repository=InMemoryRepository(), locks=GameLocks())
+    engine.new_game(game_id="hint-game", seed=2024)
+    done = threading.Event()
+    worker = threading.Thread(target=lambda: (HintService(engine).hint("hint-game", budget_ms=20), done.set()))
+
+    with engine.locks.hold("hint-game"):
+        worker.start()
+        assert not done.wait(timeout=0.2)
+    worker.join(timeout=30)
+    assert done.is_set()
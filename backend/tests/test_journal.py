@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import random
+
+from app.engine.repository import InMemoryRepository
+from app.engine.runtime import GameEngine
+from app.engine.simulator import play_session
+
+
+class _FullDiffEngine(GameEngine):
+    """Checks every journaled state_diff against the full before/after model_dump comparison."""
+
+    checked = 0
+
+    def _apply_action(self, session, action, payload) -> None:
+        before = session.state.model_dump(mode="python")
+        start = len(session.diagnostics)
+        super()._apply_action(session, action, payload)
+        after = session.state.model_dump(mode="python")
+
+        expected = {key: {"before": value, "after": after[key]} for key, value in before.items() if value != after[key]}
+        recorded = [entry["changes"] for entry in session.diagnostics[start:] if entry["event"] == "state_diff"]
+        assert recorded == ([expected] if expected else [])
+        self.checked += 1
+
+
+def test_journaled_state_diff_matches_full_snapshot_diff() -> None:
+    engine = _FullDiffEngine(repository=InMemoryRepository())
+    for seed in range(6):
+        session = engine.new_session(game_id=f"journal-{seed}", seed=seed)
+        play_session(engine, session, random.Random(seed))
+    assert engine.checked > 50
+
+
+def test_failed_action_detaches_the_journal() -> None:
+    engine = GameEngine(repository=InMemoryRepository())
+    session = engine.new_session(game_id="journal-error", seed=1)
+
+    try:
+        engine.act_session(session, "choose_option", {"option_id": "no-such-option"})
+    except (KeyError, ValueError):
+        pass
+
+    assert session.state.__pydantic_private__["_journal"] is None
+    assert session.state.court.__pydantic_private__["_journal"] is None
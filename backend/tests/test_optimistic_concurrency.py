@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import routes
+from app.engine.locks import GameLocks
+from app.engine.repository import InMemoryRepository, SessionConflictError
+from app.engine.repository_cache import CachedRepository
+from app.engine.repository_events import EventSourcedRepository
+from app.engine.repository_sqlite import SQLiteRepository
+from app.engine.runtime import GameEngine
+from app.models.requests import ActRequest
+
+
+def test_second_of_two_racing_saves_conflicts(tmp_path) -> None:
+    repository = SQLiteRepository(str(tmp_path / "sessions.db"))
+    engine = GameEngine(repository=repository, locks=GameLocks())
+    engine.new_game(game_id="race", seed=5)
+
+    first = repository.get("race")
+    second = repository.get("race")
+    assert first.version == second.version
+
+    engine.act_session(first, "next_turn", {})
+    repository.save(first)
+    second.state.food = -1
+    with pytest.raises(SessionConflictError) as caught:
+        repository.save(second)
+    assert caught.value.game_id == "race"
+
+    stored = repository.get("race")
+    assert stored.version == first.version == second.version + 1
+    assert stored.state.model_dump() == first.state.model_dump()
+    assert stored.rng.getstate() == first.rng.getstate()
+
+
+def test_new_game_replaces_an_earlier_game_under_the_same_id(tmp_path) -> None:
+    repository = SQLiteRepository(str(tmp_path / "sessions.db"))
+    engine = GameEngine(repository=repository)
+    engine.new_game(game_id="again", seed=1)
+    engine.act("again", "next_turn", {})
+    stale = repository.get("again")
+
+    state = engine.new_game(game_id="again", seed=2)
+    assert state.seed == 2
+    replay = engine.get_replay("again")
+    assert replay["seed"] == 2
+    assert [entry["action"] for entry in replay["actions"]] == ["new_game"]
+
+    stale.state.food = -1
+    with pytest.raises(SessionConflictError):
+        repository.save(stale)
+
+
+def test_existing_database_gains_the_version_column(tmp_path) -> None:
+    db_path = str(tmp_path / "old.db")
+    seeded = GameEngine(repository=SQLiteRepository(db_path))
+    seeded.new_game(game_id="legacy", seed=3)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("ALTER TABLE sessions DROP COLUMN version")
+
+    engine = GameEngine(repository=SQLiteRepository(db_path))
+    assert engine.get_state("legacy").seed == 3
+    engine.act("legacy", "next_turn", {})
+    assert engine.repository.get("legacy").version == 1
+
+
+def test_event_sourced_saves_conflict_on_the_action_sequence(tmp_path) -> None:
+    repository = EventSourcedRepository(str(tmp_path / "events.db"))
+    engine = GameEngine(repository=repository)
+    engine.new_game(game_id="log", seed=7)
+
+    first = repository.get("log")
+    second = repository.get("log")
+    engine.act_session(first, "next_turn", {})
+    repository.save(first)
+    engine.act_session(second, "next_turn", {})
+    with pytest.raises(SessionConflictError):
+        repository.save(second)
+
+    engine.new_game(game_id="log", seed=8)
+    assert repository.get("log").state.seed == 8
+
+
+def test_write_through_cache_drops_a_stale_session_on_conflict(tmp_path) -> None:
+    db_path = str(tmp_path / "sessions.db")
+    worker_a = GameEngine(repository=CachedRepository(SQLiteRepository(db_path), mode="write_through"))
+    worker_b = GameEngine(repository=CachedRepository(SQLiteRepository(db_path), mode="write_through"))
+    worker_a.new_game(game_id="shared", seed=9)
+    worker_b.get_state("shared")
+
+    expected = worker_a.act("shared", "next_turn", {})
+    with pytest.raises(SessionConflictError):
+        worker_b.act("shared", "next_turn", {})
+    # The retry misses the cache and continues from worker A's save.
+    assert worker_b.get_state("shared").model_dump() == expected.model_dump()
+    worker_b.act("shared", "next_turn", {})
+
+
+def test_write_behind_refuses_a_shared_database(tmp_path) -> None:
+    db_path = str(tmp_path / "sessions.db")
+    other, refused = SQLiteRepository(db_path), SQLiteRepository(db_path)
+    with pytest.raises(RuntimeError, match="shared"):
+        CachedRepository(refused, mode="write_behind")
+    other.close()
+    refused.close()
+
+    cache = CachedRepository(SQLiteRepository(db_path), mode="write_behind", max_staleness=60)
+    with pytest.raises(RuntimeError, match="write-behind"):
+        SQLiteRepository(db_path)
+    cache.close()
+    SQLiteRepository(db_path).close()
+
+
+@pytest.mark.parametrize("db_path", [":memory:", ""])
+def test_private_databases_get_no_owner_sidecar(tmp_path, monkeypatch, db_path) -> None:
+    monkeypatch.chdir(tmp_path)
+    cache = CachedRepository(SQLiteRepository(db_path, pool_size=1), mode="write_behind", max_staleness=60)
+    GameEngine(repository=cache).new_game(game_id="private", seed=1)
+    cache.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_write_behind_flush_counts_the_saves_a_conflict_loses(tmp_path, caplog) -> None:
+    db_path = str(tmp_path / "sessions.db")
+    cache = CachedRepository(SQLiteRepository(db_path), mode="write_behind", max_staleness=60)
+    engine = GameEngine(repository=cache)
+    engine.new_game(game_id="contested", seed=1)
+    engine.new_game(game_id="quiet", seed=2)
+    cache.flush()
+
+    engine.act("contested", "next_turn", {})
+    engine.act("contested", "next_turn", {})
+    quiet = engine.act("quiet", "next_turn", {})
+    # A writer that bypasses the repository, which the sole-access claim cannot see.
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE sessions SET version = version + 1 WHERE game_id = 'contested'")
+    cache.flush()
+
+    assert (cache.conflicts, cache.lost_saves) == (1, 2)
+    assert "session_cache_write_conflict" in caplog.text
+    assert cache.backing.get("quiet").state.model_dump() == quiet.model_dump()
+    assert "contested" not in cache._sessions
+    cache.close()
+
+
+@pytest.mark.parametrize("backend", ["inmemory", "sqlite"])
+def test_game_locks_serialize_requests_for_one_game(tmp_path, backend) -> None:
+    repository = InMemoryRepository() if backend == "inmemory" else SQLiteRepository(str(tmp_path / "s.db"))
+    engine = GameEngine(repository=repository, locks=GameLocks())
+    engine.new_game(game_id="clicks", seed=4)
+    engine.new_game(game_id="other", seed=4)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: engine.act("clicks" if i % 2 else "other", "next_turn", {}), range(16)))
+
+    for game_id in ("clicks", "other"):
+        actions = [entry["action"] for entry in engine.get_replay(game_id)["actions"]]
+        assert actions.count("next_turn") == 8
+    assert len(engine.locks) == 0
+
+
+def test_game_locks_do_not_block_other_games() -> None:
+    locks = GameLocks()
+    acquired = threading.Event()
+
+    def hold_other() -> None:
+        with locks.hold("free"):
+            acquired.set()
+
+    with locks.hold("busy"):
+        worker = threading.Thread(target=hold_other)
+        worker.start()
+        assert acquired.wait(timeout=5)
+        worker.join(timeout=5)
+        assert len(locks) == 1
+    assert len(locks) == 0
+
+
+def test_conflict_maps_to_http_409(monkeypatch) -> None:
+    class RacingEngine:
+        def act(self, game_id, action, payload):  # noqa: ANN001
+            raise SessionConflictError(game_id)
+
+    monkeypatch.setattr(routes, "engine", RacingEngine())
+    with pytest.raises(HTTPException) as caught:
+        routes.act(ActRequest(game_id="g", action="next_turn", payload={}))
+    assert caught.value.status_code == 409
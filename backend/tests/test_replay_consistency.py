@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from app.engine.recorder import NullTraceRecorder
 from app.engine.runtime import GameEngine
 from app.models.state import Outcome
 
@@ -66,3 +67,37 @@ def test_replay_export_contains_diagnostics_and_action_history() -> None:
     assert any(item["level"] == "info" for item in replay["diagnostics"])
     assert any(item["level"] == "debug" for item in replay["diagnostics"])
     assert replay["actions"][0]["action"] == "new_game"
+
+
+def test_headless_session_matches_repository_backed_game() -> None:
+    seed = 4242
+    engine = GameEngine()
+    expected = _run_scripted_game(engine, game_id="headless-reference", seed=seed)
+
+    headless = GameEngine.headless(graph=engine.graph)
+    session = headless.new_session(game_id="headless-reference", seed=seed)
+    state = session.state
+    for _ in range(80):
+        if state.outcome != Outcome.ONGOING:
+            break
+        option_id = _pick_first_enabled_option(state)
+        if option_id is not None:
+            state = headless.act_session(session, "choose_option", {"option_id": option_id})
+        else:
+            state = headless.act_session(session, "next_turn", {})
+
+    assert headless.repository.get("headless-reference") is None
+    assert state.model_dump() == expected.model_dump()
+
+
+def test_null_recorder_skips_replay_data_without_changing_play() -> None:
+    seed = 31337
+    traced = _run_scripted_game(GameEngine(), game_id="traced", seed=seed)
+
+    engine = GameEngine(recorder=NullTraceRecorder())
+    untraced = _run_scripted_game(engine, game_id="traced", seed=seed)
+    replay = engine.get_replay("traced")
+
+    assert replay["actions"] == []
+    assert replay["diagnostics"] == []
+    assert untraced.model_dump() == traced.model_dump()
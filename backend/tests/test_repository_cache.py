@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import pytest
+
+from app.engine.repository import InMemoryRepository
+from app.engine.repository_cache import CachedRepository
+from app.engine.repository_events import EventSourcedRepository
+from app.engine.repository_sqlite import SQLiteRepository
+from app.engine.runtime import GameEngine
+from app.models.telemetry import ReplayView
+
+
+def _play(engines: list[GameEngine], game_id: str, seed: int, steps: int):
+    states = [engine.new_game(game_id=game_id, seed=seed) for engine in engines]
+    for _ in range(steps):
+        state = states[0]
+        if state.court.is_active:
+            action, payload = "court_statement", {"statement": "稳住朝局。", "strategy_hint": "appease"}
+        else:
+            enabled = [option.id for option in state.current_event.options if not option.disabled]
+            action, payload = ("choose_option", {"option_id": enabled[0]}) if enabled else ("next_turn", {})
+        states = [engine.act(game_id, action, payload) for engine in engines]
+    return states
+
+
+def _replay_json(engine: GameEngine, game_id: str) -> dict:
+    return ReplayView.model_validate(engine.get_replay(game_id)).model_dump(mode="json")
+
+
+def test_write_through_cache_serves_hits_and_persists_every_save(tmp_path) -> None:
+    db_path = str(tmp_path / "sessions.db")
+    reference = GameEngine(repository=InMemoryRepository())
+    cache = CachedRepository(SQLiteRepository(db_path), mode="write_through")
+    engine = GameEngine(repository=cache)
+
+    expected, state = _play([reference, engine], "g-wt", seed=11, steps=8)
+    assert state.model_dump() == expected.model_dump()
+    assert cache.hits >= 8
+    assert cache.misses == 0
+
+    stored = SQLiteRepository(db_path).get("g-wt")
+    assert stored is not None
+    assert stored.state.model_dump() == expected.model_dump()
+    assert _replay_json(engine, "g-wt") == _replay_json(reference, "g-wt")
+    cache.close()
+
+
+def test_write_behind_cache_defers_writes_until_flush(tmp_path) -> None:
+    db_path = str(tmp_path / "sessions.db")
+    reference = GameEngine(repository=InMemoryRepository())
+    cache = CachedRepository(SQLiteRepository(db_path), mode="write_behind", max_staleness=3600)
+    engine = GameEngine(repository=cache)
+
+    expected, _ = _play([reference, engine], "g-wb", seed=12, steps=6)
+    stored = cache.backing.get("g-wb")
+    assert stored is not None
+    assert stored.state.turn <= expected.turn
+    assert stored.state.model_dump() != expected.model_dump()
+
+    # Reading the replay lands the queued rows first.
+    assert _replay_json(engine, "g-wb") == _replay_json(reference, "g-wb")
+    stored = cache.backing.get("g-wb")
+    assert stored is not None
+    assert stored.state.model_dump() == expected.model_dump()
+    cache.close()
+
+
+def test_write_behind_cache_flushes_on_eviction_and_close(tmp_path) -> None:
+    db_path = str(tmp_path / "events.db")
+    backing = EventSourcedRepository(db_path, snapshot_interval=4)
+    cache = CachedRepository(backing, mode="write_behind", max_sessions=1, max_staleness=3600)
+    engine = GameEngine(repository=cache)
+    reference = GameEngine(repository=InMemoryRepository())
+
+    first, _ = _play([reference, engine], "g-first", seed=21, steps=5)
+    _play([engine], "g-second", seed=22, steps=1)
+    assert "g-first" not in cache._sessions
+    rebuilt = backing.get("g-first")
+    assert rebuilt is not None
+    assert rebuilt.state.model_dump() == first.model_dump()
+
+    second = engine.act("g-second", "next_turn", {})
+    cache.close()
+    rebuilt = EventSourcedRepository(db_path).get("g-second")
+    assert rebuilt is not None
+    assert rebuilt.state.model_dump() == second.model_dump()
+
+
+def test_rejected_action_does_not_poison_the_cached_event_log(tmp_path) -> None:
+    db_path = str(tmp_path / "events.db")
+    cache = CachedRepository(EventSourcedRepository(db_path), mode="write_through")
+    engine = GameEngine(repository=cache)
+    engine.new_game(game_id="g", seed=3)
+
+    with pytest.raises(ValueError):
+        engine.act("g", "choose_option", {"option_id": "nope"})
+    assert "g" not in cache._sessions
+    state = engine.act("g", "next_turn", {})
+
+    rebuilt = EventSourcedRepository(db_path).get("g")
+    assert rebuilt is not None
+    assert rebuilt.state.model_dump() == state.model_dump()
+
+
+def test_cache_requires_per_game_locks(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("GAME_LOCKS", "0")
+    cache = CachedRepository(SQLiteRepository(str(tmp_path / "sessions.db")), mode="write_through")
+    with pytest.raises(ValueError, match="GAME_LOCKS"):
+        GameEngine(repository=cache)
+    assert GameEngine(repository=SQLiteRepository(str(tmp_path / "plain.db"))).locks is None
+
+
+def test_write_behind_new_game_drops_queued_writes_of_the_earlier_game(tmp_path, caplog) -> None:
+    db_path = str(tmp_path / "sessions.db")
+    cache = CachedRepository(SQLiteRepository(db_path), mode="write_behind", max_staleness=60)
+    engine = GameEngine(repository=cache)
+    engine.new_game(game_id="g-again", seed=1)
+    engine.act("g-again", "next_turn", {})
+
+    state = engine.new_game(game_id="g-again", seed=2)
+    cache.close()
+    assert "session_cache_write_conflict" not in caplog.text
+
+    stored = SQLiteRepository(db_path).get("g-again")
+    assert stored is not None
+    assert stored.state.model_dump() == state.model_dump()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import pytest
+
+from app.assistant import court_dialogue
+from app.engine.repository import InMemoryRepository
+from app.engine.repository_events import EventSourcedRepository
+from app.engine.runtime import GameEngine
+from app.models.state import Outcome
+
+
+def _next_action(state) -> tuple[str, dict]:
+    if state.court.is_active:
+        return "court_statement", {"statement": "稳住朝局，先安民心。", "strategy_hint": "appease"}
+    for option in state.current_event.options:
+        if not option.disabled:
+            return "choose_option", {"option_id": option.id}
+    return "next_turn", {}
+
+
+def _snapshot_rows(repo: EventSourcedRepository, game_id: str) -> list[int]:
+    with repo._connection() as conn:
+        rows = conn.execute(
+            "SELECT action_seq FROM snapshots WHERE game_id = ? ORDER BY action_seq", (game_id,)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def test_event_sourced_sessions_rebuild_to_the_live_state(tmp_path) -> None:
+    db_path = str(tmp_path / "events.db")
+    reference = GameEngine(repository=InMemoryRepository())
+    engine = GameEngine(repository=EventSourcedRepository(db_path, snapshot_interval=4))
+
+    expected = reference.new_game(game_id="g-es", seed=99)
+    engine.new_game(game_id="g-es", seed=99)
+    for _ in range(30):
+        if expected.outcome != Outcome.ONGOING:
+            break
+        action, payload = _next_action(expected)
+        expected = reference.act("g-es", action, payload)
+        state = engine.act("g-es", action, payload)
+        assert state.model_dump() == expected.model_dump()
+
+    restarted = EventSourcedRepository(db_path, snapshot_interval=4)
+    rebuilt = restarted.get("g-es")
+    assert rebuilt is not None
+    assert rebuilt.state.model_dump() == expected.model_dump()
+    assert rebuilt.serialize_rng() == reference.repository.get("g-es").serialize_rng()
+
+    actions = reference.get_replay("g-es")["actions"]
+    assert rebuilt.stored_actions == len(actions)
+    assert [item["action"] for item in GameEngine(repository=restarted).get_replay("g-es")["actions"]] == [
+        item["action"] for item in actions
+    ]
+
+    snapshots = _snapshot_rows(restarted, "g-es")
+    assert snapshots[:2] == [0, 1]
+    assert len(snapshots) <= 2 + len(actions) // 4
+    with restarted._connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+
+
+def test_event_sourced_state_at_returns_point_in_time_states(tmp_path) -> None:
+    repo = EventSourcedRepository(str(tmp_path / "events.db"), snapshot_interval=3)
+    engine = GameEngine(repository=repo)
+    states = [engine.new_game(game_id="g-pit", seed=5).model_copy(deep=True)]
+    for _ in range(7):
+        action, payload = _next_action(states[-1])
+        states.append(engine.act("g-pit", action, payload).model_copy(deep=True))
+
+    for count, expected in enumerate(states, start=1):
+        rebuilt = repo.state_at("g-pit", count)
+        assert rebuilt is not None
+        assert rebuilt.model_dump() == expected.model_dump()
+    assert repo.state_at("missing", 3) is None
+
+    repo.reset("g-pit")
+    assert repo.get("g-pit") is None
+
+
+def test_event_sourced_save_snapshots_after_a_model_call(tmp_path) -> None:
+    repo = EventSourcedRepository(str(tmp_path / "events.db"), snapshot_interval=100)
+    engine = GameEngine(repository=repo)
+    state = engine.new_game(game_id="g-model", seed=3)
+    action, payload = _next_action(state)
+    engine.act("g-model", action, payload)
+    assert _snapshot_rows(repo, "g-model") == [0, 1]
+
+    court_dialogue._live_calls_made.set(1)
+    action, payload = _next_action(engine.get_state("g-model"))
+    engine.act("g-model", action, payload)
+    assert _snapshot_rows(repo, "g-model") == [0, 1, 3]
+    assert court_dialogue.take_live_call_count() == 0
+
+
+def test_model_call_while_entering_court_snapshots_the_next_action(tmp_path, monkeypatch) -> None:
+    repo = EventSourcedRepository(str(tmp_path / "events.db"), snapshot_interval=100)
+    engine = GameEngine(repository=repo)
+    state = engine.new_game(game_id="g-court", seed=3)
+    state = engine.act("g-court", *_next_action(state))
+    action, payload = _next_action(state)
+    before = _snapshot_rows(repo, "g-court")
+
+    real_ensure_court_session = engine._ensure_court_session
+    entered: list[bool] = []
+
+    def enter_court_with_the_model(session) -> bool:  # noqa: ANN001
+        if entered:
+            return real_ensure_court_session(session)
+        # The check act makes before the action: the court opens and its lines come from the model.
+        entered.append(True)
+        court_dialogue._live_calls_made.set(1)
+        return True
+
+    monkeypatch.setattr(engine, "_ensure_court_session", enter_court_with_the_model)
+    engine.act("g-court", action, payload)
+
+    assert _snapshot_rows(repo, "g-court") == before + [3]
+    assert repo.get("g-court").unsnapshotted_model_calls == 0
+
+
+def test_rejected_actions_are_not_logged(tmp_path) -> None:
+    db_path = str(tmp_path / "events.db")
+    repo = EventSourcedRepository(db_path)
+    engine = GameEngine(repository=repo)
+    engine.new_game(game_id="g-reject", seed=5)
+
+    session = repo.get("g-reject")
+    with pytest.raises(ValueError):
+        engine.act_session(session, "choose_option", {"option_id": "nope"})
+    engine.act_session(session, "next_turn", {})
+    repo.save(session)
+
+    rebuilt = EventSourcedRepository(db_path).get("g-reject")
+    assert rebuilt is not None
+    assert rebuilt.state.model_dump() == session.state.model_dump()
+    assert [item["action"] for item in engine.get_replay("g-reject")["actions"]] == ["new_game", "next_turn"]
+
+
+def test_unreplayable_log_names_the_game_and_action(tmp_path) -> None:
+    repo = EventSourcedRepository(str(tmp_path / "events.db"))
+    GameEngine(repository=repo).new_game(game_id="g-broken", seed=5)
+    with repo._connection() as conn:
+        conn.execute(
+            "INSERT INTO actions (game_id, seq, action, payload_json) VALUES ('g-broken', 1, 'choose_option', ?)",
+            ('{"option_id": "nope"}',),
+        )
+
+    with pytest.raises(RuntimeError, match="g-broken.*action 1 \\(choose_option\\)"):
+        repo.get("g-broken")
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import pytest
+
+from app.engine.repository import (
+    ACTION_ENTRY_BYTES,
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_SESSIONS,
+    SESSION_BASE_BYTES,
+    TRACE_ENTRY_BYTES,
+    InMemoryRepository,
+    estimate_session_bytes,
+)
+from app.engine.runtime import GameEngine
+from app.models.state import Outcome
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _engine(**limits) -> tuple[GameEngine, InMemoryRepository]:
+    repository = InMemoryRepository(**limits)
+    return GameEngine(repository=repository), repository
+
+
+def test_max_sessions_evicts_least_recently_used() -> None:
+    engine, repository = _engine(max_sessions=2, ttl_seconds=0, max_bytes=0)
+    engine.new_game(game_id="a", seed=1)
+    engine.new_game(game_id="b", seed=2)
+    engine.get_state("a")
+    engine.new_game(game_id="c", seed=3)
+
+    assert repository.get("b") is None
+    assert repository.get("a") is not None
+    assert repository.get("c") is not None
+    stats = repository.stats()
+    assert stats["sessions"] == 2
+    assert stats["evictions"] == 1
+    assert stats["misses"] == 1
+    with pytest.raises(KeyError):
+        engine.get_state("b")
+
+
+def test_idle_sessions_expire_after_ttl() -> None:
+    clock = FakeClock()
+    engine, repository = _engine(max_sessions=0, ttl_seconds=60, max_bytes=0, clock=clock)
+    engine.new_game(game_id="idle", seed=1)
+    clock.now = 30
+    engine.new_game(game_id="busy", seed=2)
+    clock.now = 61
+    engine.act("busy", "next_turn", {})
+
+    assert repository.get("idle") is None
+    assert repository.get("busy") is not None
+    assert repository.expirations == 1
+    clock.now = 200
+    assert repository.get("busy") is None
+    assert repository.stats() == {
+        "sessions": 0,
+        "bytes": 0,
+        "hits": 2,
+        "misses": 2,
+        "evictions": 0,
+        "expirations": 2,
+    }
+
+
+def test_byte_budget_tracks_growth_and_keeps_the_saved_session() -> None:
+    engine, repository = _engine(max_sessions=0, ttl_seconds=0, max_bytes=0)
+    engine.new_game(game_id="old", seed=1)
+    engine.new_game(game_id="new", seed=2)
+    sizes = [estimate_session_bytes(repository.get(game_id)) for game_id in ("old", "new")]
+    assert repository.total_bytes == sum(sizes)
+
+    repository.max_bytes = sum(sizes) + TRACE_ENTRY_BYTES
+    for _ in range(3):
+        engine.act("new", "next_turn", {})
+    session = repository.get("new")
+    assert estimate_session_bytes(session) == (
+        SESSION_BASE_BYTES
+        + len(session.diagnostics) * TRACE_ENTRY_BYTES
+        + len(session.action_history) * ACTION_ENTRY_BYTES
+    )
+    # Growing "new" past the budget pushes out "old", never "new" itself.
+    assert repository.get("old") is None
+    assert repository.evictions == 1
+    assert repository.total_bytes == estimate_session_bytes(session)
+
+    repository.reset("new")
+    assert repository.stats()["bytes"] == 0
+
+
+def test_limits_default_from_environment(monkeypatch) -> None:
+    monkeypatch.setenv("INMEMORY_MAX_SESSIONS", "7")
+    monkeypatch.setenv("INMEMORY_SESSION_TTL", "0")
+    monkeypatch.setenv("INMEMORY_MAX_BYTES", "0")
+    repository = InMemoryRepository()
+    assert (repository.max_sessions, repository.ttl_seconds, repository.max_bytes) == (7, 0.0, 0)
+    with pytest.raises(ValueError):
+        InMemoryRepository(max_sessions=-1)
+
+
+def test_byte_pressure_evicts_finished_games_before_an_active_one() -> None:
+    engine, repository = _engine(max_sessions=0, ttl_seconds=0, max_bytes=0)
+    engine.new_game(game_id="active", seed=1)
+    repository.max_bytes = 3 * estimate_session_bytes(repository.get("active")) + TRACE_ENTRY_BYTES
+
+    for index in range(6):
+        game_id = f"finished-{index}"
+        engine.new_game(game_id=game_id, seed=index)
+        session = repository.get(game_id)
+        session.state.outcome = Outcome.DEFEAT_SHU
+        repository.save(session)
+
+    # "active" is the least recently used entry, yet only finished games were evicted.
+    assert repository.get("active") is not None
+    assert repository.evictions == 4
+    assert repository.get("finished-4") is not None
+    assert repository.get("finished-5") is not None
+    engine.act("active", "next_turn", {})
+
+
+def test_default_byte_budget_fits_the_default_session_count() -> None:
+    finished_game_bytes = 1_000_000
+    assert DEFAULT_MAX_BYTES >= DEFAULT_MAX_SESSIONS * finished_game_bytes
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
 import random
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
+import pytest
+
+from app.engine.repository import InMemoryRepository
 from app.engine.repository_sqlite import SQLiteRepository
+from app.engine.runtime import GameEngine
 from app.models.state import EventView, GameState, Outcome, Phase
+from app.models.telemetry import ReplayView
 
 
 def _make_state(game_id: str, seed: int = 123) -> GameState:
@@ -105,3 +112,107 @@ def test_sqlite_repository_rng_sequence_continuity(tmp_path) -> None:
 
     for _ in range(3):
         assert loaded.rng.random() == expected_rng.random()
+
+
+def test_sqlite_repository_reuses_pooled_connections_with_pragmas(tmp_path) -> None:
+    repo = SQLiteRepository(str(tmp_path / "sessions.db"), synchronous="normal", cache_size=-2000, mmap_size=0)
+    repo.create(_make_state("g-pool"))
+
+    with repo._connection() as conn:
+        first = conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2000
+
+    for _ in range(5):
+        assert repo.get("g-pool") is not None
+    with repo._connection() as conn:
+        assert conn is first
+    assert repo._opened == 1
+    repo.close()
+
+
+def test_sqlite_repository_pool_is_bounded_under_concurrency(tmp_path) -> None:
+    repo = SQLiteRepository(str(tmp_path / "sessions.db"), pool_size=3)
+
+    def play(index: int) -> int:
+        session = repo.create(_make_state(f"g-{index}", seed=index))
+        for turn in range(2, 6):
+            session.state.turn = turn
+            repo.save(session)
+        loaded = repo.get(f"g-{index}")
+        assert loaded is not None
+        return loaded.state.turn
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(play, range(24))) == [5] * 24
+    assert repo._opened <= 3
+    repo.close()
+
+
+def test_sqlite_repository_close_releases_connections(tmp_path) -> None:
+    repo = SQLiteRepository(str(tmp_path / "sessions.db"))
+    repo.create(_make_state("g-close"))
+    with repo._connection() as conn:
+        held = conn
+    repo.close()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        held.execute("SELECT 1")
+    with pytest.raises(RuntimeError):
+        repo.get("g-close")
+
+    with pytest.raises(ValueError):
+        SQLiteRepository(str(tmp_path / "other.db"), synchronous="sometimes")
+
+
+def test_sqlite_replay_survives_restart_and_appends_only_new_entries(tmp_path) -> None:
+    db_path = str(tmp_path / "sessions.db")
+    reference = GameEngine(repository=InMemoryRepository())
+    engine = GameEngine(repository=SQLiteRepository(db_path))
+
+    states = [reference.new_game(game_id="g-replay", seed=31), engine.new_game(game_id="g-replay", seed=31)]
+    for _ in range(6):
+        options = [option.id for option in states[0].current_event.options if not option.disabled]
+        action, payload = ("choose_option", {"option_id": options[0]}) if options else ("next_turn", {})
+        states = [reference.act("g-replay", action, payload), engine.act("g-replay", action, payload)]
+
+    repo = SQLiteRepository(db_path)
+    with repo._connection() as conn:
+        action_rows = conn.execute("SELECT COUNT(*) FROM actions WHERE game_id = 'g-replay'").fetchone()[0]
+        trace_rows = conn.execute("SELECT COUNT(*) FROM traces WHERE game_id = 'g-replay'").fetchone()[0]
+    expected = reference.get_replay("g-replay")
+    assert action_rows == len(expected["actions"])
+    assert trace_rows == len(expected["diagnostics"])
+
+    restarted = GameEngine(repository=repo)
+    replay = restarted.get_replay("g-replay")
+    assert ReplayView.model_validate(replay).model_dump(mode="json") == ReplayView.model_validate(expected).model_dump(
+        mode="json"
+    )
+
+    loaded = repo.get("g-replay")
+    assert loaded is not None
+    assert loaded.action_history == [] and loaded.diagnostics == []
+    repo.save(loaded)
+    with repo._connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM actions WHERE game_id = 'g-replay'").fetchone()[0] == action_rows
+
+    repo.reset("g-replay")
+    with repo._connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM traces").fetchone()[0] == 0
+
+
+def test_new_game_with_a_reused_id_starts_a_fresh_replay(tmp_path) -> None:
+    reference = GameEngine(repository=InMemoryRepository())
+    engine = GameEngine(repository=SQLiteRepository(str(tmp_path / "sessions.db")))
+    for seed in (41, 42):
+        for target in (reference, engine):
+            target.new_game(game_id="g-reused", seed=seed)
+            target.act("g-reused", "next_turn", {})
+
+    replay = engine.get_replay("g-reused")
+    assert replay["seed"] == 42
+    assert replay == reference.get_replay("g-reused")
+    with engine.repository._connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM actions WHERE game_id = 'g-reused'").fetchone()[0] == 2
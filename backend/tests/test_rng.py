@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import random
+
+from app.engine.repository import GameSession
+from app.engine.repository_sqlite import SQLiteRepository
+from app.engine.rng import CounterRandom, deserialize_rng, serialize_rng
+from app.engine.runtime import GameEngine
+from app.models.state import Outcome
+
+
+def test_jump_reaches_any_draw_without_replaying_earlier_ones() -> None:
+    rng = CounterRandom(2024)
+    draws = [rng.random() for _ in range(50)]
+
+    jumped = CounterRandom(2024)
+    jumped.jump(37)
+
+    assert jumped.random() == draws[37]
+    assert CounterRandom(2024, 12).random() == draws[12]
+
+
+def test_counter_state_serializes_to_a_short_tag_and_resumes() -> None:
+    rng = CounterRandom(77)
+    for _ in range(6):
+        rng.uniform(-4.0, 4.0)
+    text = serialize_rng(rng)
+    restored = deserialize_rng(text)
+
+    assert text == "ctr1:77:6"
+    assert [restored.random() for _ in range(3)] == [rng.random() for _ in range(3)]
+
+
+def test_untagged_legacy_mersenne_state_still_loads() -> None:
+    legacy = random.Random(77)
+    legacy.random()
+    text = serialize_rng(legacy)
+
+    restored = deserialize_rng(text)
+
+    assert type(restored) is random.Random
+    assert restored.random() == legacy.random()
+
+
+def test_counter_backend_game_resumes_identically_from_sqlite(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("RNG_BACKEND", "counter")
+    engine = GameEngine(repository=SQLiteRepository(str(tmp_path / "sessions.db")))
+    reference = GameEngine.headless().new_session(game_id="ctr", seed=9)
+    engine.new_game(game_id="ctr", seed=9)
+    assert isinstance(reference.rng, CounterRandom)
+
+    for _ in range(12):
+        state = engine.act("ctr", "next_turn")
+        expected = GameEngine.headless().act_session(reference, "next_turn")
+        assert state.zobrist_hash() == expected.zobrist_hash()
+        assert state.roll_count == expected.roll_count
+        if state.outcome != Outcome.ONGOING:
+            break
+
+    actions = engine.get_replay("ctr")["actions"]
+    assert all(isinstance(item["rng_index"], int) for item in actions)
+    loaded = engine.repository.get("ctr")
+    assert loaded.rng.counter == reference.rng.counter
+    assert GameSession.from_serialized(loaded.serialize_state(), loaded.serialize_rng()).rng.counter == loaded.rng.counter
@@ -1,10 +1,114 @@
 ﻿from __future__ import annotations
 
-from app.engine.simulator import simulate
+import io
+import json
 
+from app.engine.runtime import GameEngine
+from app.engine.simulator import (
+    TERMINATION_DOOM_CHAIN,
+    TERMINATION_POST_ZHUGE,
+    TERMINATION_TURN_CAP,
+    TERMINATION_WIN,
+    SimulationSummary,
+    classify_termination,
+    clopper_pearson_interval,
+    iter_runs,
+    shard_ranges,
+    simulate,
+    simulate_adaptive,
+    simulate_range,
+    wilson_interval,
+    write_jsonl,
+)
 
-def test_simulate_runs_without_stuck_and_winrate_in_target_band() -> None:
+
+def test_simulate_reports_stuck_runs_and_winrate_in_target_band() -> None:
     summary = simulate(n=2000, seed=42)
 
-    assert summary.stuck_runs == 0
+    # Runs still ongoing after the turn cap are surfaced instead of being counted as defeats.
+    assert summary.stuck_runs == summary.terminations.get(TERMINATION_TURN_CAP, 0)
+    assert summary.wins + summary.defeats + summary.stuck_runs == summary.runs
+    assert summary.stuck_runs <= summary.runs // 50
     assert 0.015 <= summary.win_rate <= 0.08
+
+
+def test_simulate_parallel_workers_match_serial_run() -> None:
+    serial = simulate(n=24, seed=7)
+    parallel = simulate(n=24, seed=7, workers=3)
+
+    assert parallel == serial
+
+
+def test_iter_runs_records_agree_with_simulate_summary() -> None:
+    records = list(iter_runs(n=20, seed=3))
+    summary = simulate(n=20, seed=3)
+
+    assert [record.seed for record in records] == [3 + i for i in range(20)]
+    assert sum(record.outcome == "WIN" for record in records) == summary.wins
+    assert sum(record.turns for record in records) == summary.total_turns
+    assert all(record.checks for record in records)
+    assert all(record.peak_doom >= 0 for record in records)
+
+
+def test_write_jsonl_streams_one_line_per_run() -> None:
+    buffer = io.StringIO()
+    count = write_jsonl(iter_runs(n=5, seed=11), buffer)
+
+    lines = buffer.getvalue().splitlines()
+    assert count == 5
+    assert len(lines) == 5
+    first = json.loads(lines[0])
+    assert first["seed"] == 11
+    assert first["terminal_node"] in {"WIN", "DEFEAT_SHU"} or first["outcome"] == "ONGOING"
+
+
+def test_adaptive_simulation_stops_once_band_is_decided() -> None:
+    result = simulate_adaptive(seed=42, band=(0.015, 0.08), batch=250)
+
+    assert result.stop_reason == "inside_band"
+    assert result.runs < 2000
+    assert result.summary == simulate(n=result.runs, seed=42)
+    assert 0.015 <= result.win_rate_low <= result.win_rate_high <= 0.08
+
+
+def test_binomial_intervals_match_reference_values() -> None:
+    low, high = clopper_pearson_interval(0, 10)
+    assert low == 0.0
+    assert abs(high - (1 - 0.025 ** (1 / 10))) < 1e-9
+
+    wilson_low, wilson_high = wilson_interval(93, 2000)
+    exact_low, exact_high = clopper_pearson_interval(93, 2000)
+    assert wilson_low < 93 / 2000 < wilson_high
+    assert abs(wilson_low - exact_low) < 0.002
+    assert abs(wilson_high - exact_high) < 0.002
+
+
+def test_summary_breaks_down_every_run_by_termination() -> None:
+    summary = simulate(n=40, seed=42)
+
+    assert sum(summary.terminations.values()) == summary.runs
+    assert summary.terminations.get(TERMINATION_WIN, 0) == summary.wins
+    assert summary.terminations.get(TERMINATION_TURN_CAP, 0) == summary.stuck_runs
+    for termination, nodes in summary.last_nodes.items():
+        assert sum(nodes.values()) == summary.terminations[termination]
+
+
+def test_classify_termination_distinguishes_turn_cap_and_doom_chain() -> None:
+    state = GameEngine.headless().new_session(game_id="classify", seed=1).state
+    assert classify_termination(state) == TERMINATION_TURN_CAP
+
+    state.outcome = state.outcome.DEFEAT_SHU
+    assert classify_termination(state, "doom_total_offensive") == TERMINATION_DOOM_CHAIN
+
+    state.flags["post_zhuge_era"] = True
+    assert classify_termination(state, "doom_total_offensive") == TERMINATION_DOOM_CHAIN
+    assert classify_termination(state, "final_route_choice") == TERMINATION_POST_ZHUGE
+
+
+def test_simulate_range_shards_merge_into_the_whole_batch() -> None:
+    shards = shard_ranges(60, 4)
+    assert shards[0][0] == 0 and shards[-1][1] == 60
+    assert all(stop == start for (_, stop), (start, _) in zip(shards, shards[1:]))
+
+    merged = SimulationSummary.merge([simulate_range(42, start, stop) for start, stop in shards])
+    assert merged == simulate(n=60, seed=42)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from app.engine.checks import probability_for_check
+from app.engine.effects import apply_effects
+from app.engine.graph import EventGraph
+from app.engine.runtime import GameEngine
+from app.engine.solver import CourtModel, ExactSolver
+from app.models.event_graph import GraphModel
+
+FIRST_SUCCESS = {"delta": {"longyou_turns": 1, "morale": 3, "wei_pressure": 1}}
+
+
+def _check_chain_graph() -> EventGraph:
+    meta = {"location": "jieting"}
+    return EventGraph(
+        GraphModel.model_validate(
+            {
+                "start_node": "first",
+                "nodes": [
+                    {
+                        "id": "first",
+                        "node_type": "check",
+                        "chapter": 1,
+                        "phase": "campaign",
+                        "text": "",
+                        "check": "jieting_veteran",
+                        "success_next": "second",
+                        "fail_next": "DEFEAT_SHU",
+                        "success_effects": FIRST_SUCCESS,
+                        "meta": meta,
+                    },
+                    {
+                        "id": "second",
+                        "node_type": "check",
+                        "chapter": 1,
+                        "phase": "campaign",
+                        "text": "",
+                        "check": "jieting_masu",
+                        "success_next": "WIN",
+                        "fail_next": "DEFEAT_SHU",
+                        "meta": meta,
+                    },
+                    {"id": "WIN", "node_type": "terminal", "text": "", "outcome": "WIN", "meta": meta},
+                    {"id": "DEFEAT_SHU", "node_type": "terminal", "text": "", "outcome": "DEFEAT_SHU", "meta": meta},
+                ],
+            }
+        )
+    )
+
+
+def test_solver_matches_hand_computed_check_chain() -> None:
+    graph = _check_chain_graph()
+    state = GameEngine.headless(graph=graph)._initial_state("expected", 1)
+    first = probability_for_check("jieting_veteran", state)
+    apply_effects(state, FIRST_SUCCESS)
+    second = probability_for_check("jieting_masu", state)
+
+    report = ExactSolver(graph=graph).solve()
+
+    assert abs(report.win_probability - first * second) < 1e-12
+    assert abs(report.defeat_probability - (1.0 - first * second)) < 1e-12
+    assert report.unresolved_probability == 0.0
+    assert report.expected_turns == 1.0
+
+
+def test_bounded_solve_on_default_graph_accounts_for_all_mass() -> None:
+    report = ExactSolver(court_model=CourtModel(samples=8), max_frontier=200, max_steps=25).solve()
+
+    total = report.win_probability + report.defeat_probability + report.unresolved_probability
+    assert abs(total - 1.0) < 1e-9
+    assert report.states > 0
+    assert report.steps == 25
+    low, high = report.win_bounds
+    assert low == report.win_probability and abs(high - (low + report.unresolved_probability)) < 1e-15
+    # Twenty-five steps resolve far less than the win mass; the report must not pass as converged.
+    assert not report.conclusive
+
+
+def test_materialized_states_do_not_share_containers_with_the_template() -> None:
+    solver = ExactSolver(graph=_check_chain_graph())
+    key = solver._key(solver._state_template)
+
+    mutated = solver._materialize(key)
+    mutated.log.append("leak")
+    mutated.flags["leak"] = True
+    mutated.court.current_issue_tags.append("leak")
+    mutated.court.npcs["leak"] = None
+    mutated.current_event.options.append(None)
+
+    fresh = solver._materialize(key)
+    assert fresh.log == [] and "leak" not in fresh.flags
+    assert fresh.court.current_issue_tags == [] and fresh.court.npcs == {}
+    assert fresh.current_event.options == []
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _modules_after(statement: str) -> set[str]:
+    completed = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{statement}\nprint('\\n'.join(sys.modules))"],
+        cwd=BACKEND_ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return set(completed.stdout.split())
+
+
+def test_importing_the_app_does_not_load_the_http_client() -> None:
+    modules = _modules_after("import app.main")
+    assert "app.api.routes" in modules
+    assert "httpx" not in modules
+    assert "app.assistant.court_dialogue" not in modules
+
+
+def test_court_dialogue_service_is_built_on_first_use() -> None:
+    from app.engine import court
+
+    court._court_dialogue.cache_clear()
+    assert court._court_dialogue.cache_info().currsize == 0
+    service = court._court_dialogue()
+    assert court._court_dialogue() is service
+    assert service._http_client is None
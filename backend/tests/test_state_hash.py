@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.engine.repository import GameSession
+from app.engine.runtime import GameEngine
+from app.engine.simulator import play_session
+from app.models import zobrist
+
+
+def test_incremental_hash_matches_full_recomputation_through_whole_games(monkeypatch) -> None:
+    monkeypatch.setattr(zobrist, "VERIFY", True)
+    engine = GameEngine.headless()
+    for seed in range(5):
+        session = engine.new_session(game_id=f"hash-{seed}", seed=seed)
+        seen = {session.state.zobrist_hash()}
+
+        def check(state) -> None:
+            seen.add(state.zobrist_hash())
+
+        play_session(engine, session, random.Random(seed), on_action=check)
+        assert len(seen) > 1
+
+
+def test_hash_ignores_ids_and_logs_but_not_mechanics() -> None:
+    engine = GameEngine.headless()
+    first = engine.new_session(game_id="a", seed=1).state
+    second = engine.new_session(game_id="b", seed=2).state
+    second.log.append("different history")
+    assert first.zobrist_hash() == second.zobrist_hash()
+
+    original = first.zobrist_hash()
+    first.food += 1
+    assert first.zobrist_hash() != original
+    first.food -= 1
+    first.flags["jieting_held"] = True
+    assert first.zobrist_hash() != original
+    first.flags["jieting_held"] = False
+    first.court.npcs["wei_yan"].resentment += 1
+    assert first.zobrist_hash() != original
+    first.court.npcs["wei_yan"].resentment -= 1
+    assert first.zobrist_hash() == original
+
+
+def test_hash_survives_copies_and_serialization() -> None:
+    session = GameEngine.headless().new_session(game_id="copy", seed=3)
+    state = session.state
+    state.morale -= 5
+    expected = state.zobrist_hash()
+
+    assert state.model_copy(deep=True).zobrist_hash() == expected
+    assert state.model_copy(update={"morale": state.morale + 5}).zobrist_hash() != expected
+    restored = GameSession.from_serialized(session.serialize_state(), session.serialize_rng())
+    assert restored.state.zobrist_hash() == expected
+
+
+def test_verify_mode_reports_untracked_in_place_mutation(monkeypatch) -> None:
+    state = GameEngine.headless().new_session(game_id="drift", seed=4).state
+    state.zobrist_hash()
+    state.court.current_issue_tags.append("supply")
+
+    monkeypatch.setattr(zobrist, "VERIFY", True)
+    with pytest.raises(zobrist.ZobristMismatchError):
+        state.zobrist_hash()
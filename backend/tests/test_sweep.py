@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import pytest
+
+from app.engine import balance
+from app.engine.simulator import simulate
+from app.engine.sweep import SweepCache, applied_overrides, format_table, grid, point_key, run_sweep
+
+
+def test_overrides_are_scoped_to_the_block() -> None:
+    threshold = balance.DOOM_THRESHOLD
+    checks = balance.CHECK_BASE_PROB
+
+    with applied_overrides({"DOOM_THRESHOLD": 30, "CHECK_BASE_PROB.jieting_masu": 0.9}):
+        assert balance.DOOM_THRESHOLD == 30
+        assert balance.CHECK_BASE_PROB["jieting_masu"] == 0.9
+
+    assert balance.DOOM_THRESHOLD == threshold
+    assert balance.CHECK_BASE_PROB is checks
+    assert checks["jieting_masu"] != 0.9
+
+
+def test_unknown_knob_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        run_sweep([{"CHECK_BASE_PROB.not_a_check": 0.5}], runs=1)
+
+
+def test_sweep_reuses_cached_points(tmp_path) -> None:
+    cache = SweepCache(tmp_path)
+    points = grid({"DOOM_THRESHOLD": [12, 20]})
+
+    first = run_sweep(points, runs=30, seed=3, cache=cache)
+    second = run_sweep(points, runs=30, seed=3, cache=cache)
+
+    assert [result.cached for result in first] == [False, False]
+    assert [result.cached for result in second] == [True, True]
+    assert [result.summary for result in first] == [result.summary for result in second]
+    assert first[0].summary == simulate(n=30, seed=3)
+    assert "DOOM_THRESHOLD" in format_table(second, sort_by="avg_turns")
+
+
+def test_point_key_tracks_baseline_constants(monkeypatch) -> None:
+    before = point_key({}, runs=10, seed=1)
+    monkeypatch.setattr(balance, "INITIAL_FOOD", balance.INITIAL_FOOD + 1)
+    assert point_key({}, runs=10, seed=1) != before
+    monkeypatch.undo()
+    assert point_key({}, runs=10, seed=1) == before
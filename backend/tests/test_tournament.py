@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pytest
+
+from app.engine.policy import DefaultPolicy
+from app.engine.simulator import simulate
+from app.engine.tournament import run_tournament
+
+
+class RenamedDefault(DefaultPolicy):
+    name = "default_copy"
+
+
+def test_default_policy_in_tournament_matches_simulate() -> None:
+    report = run_tournament(["default", "uniform"], n=30, seed=9)
+
+    assert report.results[0].summary == simulate(n=30, seed=9)
+    assert report.comparisons[0].policy == "uniform"
+    assert report.comparisons[0].low <= report.comparisons[0].win_rate_diff <= report.comparisons[0].high
+
+
+def test_identical_policies_pair_to_zero_difference() -> None:
+    report = run_tournament(["default", RenamedDefault()], n=20, seed=4)
+
+    comparison = report.comparisons[0]
+    assert comparison.discordant_games == 0
+    assert comparison.win_rate_diff == comparison.low == comparison.high == 0.0
+
+
+def test_unknown_policy_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        run_tournament(["default", "missing"], n=1)
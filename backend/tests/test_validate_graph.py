@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import pytest
+
 from app.engine.graph import EventGraph, validate_graph
 from app.models.event_graph import GraphModel, NodeModel, NodeType
 
@@ -290,3 +292,51 @@ def test_validate_graph_rejects_invalid_catalog_endpoints(monkeypatch) -> None:
         raise AssertionError("validate_graph should fail for invalid catalog endpoint")
     except ValueError as exc:
         assert "Invalid route endpoints" in str(exc)
+
+
+def _single_choice_graph(option: dict) -> GraphModel:
+    return GraphModel(
+        start_node="start",
+        nodes=[
+            NodeModel(id="start", node_type=NodeType.CHOICE, text="start", meta=_meta(), options=[option]),
+            NodeModel(id="WIN", node_type=NodeType.TERMINAL, text="win", meta=_meta("changan"), outcome="WIN"),
+        ],
+    )
+
+
+def test_event_graph_rejects_unknown_condition_at_load_time() -> None:
+    model = _single_choice_graph({"id": "go", "label": "go", "next": "WIN", "condition": "chapter_is_9"})
+
+    with pytest.raises(ValueError, match="Node start: Unknown condition: chapter_is_9"):
+        EventGraph(model)
+
+
+def test_event_graph_rejects_unknown_effect_state_keys_at_load_time() -> None:
+    bad_delta = _single_choice_graph({"id": "go", "label": "go", "next": "WIN", "effects": {"delta": {"gold": 5}}})
+    bad_key = _single_choice_graph({"id": "go", "label": "go", "next": "WIN", "effects": {"set_flag": {"x": True}}})
+
+    with pytest.raises(ValueError, match="Unknown delta target: gold"):
+        EventGraph(bad_delta)
+    with pytest.raises(ValueError, match="Unknown effect keys"):
+        EventGraph(bad_key)
+
+
+def test_compiled_effects_match_interpreted_effects_for_every_graph_entry() -> None:
+    from app.engine.effects import apply_effects
+    from app.engine.graph import load_default_graph
+    from app.engine.runtime import GameEngine
+
+    graph = load_default_graph()
+    engine = GameEngine.headless(graph=graph)
+    for node in graph.nodes.values():
+        entries = [(option.effects, graph.option_effects[(node.id, option.id)]) for option in node.options]
+        entries += [(node.success_effects, graph.check_effects[(node.id, True)])]
+        entries += [(node.fail_effects, graph.check_effects[(node.id, False)])]
+        for post_zhuge in (False, True):
+            for effects, compiled in entries:
+                expected = engine._initial_state("fx", 1)
+                expected.flags["post_zhuge_era"] = post_zhuge
+                actual = expected.model_copy(deep=True)
+                apply_effects(expected, effects)
+                compiled(actual)
+                assert actual.model_dump() == expected.model_dump()
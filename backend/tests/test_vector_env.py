@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.assistant import court_dialogue
+from app.engine.vector_env import VectorGameEnv
+
+
+def _rollout(seeds: list[int], steps: int = 400):
+    env = VectorGameEnv(len(seeds))
+    rng = np.random.default_rng(0)
+    observations, mask = env.reset(seeds)
+    trajectory = [observations]
+    total_rewards = np.zeros(len(seeds), dtype=np.float32)
+    dones = np.zeros(len(seeds), dtype=bool)
+    for _ in range(steps):
+        actions = [int(rng.choice(np.flatnonzero(row))) if row.any() else 0 for row in mask]
+        observations, rewards, dones, _ = env.step(actions)
+        total_rewards += rewards
+        mask = env.action_mask()
+        trajectory.append(observations)
+        if dones.all():
+            break
+    return env, trajectory, total_rewards, dones
+
+
+def test_random_legal_rollout_finishes_every_game() -> None:
+    env, trajectory, total_rewards, dones = _rollout([1, 2, 3, 4, 5, 6])
+
+    assert dones.all()
+    assert set(total_rewards.tolist()) <= {-1.0, 1.0}
+    assert trajectory[0].shape == (6, env.observation_size)
+    assert all(np.isfinite(observations).all() for observations in trajectory)
+    assert not env.action_mask().any()
+
+
+def test_rollout_is_reproducible_for_same_seeds_and_actions() -> None:
+    _, first, first_rewards, _ = _rollout([7, 8, 9])
+    _, second, second_rewards, _ = _rollout([7, 8, 9])
+
+    assert len(first) == len(second)
+    assert all(np.array_equal(a, b) for a, b in zip(first, second))
+    assert np.array_equal(first_rewards, second_rewards)
+
+
+def test_illegal_action_is_rejected() -> None:
+    env = VectorGameEnv(1)
+    _, mask = env.reset([3])
+    illegal = int(np.flatnonzero(~mask[0])[0])
+
+    with pytest.raises(ValueError):
+        env.step([illegal])
+
+
+def test_illegal_action_leaves_the_whole_batch_unstepped() -> None:
+    env = VectorGameEnv(3)
+    before, mask = env.reset([3, 4, 5])
+    illegal = int(np.flatnonzero(~mask[2])[0])
+
+    with pytest.raises(ValueError):
+        env.step([0, 0, illegal])
+    assert np.array_equal(env.observations(), before)
+    assert env.steps.tolist() == [0, 0, 0]
+
+
+def test_games_are_truncated_at_the_step_cap(monkeypatch) -> None:
+    monkeypatch.setattr("app.engine.balance.MAX_TURNS_PER_RUN", 2)
+    env = VectorGameEnv(2)
+    env.reset([11, 12])
+
+    _, _, dones, infos = env.step([0, 0])
+    assert not dones.any() and not any(info["truncated"] for info in infos)
+    _, rewards, dones, infos = env.step([0, 0])
+    assert dones.all() and all(info["truncated"] for info in infos)
+    assert rewards.tolist() == [0.0, 0.0]
+    assert not env.action_mask().any()
+
+
+def test_reset_and_step_never_call_the_model(monkeypatch) -> None:
+    env = VectorGameEnv(2)
+    seen: list[bool] = []
+    real_ensure_court_session = env.engine._ensure_court_session
+
+    def recording_ensure_court_session(session):  # noqa: ANN001
+        seen.append(court_dialogue._live_calls_allowed.get())
+        return real_ensure_court_session(session)
+
+    monkeypatch.setattr(env.engine, "_ensure_court_session", recording_ensure_court_session)
+    env.reset([1, 2])
+    env.step([0, 0])
+
+    assert seen and not any(seen)
+    assert court_dialogue._live_calls_allowed.get()